@@ -46,6 +46,8 @@ source venv/bin/activate
 echo "Installing Python packages..."
 pip install --upgrade pip
 pip install django gunicorn psycopg2-binary requests python-decouple
+# uvicorn workers for GUNICORN_PROFILE=asgi (see gunicorn.conf.py)
+pip install uvicorn uvicorn-worker
 
 # Restore backed up .env file or create new one from example
 if [ -n "$ENV_BACKUP_FILE" ] && [ -f "$ENV_BACKUP_FILE" ]; then
@@ -62,6 +64,12 @@ else
     echo "✓ .env file already exists"
 fi
 
+# gunicorn sits behind nginx; per-address throttles need the forwarded client address
+if ! grep -q '^TRUSTED_PROXY_COUNT=' .env; then
+    echo "TRUSTED_PROXY_COUNT=1" >> .env
+    echo "✓ TRUSTED_PROXY_COUNT=1 added to .env (nginx reverse proxy)"
+fi
+
 # Run Django migrations
 echo "Running Django migrations..."
 python manage.py makemigrations
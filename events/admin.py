@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Pledges, Transactions, Messages, MessageTemplate, Event, EventUser, RegistrationRequest
+from .models import Pledges, Transactions, Messages, MessageTemplate, Event, EventUser, RegistrationRequest, Contact, DeliveryStatusEvent, OutboundEmail, AccountDeletionJob, MessageArchive
 
 # Register your models here.
 
@@ -8,9 +8,15 @@ from .models import Pledges, Transactions, Messages, MessageTemplate, Event, Eve
 class PledgesAdmin(admin.ModelAdmin):
     list_display = ['name', 'event_id', 'pledge', 'amount_paid', 'status', 'created_at']
     list_filter = ['status', 'event_id', 'whatsapp_status']
-    search_fields = ['name', 'mobile_number', 'event_id']
+    search_fields = ['name', 'mobile_number', 'phone_e164', 'event_id']
     ordering = ['-created_at']
 
+@admin.register(Contact)
+class ContactAdmin(admin.ModelAdmin):
+    list_display = ['name', 'phone_e164', 'created_at']
+    search_fields = ['name', 'phone_e164']
+    ordering = ['name']
+
 @admin.register(Transactions)
 class TransactionsAdmin(admin.ModelAdmin):
     list_display = ['transaction_id', 'pledge', 'amount', 'method', 'created_at']
@@ -20,11 +26,42 @@ class TransactionsAdmin(admin.ModelAdmin):
 
 @admin.register(Messages)
 class MessagesAdmin(admin.ModelAdmin):
-    list_display = ['pledge', 'method', 'status', 'created_at']
-    list_filter = ['method', 'status', 'created_at']
-    search_fields = ['pledge__name', 'message']
+    list_display = ['pledge', 'method', 'status', 'provider', 'latency_ms', 'created_at']
+    list_filter = ['method', 'status', 'provider', 'created_at']
+    search_fields = ['pledge__name', 'message', 'provider_message_id']
+    ordering = ['-created_at']
+
+@admin.register(DeliveryStatusEvent)
+class DeliveryStatusEventAdmin(admin.ModelAdmin):
+    list_display = ['provider_message_id', 'provider', 'status', 'reported_at', 'received_at', 'processed_at']
+    list_filter = ['provider', 'status']
+    search_fields = ['provider_message_id']
+    ordering = ['-id']
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'recipients']
+    ordering = ['-id']
+
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event_id', 'pledge', 'method', 'status', 'created_at', 'archived_at']
+    list_filter = ['method', 'status']
+    search_fields = ['event_id', 'pledge__name', 'provider_message_id']
+    readonly_fields = ['message']
+    exclude = ['body']
+    raw_id_fields = ['pledge']
     ordering = ['-created_at']
 
+@admin.register(AccountDeletionJob)
+class AccountDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ['user_email', 'status', 'phase', 'events_deleted', 'pledges_deleted', 'transactions_deleted', 'messages_deleted', 'created_at', 'completed_at']
+    list_filter = ['status']
+    search_fields = ['user_email', 'user_name']
+    ordering = ['-id']
+
 @admin.register(MessageTemplate)
 class MessageTemplateAdmin(admin.ModelAdmin):
     list_display = ['name', 'event_id', 'type', 'is_active', 'created_at']
@@ -62,7 +99,7 @@ class EventAdmin(admin.ModelAdmin):
 class EventUserAdmin(UserAdmin):
     list_display = ['email', 'full_name', 'is_verified', 'is_active', 'date_joined']
     list_filter = ['is_verified', 'is_active', 'date_joined']
-    search_fields = ['email', 'full_name', 'mobile_number']
+    search_fields = ['email', 'full_name', 'mobile_number', 'phone_e164']
     ordering = ['-date_joined']
     
     fieldsets = (
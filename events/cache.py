@@ -0,0 +1,313 @@
+"""
+Caching layer for the events app.
+
+Wraps Django's cache framework (configured through CACHES in settings) with:
+
+- versioned keys scoped per namespace, tenant (user) and event, so a whole
+  scope can be invalidated by bumping one counter;
+- get-or-compute helpers with stampede protection: a short lock ensures a
+  single process recomputes an expired value while the others keep serving
+  the stale copy, and values are refreshed probabilistically shortly before
+  they expire.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+
+
+T = TypeVar('T')
+
+# Cache alias used by the events app
+CACHE_ALIAS: str = getattr(settings, 'EVENTS_CACHE_ALIAS', 'default')
+
+# Prefix for every key written by this module
+KEY_PREFIX = 'events'
+
+# Default time a computed value is considered fresh, in seconds
+DEFAULT_TIMEOUT: int = getattr(settings, 'EVENTS_CACHE_TIMEOUT', 300)
+
+# How long a recompute lock is held before another process may take over
+LOCK_TIMEOUT = 30
+
+# How long to wait for another process to fill a missing value
+LOCK_WAIT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+
+# Weight of the probabilistic early refresh (0 disables it)
+EARLY_REFRESH_BETA = 1.0
+
+# Keys must stay valid for memcached: no whitespace/control chars, <= 250 bytes
+MAX_KEY_LENGTH = 200
+_UNSAFE_KEY_CHARS = re.compile(r'[^\x21-\x7e]')
+
+
+def get_cache() -> BaseCache:
+    """Return the cache backend used by the events app."""
+    return caches[CACHE_ALIAS]
+
+
+def namespace_scope(namespace: str) -> str:
+    return f"ns:{namespace}"
+
+
+def tenant_scope(tenant: Hashable) -> str:
+    return f"tenant:{tenant}"
+
+
+def event_scope(event: Hashable) -> str:
+    return f"event:{event}"
+
+
+def _clean_key(key: str) -> str:
+    """Make a key safe for every backend, hashing it when needed."""
+    if len(key) <= MAX_KEY_LENGTH and not _UNSAFE_KEY_CHARS.search(key):
+        return key
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    return f"{_UNSAFE_KEY_CHARS.sub('_', key)[:MAX_KEY_LENGTH - 33]}:{digest}"
+
+
+def _version_key(scope: str) -> str:
+    return _clean_key(f"{KEY_PREFIX}:version:{scope}")
+
+
+def get_versions(scopes: Iterable[str]) -> dict[str, int]:
+    """Return the current version of each scope (0 when never bumped)."""
+    scopes = list(scopes)
+    stored = get_cache().get_many([_version_key(scope) for scope in scopes])
+    return {scope: stored.get(_version_key(scope), 0) for scope in scopes}
+
+
+async def aget_versions(scopes: Iterable[str]) -> dict[str, int]:
+    """Async version of get_versions()."""
+    scopes = list(scopes)
+    stored = await get_cache().aget_many([_version_key(scope) for scope in scopes])
+    return {scope: stored.get(_version_key(scope), 0) for scope in scopes}
+
+
+def bump_version(scope: str) -> None:
+    """Invalidate every key built with the given scope."""
+    cache = get_cache()
+    key = _version_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Start from a time-based value so a lost counter never reuses old keys
+        cache.set(key, int(time.time()), None)
+
+
+def invalidate_namespace(namespace: str) -> None:
+    bump_version(namespace_scope(namespace))
+
+
+def invalidate_tenant(tenant: Hashable) -> None:
+    bump_version(tenant_scope(tenant))
+
+
+def invalidate_event(event: Hashable) -> None:
+    bump_version(event_scope(event))
+
+
+def _key_scopes(namespace: str, tenant: Optional[Hashable], event: Optional[Hashable]) -> list[str]:
+    scopes = [namespace_scope(namespace)]
+    if tenant is not None:
+        scopes.append(tenant_scope(tenant))
+    if event is not None:
+        scopes.append(event_scope(event))
+    return scopes
+
+
+def _versioned_key(
+    namespace: str,
+    parts: Iterable[Hashable],
+    tenant: Optional[Hashable],
+    event: Optional[Hashable],
+    scopes: list[str],
+    versions: dict[str, int],
+) -> str:
+    version_part = '.'.join(str(versions[scope]) for scope in scopes)
+    key_parts = [KEY_PREFIX, namespace]
+    if tenant is not None:
+        key_parts.append(f"t{tenant}")
+    if event is not None:
+        key_parts.append(f"e{event}")
+    key_parts.extend(str(part) for part in parts)
+    key_parts.append(f"v{version_part}")
+    return _clean_key(':'.join(key_parts))
+
+
+def make_key(
+    namespace: str,
+    *parts: Hashable,
+    tenant: Optional[Hashable] = None,
+    event: Optional[Hashable] = None,
+) -> str:
+    """
+    Build a versioned cache key.
+
+    The key embeds the current version of the namespace and, when given, of
+    the tenant and event scopes, so bumping any of them orphans the key.
+    """
+    scopes = _key_scopes(namespace, tenant, event)
+    return _versioned_key(namespace, parts, tenant, event, scopes, get_versions(scopes))
+
+
+async def amake_key(
+    namespace: str,
+    *parts: Hashable,
+    tenant: Optional[Hashable] = None,
+    event: Optional[Hashable] = None,
+) -> str:
+    """Async version of make_key()."""
+    scopes = _key_scopes(namespace, tenant, event)
+    return _versioned_key(namespace, parts, tenant, event, scopes, await aget_versions(scopes))
+
+
+def _store(cache: BaseCache, key: str, value: Any, timeout: int, duration: float) -> None:
+    # Keep the entry for twice its fresh lifetime so a stale copy can be
+    # served while one process recomputes it
+    expires_at = time.time() + timeout
+    cache.set(key, (value, expires_at, duration), timeout * 2)
+
+
+def _compute_and_store(cache: BaseCache, key: str, compute: Callable[[], T], timeout: int) -> T:
+    started = time.monotonic()
+    value = compute()
+    _store(cache, key, value, timeout, time.monotonic() - started)
+    return value
+
+
+def _should_refresh(expires_at: float, duration: float) -> bool:
+    """Decide whether to recompute, refreshing early with rising probability."""
+    now = time.time()
+    if now >= expires_at:
+        return True
+    if EARLY_REFRESH_BETA <= 0 or duration <= 0:
+        return False
+    return now - duration * EARLY_REFRESH_BETA * math.log(random.random() or 1e-12) >= expires_at
+
+
+def get_or_compute(
+    namespace: str,
+    compute: Callable[[], T],
+    *parts: Hashable,
+    tenant: Optional[Hashable] = None,
+    event: Optional[Hashable] = None,
+    timeout: Optional[int] = None,
+) -> T:
+    """
+    Return a cached value, computing and storing it when missing or expired.
+
+    Args:
+        namespace: Logical group of the value (e.g. 'dashboard_stats')
+        compute: Callable producing the value on a miss
+        *parts: Extra key components (filters, ids, ...)
+        tenant: Optional tenant (user id) the value belongs to
+        event: Optional event the value belongs to
+        timeout: Seconds the value stays fresh (default EVENTS_CACHE_TIMEOUT)
+    """
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    cache = get_cache()
+    key = make_key(namespace, *parts, tenant=tenant, event=event)
+    lock_key = f"{key}:lock"
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, duration = entry
+        if not _should_refresh(expires_at, duration):
+            return value
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            # Someone else is refreshing - serve the stale value meanwhile
+            return value
+        try:
+            return _compute_and_store(cache, key, compute, timeout)
+        finally:
+            cache.delete(lock_key)
+
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            return _compute_and_store(cache, key, compute, timeout)
+        finally:
+            cache.delete(lock_key)
+
+    # Another process is computing the value - wait briefly for it
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+
+    return _compute_and_store(cache, key, compute, timeout)
+
+
+async def _acompute_and_store(
+    cache: BaseCache, key: str, compute: Callable[[], Awaitable[T]], timeout: int
+) -> T:
+    started = time.monotonic()
+    value = await compute()
+    expires_at = time.time() + timeout
+    await cache.aset(key, (value, expires_at, time.monotonic() - started), timeout * 2)
+    return value
+
+
+async def aget_or_compute(
+    namespace: str,
+    compute: Callable[[], Awaitable[T]],
+    *parts: Hashable,
+    tenant: Optional[Hashable] = None,
+    event: Optional[Hashable] = None,
+    timeout: Optional[int] = None,
+) -> T:
+    """
+    Async version of get_or_compute() for async views: compute is a
+    coroutine function, and waiting for another process to fill the value
+    does not block the event loop.
+    """
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    cache = get_cache()
+    key = await amake_key(namespace, *parts, tenant=tenant, event=event)
+    lock_key = f"{key}:lock"
+
+    entry = await cache.aget(key)
+    if entry is not None:
+        value, expires_at, duration = entry
+        if not _should_refresh(expires_at, duration):
+            return value
+        if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+            return value
+        try:
+            return await _acompute_and_store(cache, key, compute, timeout)
+        finally:
+            await cache.adelete(lock_key)
+
+    if await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            return await _acompute_and_store(cache, key, compute, timeout)
+        finally:
+            await cache.adelete(lock_key)
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry[0]
+
+    return await _acompute_and_store(cache, key, compute, timeout)
+
+
+def delete(namespace: str, *parts: Hashable, tenant: Optional[Hashable] = None,
+           event: Optional[Hashable] = None) -> None:
+    """Delete a single cached value."""
+    get_cache().delete(make_key(namespace, *parts, tenant=tenant, event=event))
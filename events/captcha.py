@@ -0,0 +1,85 @@
+"""
+Math CAPTCHA for the public forms (registration, data deletion, account
+deletion).
+
+The challenge travels with the form as one signed, timestamped token, so
+nothing is stored when a form is rendered. The token carries a random nonce
+and an HMAC of the expected answer, never the answer itself. Checking an
+answer needs no database work: the signature and age are verified, then the
+nonce is recorded in the cache with cache.add() so each token is accepted at
+most once (wrong answers burn the token too, so a bot cannot try every
+answer against the same token). Used nonces only need to be kept until the
+token would have expired anyway.
+"""
+
+import random
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .cache import get_cache
+
+# Seconds a rendered challenge stays valid
+CAPTCHA_MAX_AGE = getattr(settings, 'CAPTCHA_MAX_AGE', 1800)
+
+_SIGNER_SALT = 'events.captcha'
+
+
+def _answer_digest(nonce, answer):
+    return salted_hmac(_SIGNER_SALT, f'{nonce}:{answer}').hexdigest()[:32]
+
+
+def new_challenge():
+    """
+    Return (question, token) for a new challenge.
+
+    Render the question and put the token in a hidden ``captcha_token``
+    field next to the ``captcha_answer`` input.
+    """
+    num1 = random.randint(1, 10)
+    num2 = random.randint(1, 10)
+    if random.choice(['+', '-']) == '+':
+        question = f"{num1} + {num2} = ?"
+        answer = num1 + num2
+    else:
+        # Make sure subtraction doesn't result in negative numbers
+        num1, num2 = max(num1, num2), min(num1, num2)
+        question = f"{num1} - {num2} = ?"
+        answer = num1 - num2
+
+    nonce = secrets.token_urlsafe(12)
+    token = signing.TimestampSigner(salt=_SIGNER_SALT).sign(
+        f'{nonce}:{_answer_digest(nonce, answer)}'
+    )
+    return question, token
+
+
+def verify_challenge(token, answer):
+    """
+    Check a submitted answer against its challenge token.
+
+    Returns False for a bad or expired signature, a token that was already
+    used, or a wrong answer.
+    """
+    if not token or not answer:
+        return False
+    try:
+        payload = signing.TimestampSigner(salt=_SIGNER_SALT).unsign(token, max_age=CAPTCHA_MAX_AGE)
+        nonce, digest = payload.split(':', 1)
+        answer = int(answer)
+    except (signing.BadSignature, ValueError):
+        return False
+
+    # Replay protection: only the first submission of a token counts
+    if not get_cache().add(f'events:captcha:used:{nonce}', 1, CAPTCHA_MAX_AGE):
+        return False
+
+    return constant_time_compare(digest, _answer_digest(nonce, answer))
+
+
+def challenge_context():
+    """Template context for a fresh challenge."""
+    question, token = new_challenge()
+    return {'captcha_question': question, 'captcha_token': token}
@@ -0,0 +1,286 @@
+"""
+Message channel backends.
+
+Each message method (sms, whatsapp, email, ...) is delivered by a channel
+backend configured in settings.MESSAGE_CHANNELS:
+
+    MESSAGE_CHANNELS = {
+        'whatsapp': {
+            'BACKEND': 'events.channels.WhatsAppChannel',
+            'CONCURRENCY': 4,     # parallel sends within send_many()
+            'RATE_LIMIT': 20,     # max sends per second, None for no limit
+            'BATCH_SIZE': 100,    # messages handed to send_many() at once
+            'OPTIONS': {},        # backend specific settings
+        },
+    }
+
+Backends implement send() for one message and may override send_many() to
+use a provider's bulk API; the default send_many() runs send() through a
+thread pool honouring CONCURRENCY and RATE_LIMIT.
+"""
+
+import logging
+import random
+import smtplib
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# Outcome of sending one message
+SendResult = namedtuple(
+    'SendResult',
+    ['success', 'provider_message_id', 'error', 'latency_ms'],
+    defaults=['', '', None],
+)
+
+
+class RateLimiter:
+    """Spaces calls so that at most `rate` happen per second, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class BaseChannel:
+    """Interface every channel backend implements."""
+
+    # Recorded on messages sent through this channel
+    provider = ''
+
+    def __init__(self, name, concurrency=1, rate_limit=None, batch_size=100, options=None):
+        self.name = name
+        self.concurrency = max(1, int(concurrency or 1))
+        self.rate_limit = rate_limit
+        self.batch_size = max(1, int(batch_size or 1))
+        self.options = options or {}
+        self.rate_limiter = RateLimiter(rate_limit)
+
+    def send(self, message):
+        """Deliver one message and return a SendResult."""
+        raise NotImplementedError('Channel backends must implement send()')
+
+    def send_many(self, messages):
+        """
+        Deliver several messages, returning one SendResult per message in order.
+
+        Messages must have their pledge loaded (select_related) since sends may
+        run in worker threads.
+        """
+        if self.concurrency == 1 or len(messages) == 1:
+            return [self._timed_send(message) for message in messages]
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(messages))) as executor:
+            return list(executor.map(self._timed_send, messages))
+
+    def _timed_send(self, message):
+        self.rate_limiter.wait()
+        started = time.monotonic()
+        try:
+            result = self.send(message)
+        except Exception as e:
+            logger.error(f"{self.name} channel failed to send message {message.pk}: {str(e)}")
+            result = SendResult(False, error=str(e))
+        latency_ms = int((time.monotonic() - started) * 1000)
+        return result._replace(latency_ms=latency_ms)
+
+
+class SMSChannel(BaseChannel):
+    """SMS placeholder; logs the message until an SMS provider is wired in."""
+
+    provider = 'sms_simulator'
+
+    def send(self, message):
+        from .tasks import send_sms
+
+        delay = self.options.get('SIMULATED_DELAY', 0)
+        if delay:
+            time.sleep(delay)
+        return SendResult(send_sms(message))
+
+
+class WhatsAppChannel(BaseChannel):
+    """WhatsApp Cloud API (Graph API) template messages."""
+
+    provider = 'whatsapp_cloud'
+
+    def send(self, message):
+        from .tasks import send_whatsapp
+
+        success = send_whatsapp(message)
+        return SendResult(success, message.provider_message_id if success else '')
+
+
+class EmailChannel(BaseChannel):
+    """
+    Email through Django's email backend, one connection per batch.
+
+    Each batch of up to BATCH_SIZE messages is sent over a single
+    get_connection() with send_messages(), one message at a time so every
+    message gets its own result. A dropped connection is reopened and the
+    message retried, up to MAX_RECONNECTS times per batch. CONCURRENCY is
+    not used: messages of a batch share one connection. deliver() does the
+    same for ready-made EmailMessage objects (transactional emails).
+
+    OPTIONS: CONNECTION (keyword arguments for get_connection(), e.g. host
+    and port) and MAX_RECONNECTS (default 2).
+    """
+
+    provider = 'smtp'
+
+    def send(self, message):
+        return self.send_many([message])[0]
+
+    def send_many(self, messages):
+        from .tasks import build_email_message
+
+        results = [None] * len(messages)
+        emails = []
+        positions = []
+        for position, message in enumerate(messages):
+            try:
+                emails.append(build_email_message(message))
+                positions.append(position)
+            except Exception as e:
+                results[position] = SendResult(False, error=str(e), latency_ms=0)
+
+        for position, result in zip(positions, self.deliver(emails)):
+            results[position] = result
+        return results
+
+    def deliver(self, emails, on_result=None):
+        """
+        Send Django EmailMessage objects, returning one SendResult per email.
+
+        ``on_result(index, result)`` is called as soon as each email is done,
+        so callers can record it before the rest of the batch is sent.
+        """
+        results = []
+        for start in range(0, len(emails), self.batch_size):
+            results.extend(self._deliver_batch(emails[start:start + self.batch_size], on_result, start))
+        return results
+
+    def get_connection(self):
+        return get_connection(**self.options.get('CONNECTION', {}))
+
+    def _deliver_batch(self, emails, on_result=None, offset=0):
+        max_reconnects = self.options.get('MAX_RECONNECTS', 2)
+        reconnects = 0
+        connection = self.get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"Could not connect to the mail server: {str(e)}")
+            results = [SendResult(False, error=f'Connection failed: {e}') for _ in emails]
+            if on_result:
+                for position, result in enumerate(results):
+                    on_result(offset + position, result)
+            return results
+
+        results = []
+        try:
+            for email in emails:
+                self.rate_limiter.wait()
+                started = time.monotonic()
+
+                while True:
+                    try:
+                        sent = connection.send_messages([email])
+                        result = SendResult(bool(sent), error='' if sent else 'Not accepted by the mail server')
+                        break
+                    except smtplib.SMTPServerDisconnected as e:
+                        error = e
+                    except smtplib.SMTPException as e:
+                        # Refused recipient, bad data, ...: fail this email only
+                        result = SendResult(False, error=str(e))
+                        break
+                    except OSError as e:
+                        error = e
+
+                    # The connection dropped - reopen it and retry this email
+                    if reconnects >= max_reconnects:
+                        result = SendResult(False, error=f'Connection lost: {error}')
+                        break
+                    reconnects += 1
+                    logger.warning(f"Mail server connection lost ({error}), reconnecting ({reconnects}/{max_reconnects})")
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception as e:
+                        logger.error(f"Reconnect to the mail server failed: {str(e)}")
+
+                latency_ms = int((time.monotonic() - started) * 1000)
+                results.append(result._replace(latency_ms=latency_ms))
+                if on_result:
+                    on_result(offset + len(results) - 1, results[-1])
+        finally:
+            connection.close()
+
+        sent_count = sum(1 for result in results if result.success)
+        logger.info(f"Email batch: {sent_count}/{len(emails)} sent, {reconnects} reconnects")
+        return results
+
+
+class FakeChannel(BaseChannel):
+    """
+    Local stand-in for load tests: sends nothing and returns fake provider ids.
+
+    OPTIONS: LATENCY (seconds per send, default 0.05) and FAILURE_RATE
+    (0..1, default 0).
+    """
+
+    provider = 'fake'
+
+    def send(self, message):
+        time.sleep(self.options.get('LATENCY', 0.05))
+        if random.random() < self.options.get('FAILURE_RATE', 0):
+            return SendResult(False, error='Simulated failure')
+        return SendResult(True, f'fake.{uuid.uuid4().hex}')
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel(method):
+    """Return the backend configured for a message method, or None if there is none."""
+    with _channels_lock:
+        if method not in _channels:
+            config = getattr(settings, 'MESSAGE_CHANNELS', {}).get(method)
+            if config is None:
+                return None
+            backend = import_string(config['BACKEND'])
+            _channels[method] = backend(
+                method,
+                concurrency=config.get('CONCURRENCY', 1),
+                rate_limit=config.get('RATE_LIMIT'),
+                batch_size=config.get('BATCH_SIZE', 100),
+                options=config.get('OPTIONS', {}),
+            )
+        return _channels[method]
+
+
+def reset_channels():
+    """Drop cached backend instances (after changing MESSAGE_CHANNELS)."""
+    with _channels_lock:
+        _channels.clear()
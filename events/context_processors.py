@@ -0,0 +1,130 @@
+"""
+Template context processors for the events app.
+
+Provides the user's active events and the currently selected event to every
+template, caching the event list so list pages do not re-query it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import cache
+from .models import Event
+
+
+# How long a user's active event list is cached, in seconds
+EVENT_LIST_CACHE_TIMEOUT = getattr(settings, 'EVENT_LIST_CACHE_TIMEOUT', 60)
+
+# Maximum number of users kept in the per-process cache
+EVENT_LIST_CACHE_MAX_ENTRIES = getattr(settings, 'EVENT_LIST_CACHE_MAX_ENTRIES', 1000)
+
+_local_cache = OrderedDict()
+_local_cache_lock = threading.Lock()
+
+
+def _load_user_events(user):
+    return list(
+        Event.objects.filter(created_by=user, is_active=True).order_by('-date', 'name')
+    )
+
+
+def get_user_events(user):
+    """
+    Get the user's active events, ordered by date then name.
+
+    The list is kept in a per-process cache in front of the shared cache.
+    Local entries are tied to the tenant's versioned key, so invalidations
+    made by other processes are noticed on the next request.
+    """
+    key = cache.make_key('event_list', tenant=user.pk)
+    now = time.monotonic()
+
+    with _local_cache_lock:
+        entry = _local_cache.get(user.pk)
+        if entry and entry[0] == key and entry[1] > now:
+            _local_cache.move_to_end(user.pk)
+            return entry[2]
+
+    events = cache.get_or_compute(
+        'event_list',
+        lambda: _load_user_events(user),
+        tenant=user.pk,
+        timeout=EVENT_LIST_CACHE_TIMEOUT
+    )
+
+    with _local_cache_lock:
+        _local_cache[user.pk] = (key, now + EVENT_LIST_CACHE_TIMEOUT, events)
+        _local_cache.move_to_end(user.pk)
+        while len(_local_cache) > EVENT_LIST_CACHE_MAX_ENTRIES:
+            _local_cache.popitem(last=False)
+
+    return events
+
+
+def invalidate_user_events(user_id):
+    """Drop the cached event list and other cached data of a user."""
+    with _local_cache_lock:
+        _local_cache.pop(user_id, None)
+    cache.invalidate_tenant(user_id)
+
+
+def set_session_value(session, key, value):
+    """
+    Store a session value only when it changes.
+
+    Assigning a session key marks the session modified even when the value
+    is the same, which makes the session middleware save it (a database
+    UPDATE with the db-backed engines) at the end of the request.
+    """
+    if session.get(key) != value:
+        session[key] = value
+
+
+def _build_base_context(request):
+    context = {}
+    if request.user.is_authenticated:
+        # Get user's events
+        events = get_user_events(request.user)
+        context['events'] = events
+
+        # Get selected event from the cached list
+        selected_event_id = request.session.get('selected_event_id')
+        selected_event = None
+
+        if selected_event_id:
+            selected_event = next(
+                (event for event in events if str(event.id) == str(selected_event_id)),
+                None
+            )
+            if not selected_event:
+                # Clear invalid event from session
+                request.session.pop('selected_event_id', None)
+
+        # If no selected event and user has events, select the first one
+        if not selected_event and events:
+            selected_event = events[0]
+            set_session_value(request.session, 'selected_event_id', selected_event.id)
+
+        context['selected_event'] = selected_event
+
+    return context
+
+
+def get_base_context(request):
+    """
+    Get base context for all views including events and selected event.
+
+    The result is computed once per request and shared between the view and
+    the context processor.
+    """
+    if not hasattr(request, '_event_base_context'):
+        request._event_base_context = _build_base_context(request)
+    return dict(request._event_base_context)
+
+
+def event_selection(request):
+    """Context processor exposing `events` and `selected_event` to templates."""
+    return get_base_context(request)
@@ -0,0 +1,65 @@
+"""
+Queryset filter helpers shared by the list views.
+
+Date filters are applied as half-open timestamp ranges
+(``start <= field < end``) rather than ``field__date`` lookups. Casting the
+column to a date hides it from its index, while a plain range on the
+timestamp can use it.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def _parse(value):
+    """Accept a date or an ISO 'YYYY-MM-DD' string; anything else is ignored."""
+    if not value:
+        return None
+    if hasattr(value, 'year'):
+        return value
+    try:
+        return parse_date(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _start_of_day(day, tz):
+    start = datetime.combine(day, time.min)
+    if settings.USE_TZ:
+        start = timezone.make_aware(start, tz)
+    return start
+
+
+def day_range(date_from=None, date_to=None, tz=None):
+    """
+    Convert an inclusive range of calendar days into timestamp bounds.
+
+    Returns (start, end) where either bound may be None. ``end`` is the start
+    of the day after ``date_to``, so it must be compared with ``<``. Days are
+    interpreted in ``tz``, defaulting to the active time zone.
+    """
+    tz = tz or timezone.get_current_timezone()
+    date_from = _parse(date_from)
+    date_to = _parse(date_to)
+
+    start = _start_of_day(date_from, tz) if date_from else None
+    end = _start_of_day(date_to + timedelta(days=1), tz) if date_to else None
+    return start, end
+
+
+def filter_date_range(queryset, field, date_from=None, date_to=None, tz=None):
+    """
+    Filter ``queryset`` to rows whose ``field`` timestamp falls on the given days.
+
+    Example:
+        filter_date_range(Transactions.objects.all(), 'created_at', '2025-01-01', '2025-01-31')
+    """
+    start, end = day_range(date_from, date_to, tz)
+    if start is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end is not None:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
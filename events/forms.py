@@ -1,4 +1,5 @@
 from django import forms
+from django.urls import reverse
 from .models import Pledges, Transactions, Messages, MessageTemplate, RegistrationRequest, Event, EventUser
 import uuid
 
@@ -45,6 +46,34 @@ class PledgeForm(forms.ModelForm):
         }
 
 
+class PledgeAutocompleteWidget(forms.Widget):
+    """
+    Search-as-you-type pledge picker.
+
+    Renders a hidden input holding the pledge id and a text input that queries
+    the pledge search endpoint, so forms never render every pledge as an option.
+    """
+    template_name = 'events/widgets/pledge_autocomplete.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value:
+            pledge = Pledges.objects.filter(pk=value).only('name', 'mobile_number').first()
+            if pledge:
+                label = f"{pledge.name} ({pledge.mobile_number})"
+        context['widget']['label'] = label
+        context['widget']['search_url'] = reverse('events:api_pledge_search')
+        return context
+
+
+def pledge_choice_queryset(event_names=None):
+    """Pledges a form may select, limited to the given events when provided."""
+    if event_names is None:
+        return Pledges.objects.all()
+    return Pledges.objects.filter(event_id__in=event_names)
+
+
 class TransactionForm(forms.ModelForm):
     class Meta:
         model = Transactions
@@ -73,6 +102,7 @@ class TransactionForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         self.pledge_id = kwargs.pop('pledge_id', None)
+        event_names = kwargs.pop('event_names', None)
         super().__init__(*args, **kwargs)
         
         # If no pledge_id is provided, add pledge as a regular dropdown field
@@ -91,13 +121,12 @@ class TransactionForm(forms.ModelForm):
                 self.pledge_id = None
         
         if not self.pledge_id:
-            # Add pledge as a dropdown field when no pledge_id is provided
+            # Add pledge as a search field when no pledge_id is provided
             self.fields['pledge'] = forms.ModelChoiceField(
-                queryset=Pledges.objects.all(),
-                widget=forms.Select(attrs={
+                queryset=pledge_choice_queryset(event_names),
+                widget=PledgeAutocompleteWidget(attrs={
                     'class': 'mt-1 block w-full border-gray-300 rounded-md shadow-sm focus:border-blue-500 focus:ring-blue-500 sm:text-sm'
                 }),
-                empty_label="Select a pledge"
             )
             # Move pledge field to the beginning
             field_order = ['pledge'] + [field for field in self.fields.keys() if field != 'pledge']
@@ -157,7 +186,7 @@ class MessageForm(forms.ModelForm):
         fields = ['pledge', 'message', 'method', 'status']
         
         widgets = {
-            'pledge': forms.Select(attrs={
+            'pledge': PledgeAutocompleteWidget(attrs={
                 'class': 'mt-1 block w-full border-gray-300 rounded-md shadow-sm focus:border-blue-500 focus:ring-blue-500 sm:text-sm'
             }),
             'message': forms.Textarea(attrs={
@@ -181,12 +210,15 @@ class MessageForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         pledge_id = kwargs.pop('pledge_id', None)
+        event_names = kwargs.pop('event_names', None)
         super().__init__(*args, **kwargs)
         
         # If pledge_id is provided, filter the pledge field
         if pledge_id:
-            self.fields['pledge'].queryset = Pledges.objects.filter(id=pledge_id)
+            self.fields['pledge'].queryset = pledge_choice_queryset(event_names).filter(id=pledge_id)
             self.fields['pledge'].initial = pledge_id
+        else:
+            self.fields['pledge'].queryset = pledge_choice_queryset(event_names)
 
 
 class PledgeSearchForm(forms.Form):
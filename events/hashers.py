@@ -0,0 +1,19 @@
+"""
+Password hashers.
+
+TunablePBKDF2PasswordHasher is Django's PBKDF2-SHA256 hasher with the
+iteration count taken from settings.PASSWORD_HASH_ITERATIONS. Hashes keep
+the 'pbkdf2_sha256' algorithm name and their own iteration count, so
+existing passwords still verify and are re-hashed at the configured cost on
+the user's next successful login.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
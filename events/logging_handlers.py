@@ -0,0 +1,438 @@
+"""
+Logging formatters, filters and handlers used by settings.LOGGING.
+
+- JSONFormatter writes one JSON object per line. Fields passed with
+  ``extra={'data': {...}}`` are added to the object, so send logs can be
+  parsed without regular expressions.
+- LogBudgetFilter caps how many records each logger may emit per level and
+  time window, so a bulk send cannot flood the log.
+- LockedRotatingFileHandler appends to a file shared by several processes
+  (gunicorn workers): writes and rotation happen under an exclusive lock on
+  a sidecar ``.lock`` file. Files are rotated by size and time, rotated
+  files are gzipped and old ones removed beyond a count and a total size.
+- QueuedFileHandler hands records to a background writer thread that does
+  the formatting and file I/O in batches, so logging calls on the request
+  and send paths only put the record on a queue. When the queue is full
+  records are dropped (and counted) instead of blocking the caller.
+
+This module is imported while settings are configured, so it must not
+import models or anything else that needs the app registry.
+"""
+
+import copy
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.thread,
+        }
+        data = getattr(record, 'data', None)
+        if isinstance(data, dict):
+            entry.update(data)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _reset_after_fork(obj):
+    """Call obj._after_fork() in forked children (e.g. gunicorn --preload workers)."""
+    if not hasattr(os, 'register_at_fork'):
+        return
+    ref = weakref.ref(obj)
+
+    def after_fork():
+        instance = ref()
+        if instance is not None:
+            instance._after_fork()
+
+    os.register_at_fork(after_in_child=after_fork)
+
+
+class LogBudgetFilter(logging.Filter):
+    """
+    Let each logger emit at most a budgeted number of records per level and window.
+
+    ``budgets`` maps logger names to ``{level name: records per window}``;
+    a budget set on a logger also covers its children (``events`` covers
+    ``events.tasks``). Levels without a budget are not limited. Records over
+    budget are dropped; the first record let through in a later window
+    reports how many were suppressed.
+
+        LogBudgetFilter(budgets={'events.sends': {'INFO': 6000}}, window=60)
+    """
+
+    def __init__(self, budgets=None, window=60):
+        super().__init__()
+        self.budgets = {
+            name: {logging.getLevelName(level) if isinstance(level, str) else level: limit
+                   for level, limit in levels.items()}
+            for name, levels in (budgets or {}).items()
+        }
+        self.window = window
+        self._counts = {}
+        self._suppressed = {}
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _budget_for(self, record):
+        name = record.name
+        while name:
+            levels = self.budgets.get(name)
+            if levels is not None and record.levelno in levels:
+                return name, levels[record.levelno]
+            name = name.rpartition('.')[0]
+        return None, None
+
+    def filter(self, record):
+        budget_name, limit = self._budget_for(record)
+        if budget_name is None:
+            return True
+
+        key = (budget_name, record.levelno)
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start = now
+                self._counts.clear()
+
+            count = self._counts.get(key, 0)
+            if count >= limit:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._counts[key] = count + 1
+            suppressed = self._suppressed.pop(key, 0)
+
+        if suppressed:
+            record.msg = (
+                f"[{suppressed} {record.levelname} records of {budget_name} suppressed by the log budget] "
+                f"{record.getMessage()}"
+            )
+            record.args = None
+        return True
+
+
+class LockedRotatingFileHandler(logging.FileHandler):
+    """
+    Multiprocess-safe appending file handler with size and time rotation.
+
+    Every write takes an exclusive flock on ``<filename>.lock``, checks
+    whether another process already rotated the file (and reopens it if so),
+    rotates when the file reached ``max_bytes`` or its ``interval`` (seconds,
+    aligned to the epoch, so 86400 rotates at midnight UTC) is over, then
+    appends. Rotated files are named ``<filename>.<timestamp>``, gzipped in a
+    background thread when ``compress`` is set, and the oldest are removed
+    beyond ``backup_count`` files or ``max_total_bytes`` bytes.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, interval=86400, backup_count=10,
+                 max_total_bytes=None, compress=True, encoding='utf-8', delay=False):
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self.compress = compress
+        self.rollover_at = None
+        super().__init__(filename, mode='a', encoding=encoding, delay=delay)
+        self.lock_path = f'{self.baseFilename}.lock'
+        self._lock_file = None
+        self._compressors = []
+        _reset_after_fork(self)
+
+    def _after_fork(self):
+        # A flock is shared by every copy of the descriptor: the child needs
+        # its own to exclude the parent
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _open(self):
+        stream = super()._open()
+        self.rollover_at = self._next_rollover(os.fstat(stream.fileno()))
+        return stream
+
+    def _next_rollover(self, stat):
+        if not self.interval:
+            return None
+        # A file still holding older entries rolls over at the end of their period
+        started = stat.st_mtime if stat.st_size else time.time()
+        return (int(started // self.interval) + 1) * self.interval
+
+    def _acquire_file_lock(self):
+        if fcntl is None:
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self.lock_path, 'a')
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+
+    def _release_file_lock(self):
+        if fcntl is not None and self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _reopen_if_rotated(self):
+        """Reopen the file when another process renamed it away."""
+        if self.stream is None:
+            self.stream = self._open()
+            return
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            current = None
+        opened = os.fstat(self.stream.fileno())
+        if current is None or (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            self.stream.close()
+            self.stream = self._open()
+
+    def should_rollover(self, pending_bytes=0):
+        if self.max_bytes:
+            # Other processes append too, so ask the file rather than tell()
+            size = os.fstat(self.stream.fileno()).st_size
+            if size and size + pending_bytes > self.max_bytes:
+                return True
+        return self.rollover_at is not None and time.time() >= self.rollover_at
+
+    def do_rollover(self):
+        self.stream.close()
+        self.stream = None
+
+        rotated = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S')}"
+        suffix = 0
+        candidate = rotated
+        while os.path.exists(candidate) or os.path.exists(f'{candidate}.gz'):
+            suffix += 1
+            candidate = f'{rotated}.{suffix}'
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, candidate)
+
+        self.stream = self._open()
+
+        if self.compress:
+            self._compressors = [thread for thread in self._compressors if thread.is_alive()]
+            thread = threading.Thread(target=self._compress_and_prune, args=(candidate,), daemon=True)
+            thread.start()
+            self._compressors.append(thread)
+        else:
+            self.prune()
+
+    def _compress_and_prune(self, path):
+        try:
+            with open(path, 'rb') as source, gzip.open(f'{path}.gz.tmp', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.rename(f'{path}.gz.tmp', f'{path}.gz')
+            os.remove(path)
+        except OSError:
+            pass
+        self.prune()
+
+    def rotated_files(self):
+        """Rotated files of this log, oldest first."""
+        paths = [
+            path for path in glob.glob(f'{glob.escape(self.baseFilename)}.*')
+            if path != self.lock_path and not path.endswith('.tmp')
+        ]
+        return sorted(paths, key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+
+    def prune(self):
+        """Remove the oldest rotated files beyond backup_count and max_total_bytes."""
+        files = self.rotated_files()
+        sizes = {}
+        for path in files:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError:
+                sizes[path] = 0
+        total = sum(sizes.values())
+
+        while files and (
+            (self.backup_count and len(files) > self.backup_count)
+            or (self.max_total_bytes and total > self.max_total_bytes)
+        ):
+            path = files.pop(0)
+            total -= sizes[path]
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def emit(self, record):
+        self.emit_many([record])
+
+    def emit_many(self, records):
+        """Format records and append them with a single write under the file lock."""
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        data = ''.join(lines)
+
+        with self.lock:
+            try:
+                self._acquire_file_lock()
+                try:
+                    self._reopen_if_rotated()
+                    if self.should_rollover(len(data)):
+                        self.do_rollover()
+                    self.stream.write(data)
+                    self.stream.flush()
+                finally:
+                    self._release_file_lock()
+            except Exception:
+                self.handleError(records[0])
+
+    def close(self):
+        # Let rotated files finish compressing before the process exits
+        for thread in self._compressors:
+            thread.join()
+        self._compressors = []
+        with self.lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+        super().close()
+
+
+class QueuedFileHandler(logging.handlers.QueueHandler):
+    """
+    Write to a LockedRotatingFileHandler from a background thread.
+
+    The formatter and level set on this handler apply as usual; formatting
+    and file I/O happen on the writer thread, which writes whatever queued
+    up since its last write in one go. ``queue_size`` bounds memory use when
+    the disk falls behind: further records are dropped and counted in
+    ``dropped``, and a warning with the count is written once the queue
+    drains. Other keyword arguments configure the file handler.
+    """
+
+    _stop = object()
+
+    def __init__(self, filename, queue_size=10000, batch_size=500, **file_options):
+        super().__init__(queue.Queue(queue_size))
+        self.target = self.create_target(filename, **file_options)
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._closed = False
+        self._start_writer()
+        _reset_after_fork(self)
+
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._write_loop, name='log-writer', daemon=True)
+        self._writer.start()
+
+    def _after_fork(self):
+        # Threads do not survive fork: start a writer with a fresh queue
+        self.queue = queue.Queue(self.queue.maxsize)
+        self._dropped_lock = threading.Lock()
+        if not self._closed:
+            self._start_writer()
+
+    def create_target(self, filename, **file_options):
+        """Build the handler that writes on the background thread."""
+        return LockedRotatingFileHandler(filename, **file_options)
+
+    def setFormatter(self, fmt):
+        # Records are formatted by the target on the writer thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Merge args now (they may change after this call) but leave the
+        # formatting to the writer thread. Other handlers still see the
+        # original record.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+
+        if self.dropped:
+            with self._dropped_lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                notice = logging.makeLogRecord({
+                    'name': __name__,
+                    'levelno': logging.WARNING,
+                    'levelname': 'WARNING',
+                    'msg': f'Log queue was full: dropped {dropped} records',
+                })
+                try:
+                    self.queue.put_nowait(notice)
+                except queue.Full:
+                    with self._dropped_lock:
+                        self.dropped += dropped
+
+    def _write_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(record is self._stop for record in batch)
+            records = [record for record in batch if record is not self._stop]
+            try:
+                if records:
+                    self.target.emit_many(records)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Wait until the records queued so far are written."""
+        if not self._closed:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        try:
+            if not self._closed:
+                self._closed = True
+                # Wait for room instead of failing when the queue is full
+                self.queue.put(self._stop)
+                self._writer.join()
+                self.target.close()
+        finally:
+            super().close()
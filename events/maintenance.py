@@ -0,0 +1,199 @@
+"""
+Periodic maintenance jobs.
+
+Jobs delete in bounded batches, each batch its own short transaction, so a
+large backlog never holds long locks or builds one huge DELETE. Run them
+through the purge_expired management command (e.g. from cron); the
+registration and password reset views also trigger them through
+maybe_run_maintenance().
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import get_cache
+from .models import EventUser, MessageArchive, Messages, RegistrationRequest
+from .queue_stats import deferred_counter_updates, purge_stale_created_counters
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds between automatic runs triggered by maybe_run_maintenance()
+MAINTENANCE_INTERVAL = getattr(settings, 'MAINTENANCE_INTERVAL', 3600)
+
+_next_local_check = 0.0
+_next_local_check_lock = threading.Lock()
+
+
+# Messages in these statuses are final and may be archived
+ARCHIVABLE_MESSAGE_STATUSES = ('sent', 'delivered', 'read', 'failed')
+
+# Session engines that keep sessions in the django_session table
+DATABASE_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def delete_in_batches(queryset, batch_size=1000, progress=None):
+    """
+    Delete the rows of a queryset, batch_size primary keys at a time.
+
+    progress, if given, is called with the number of rows deleted after each
+    batch. Returns the number of rows deleted, not counting cascades.
+    Message counter changes of a batch (see queue_stats) are applied once.
+    """
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        with transaction.atomic(), deferred_counter_updates():
+            _, per_model = model.objects.filter(pk__in=pks).delete()
+        count = per_model.get(model._meta.label, 0)
+        deleted += count
+        if progress is not None:
+            progress(count)
+        if len(pks) < batch_size:
+            break
+    return deleted
+
+
+def purge_expired_sessions(batch_size=1000):
+    """
+    Delete expired sessions.
+
+    Database-backed sessions are deleted in batches; other engines clean up
+    after themselves (cache, signed cookies) or through their own
+    clear_expired() (file). Returns the number of database rows deleted.
+    """
+    if settings.SESSION_ENGINE not in DATABASE_SESSION_ENGINES:
+        import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+        return 0
+
+    deleted = delete_in_batches(
+        Session.objects.filter(expire_date__lt=timezone.now()),
+        batch_size,
+    )
+    if deleted:
+        logger.info(f"Purged {deleted} expired sessions")
+    return deleted
+
+
+def purge_expired_registration_requests(batch_size=1000):
+    """
+    Delete registration requests past their expiry.
+
+    Verified requests are deleted too: the account exists by then and the
+    request only holds a copy of the password hash.
+    """
+    deleted = delete_in_batches(
+        RegistrationRequest.objects.filter(expires_at__lt=timezone.now()),
+        batch_size,
+    )
+    if deleted:
+        logger.info(f"Purged {deleted} expired registration requests")
+    return deleted
+
+
+def clear_expired_reset_tokens(batch_size=1000):
+    """Clear password reset tokens past their expiry, batch_size users at a time."""
+    now = timezone.now()
+    expired = EventUser.objects.filter(password_reset_expires__lt=now)
+    cleared = 0
+    while True:
+        pks = list(expired.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        cleared += EventUser.objects.filter(pk__in=pks).update(
+            password_reset_token=None, password_reset_expires=None
+        )
+        if len(pks) < batch_size:
+            break
+    if cleared:
+        logger.info(f"Cleared {cleared} expired password reset tokens")
+    return cleared
+
+
+def archive_messages(days=None, batch_size=1000):
+    """
+    Move messages in a final status older than `days` days into
+    message_archive (see MessageArchive).
+
+    Each batch is copied and deleted in one transaction, so a message is
+    always in exactly one of the tables. days defaults to
+    MESSAGE_ARCHIVE_AFTER_DAYS. Returns the number of messages archived.
+    """
+    if days is None:
+        days = getattr(settings, 'MESSAGE_ARCHIVE_AFTER_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=days)
+    candidates = Messages.objects.filter(
+        created_at__lt=cutoff, status__in=ARCHIVABLE_MESSAGE_STATUSES
+    ).order_by('pk')
+
+    archived = 0
+    while True:
+        with transaction.atomic(), deferred_counter_updates():
+            batch = list(candidates.select_related('pledge')[:batch_size])
+            if not batch:
+                break
+            MessageArchive.objects.bulk_create(
+                [MessageArchive.from_message(message, message.pledge.event_id) for message in batch],
+                ignore_conflicts=True,
+            )
+            Messages.objects.filter(pk__in=[message.pk for message in batch]).delete()
+        archived += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    if archived:
+        logger.info(f"Archived {archived} messages older than {days} days")
+    return archived
+
+
+def run_maintenance(batch_size=1000):
+    """Run every purge job; returns a dict of counts per job."""
+    return {
+        'sessions': purge_expired_sessions(batch_size),
+        'registration_requests': purge_expired_registration_requests(batch_size),
+        'reset_tokens': clear_expired_reset_tokens(batch_size),
+        'message_counters': purge_stale_created_counters(),
+    }
+
+
+def maybe_run_maintenance():
+    """
+    Scheduler hook: run the purge jobs in the background at most once per
+    MAINTENANCE_INTERVAL across all processes.
+
+    Cheap enough to call from request handlers: most calls return after a
+    clock check; otherwise a cache.add() decides which process runs the jobs.
+    """
+    global _next_local_check
+
+    now = time.monotonic()
+    with _next_local_check_lock:
+        if now < _next_local_check:
+            return False
+        _next_local_check = now + MAINTENANCE_INTERVAL
+
+    if not get_cache().add('events:maintenance:last_run', timezone.now().isoformat(), MAINTENANCE_INTERVAL):
+        return False
+
+    from .tasks import run_background_worker
+
+    def work():
+        counts = run_maintenance()
+        logger.info(f"Maintenance run: {counts}")
+
+    run_background_worker('maintenance', work)
+    return True
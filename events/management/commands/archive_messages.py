@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from events.maintenance import archive_messages
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        'Move sent, delivered, read and failed messages older than --days days '
+        'into the compressed message archive, in batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help=f"Archive messages older than this many days (default: MESSAGE_ARCHIVE_AFTER_DAYS, {getattr(settings, 'MESSAGE_ARCHIVE_AFTER_DAYS', 90)})",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Messages moved per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, archiving every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=86400,
+            help='Seconds between runs when --loop is set (default: 86400)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            archived = archive_messages(days=options['days'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Archived {archived} messages.'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
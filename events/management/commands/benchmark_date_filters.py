@@ -0,0 +1,181 @@
+from datetime import timedelta
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from events.filters import day_range, filter_date_range
+from events.maintenance import delete_in_batches
+from events.models import Contact, Pledges, Transactions
+
+
+BENCHMARK_EVENT = 'benchmark-date-filters'
+BENCHMARK_PREFIX = 'BENCH-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare __date lookups with half-open timestamp ranges on the transactions '
+        'table: seeds benchmark rows, prints query plans and timings, then deletes '
+        'the rows again'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1_000_000,
+            help='Number of benchmark transactions to have in the table (default: 1000000)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Spread the seeded transactions over this many past days (default: 365)',
+        )
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=7,
+            help='Number of days matched by the benchmarked filter (default: 7)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows inserted or deleted per batch (default: 10000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per query; the best time is reported (default: 5)',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the benchmark rows for the next run instead of deleting them',
+        )
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='Delete benchmark rows kept by an earlier --keep run and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup(options['batch_size'])
+            return
+
+        try:
+            self.seed(options['rows'], options['days'], options['batch_size'])
+            self.benchmark(options)
+        finally:
+            if options['keep']:
+                self.stdout.write('Benchmark rows kept; remove them with --cleanup.')
+            else:
+                self.cleanup(options['batch_size'])
+
+    def benchmark(self, options):
+        today = timezone.localdate()
+        date_to = today - timedelta(days=options['days'] // 2)
+        date_from = date_to - timedelta(days=options['window'] - 1)
+
+        legacy = Transactions.objects.filter(
+            created_at__date__gte=date_from, created_at__date__lte=date_to
+        )
+        ranged = filter_date_range(Transactions.objects.all(), 'created_at', date_from, date_to)
+
+        start, end = day_range(date_from, date_to)
+        self.stdout.write(f'Filter: {date_from} .. {date_to} ({start.isoformat()} <= created_at < {end.isoformat()})')
+
+        for label, queryset in (('created_at__date', legacy), ('half-open range', ranged)):
+            self.report(label, queryset, options['repeat'])
+
+    def seed(self, rows, days, batch_size):
+        pledge, _ = Pledges.objects.get_or_create(
+            event_id=BENCHMARK_EVENT,
+            name='Benchmark',
+            defaults={'mobile_number': '0700000000', 'pledge': 0},
+        )
+        existing = pledge.transactions.count()
+        missing = rows - existing
+        if missing <= 0:
+            self.stdout.write(f'{existing} benchmark transactions already present.')
+            return
+
+        self.stdout.write(f'Seeding {missing} benchmark transactions...')
+        now = timezone.now()
+        span = days * 24 * 3600
+        methods = [method for method, _ in Transactions.PAYMENT_METHODS]
+
+        # created_at is auto_now_add; switch that off so rows get spread timestamps
+        created_at = Transactions._meta.get_field('created_at')
+        created_at.auto_now_add = False
+        try:
+            for offset in range(existing, rows, batch_size):
+                batch = [
+                    Transactions(
+                        pledge=pledge,
+                        amount=random.randint(1, 500) * 1000,
+                        method=random.choice(methods),
+                        transaction_id=f'{BENCHMARK_PREFIX}{index}',
+                        created_at=now - timedelta(seconds=random.randint(0, span)),
+                    )
+                    for index in range(offset, min(offset + batch_size, rows))
+                ]
+                Transactions.objects.bulk_create(batch)
+                self.stdout.write(f'  {offset + len(batch)} / {rows}')
+        finally:
+            created_at.auto_now_add = True
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def report(self, label, queryset, repeat):
+        plan = queryset.only('id').explain()
+        # An index range search shows up as SEARCH (SQLite) or Index Cond (PostgreSQL)
+        uses_index = any(
+            'created_at' in line and ('SEARCH' in line or 'Index Cond' in line)
+            for line in plan.splitlines()
+        )
+
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = queryset.count()
+            timings.append(time.perf_counter() - started)
+
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(plan)
+        self.stdout.write(f'rows matched: {count}, best of {repeat}: {min(timings) * 1000:.1f} ms')
+        if uses_index:
+            self.stdout.write(self.style.SUCCESS('created_at index used'))
+        else:
+            self.stdout.write(self.style.WARNING('created_at index NOT used'))
+
+    def cleanup(self, batch_size):
+        total = 0
+
+        def progress(count):
+            nonlocal total
+            total += count
+            self.stdout.write(f'  {total} benchmark rows deleted')
+
+        deleted = delete_in_batches(
+            Transactions.objects.filter(
+                pledge__event_id=BENCHMARK_EVENT,
+                transaction_id__startswith=BENCHMARK_PREFIX,
+            ),
+            batch_size,
+            progress=progress,
+        )
+        benchmark_pledges = Pledges.objects.filter(event_id=BENCHMARK_EVENT)
+        contact_ids = list(benchmark_pledges.exclude(contact=None).values_list('contact_id', flat=True))
+        delete_in_batches(benchmark_pledges, batch_size)
+        # Contacts created for the benchmark pledge, unless real pledges use them
+        Contact.objects.filter(id__in=contact_ids, pledges=None).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} benchmark rows.'))
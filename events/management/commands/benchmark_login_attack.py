@@ -0,0 +1,100 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from events.models import EventUser
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate a credential-stuffing burst against /login/ and report the CPU '
+        'time it costs a worker with and without attempt throttling'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--attempts',
+            type=int,
+            default=200,
+            help='Login attempts per run (default: 200)',
+        )
+        parser.add_argument(
+            '--ips',
+            type=int,
+            default=4,
+            help='Number of attacking client addresses (default: 4)',
+        )
+        parser.add_argument(
+            '--emails',
+            type=int,
+            default=20,
+            help='Number of targeted accounts (default: 20, one of them real)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=None,
+            help='PASSWORD_HASH_ITERATIONS to use for the runs (default: the setting)',
+        )
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        password = uuid.uuid4().hex
+        user = EventUser.objects.create_user(
+            f'bench-{run_id}@example.com', password, full_name='Login Benchmark', is_verified=True
+        )
+
+        overrides = {}
+        if options['iterations']:
+            overrides['PASSWORD_HASH_ITERATIONS'] = options['iterations']
+
+        self.stdout.write(
+            f"{options['attempts']} attempts from {options['ips']} addresses "
+            f"against {options['emails']} accounts"
+        )
+        self.stdout.write(
+            f"{'throttling':<12}{'rejected':>10}{'cpu s':>9}{'cpu ms/try':>12}{'wall s':>9}{'tries/s':>10}{'cpu %':>8}"
+        )
+
+        setup_test_environment()
+        try:
+            with override_settings(**overrides):
+                for enabled in (False, True):
+                    with override_settings(THROTTLE_ENABLED=enabled):
+                        self.run_attack(enabled, user, run_id, options)
+        finally:
+            teardown_test_environment()
+            user.delete()
+
+    def run_attack(self, enabled, user, run_id, options):
+        # Fresh addresses and accounts per run so counters start empty
+        prefix = f"{run_id}-{'on' if enabled else 'off'}"
+        network = random.randint(0, 255)
+        ips = [f'10.{network}.{index // 250}.{index % 250 + 1}' for index in range(options['ips'])]
+        emails = [user.email] + [
+            f'victim-{prefix}-{index}@example.com' for index in range(options['emails'] - 1)
+        ]
+        client = Client(HTTP_HOST='localhost')
+
+        rejected = 0
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        for attempt in range(options['attempts']):
+            response = client.post(
+                '/login/',
+                {'email': emails[attempt % len(emails)], 'password': f'wrong-{attempt}'},
+                REMOTE_ADDR=ips[attempt % len(ips)],
+            )
+            if response.status_code == 429:
+                rejected += 1
+        cpu = time.process_time() - cpu_started
+        wall = time.perf_counter() - wall_started
+
+        self.stdout.write(
+            f"{'on' if enabled else 'off':<12}{rejected:>10}{cpu:>9.2f}"
+            f"{cpu * 1000 / options['attempts']:>12.1f}{wall:>9.2f}"
+            f"{options['attempts'] / wall:>10.0f}{cpu / wall * 100:>8.0f}"
+        )
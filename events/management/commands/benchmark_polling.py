@@ -0,0 +1,194 @@
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from events.models import EventUser
+
+# Endpoints dashboards poll
+POLL_PATHS = [
+    '/api/message-queue-status/',
+    '/api/dashboard-stats/',
+    '/api/templates/?type=reminder',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent-poll throughput of the JSON endpoints on the sync '
+        '(WSGI) stack and the async (ASGI) stack'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Requests per stack (default: 2000)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help='Clients polling at the same time (default: 50)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Sync workers of the in-process WSGI stack (default: 4)',
+        )
+        parser.add_argument(
+            '--sync-url',
+            help='Base URL of a running sync deployment (GUNICORN_PROFILE=sync) to poll instead',
+        )
+        parser.add_argument(
+            '--async-url',
+            help='Base URL of a running ASGI deployment (GUNICORN_PROFILE=asgi) to poll instead',
+        )
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        user = EventUser.objects.create_user(
+            f'bench-{run_id}@example.com', uuid.uuid4().hex, full_name='Polling Benchmark', is_verified=True
+        )
+
+        self.stdout.write(
+            f"{options['requests']} requests per stack, {options['concurrency']} concurrent clients, "
+            f"paths: {', '.join(POLL_PATHS)}"
+        )
+        self.stdout.write(f"{'stack':<34}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'errors':>8}")
+
+        setup_test_environment()
+        try:
+            login = Client(HTTP_HOST='localhost')
+            login.force_login(user)
+            session_id = login.cookies[settings.SESSION_COOKIE_NAME].value
+
+            if options['sync_url'] or options['async_url']:
+                for label, base_url in (('sync', options['sync_url']), ('asgi', options['async_url'])):
+                    if base_url:
+                        self.report(f'{label} {base_url}', *self.run_http(base_url, session_id, options))
+            else:
+                self.report(
+                    f"wsgi, {options['workers']} sync workers",
+                    *self.run_wsgi(session_id, options),
+                )
+                self.report('asgi, 1 event loop', *asyncio.run(self.run_asgi(session_id, options)))
+        finally:
+            teardown_test_environment()
+            user.delete()
+
+    def report(self, label, elapsed, latencies, errors):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{label:<34}{len(latencies) / elapsed:>9.0f}{statistics.median(latencies or [0]) * 1000:>9.1f}"
+            f"{p95 * 1000:>9.1f}{(latencies[-1] if latencies else 0) * 1000:>9.1f}{errors:>8}"
+        )
+
+    def run_wsgi(self, session_id, options):
+        """
+        Poll through the WSGI handler: --concurrency client threads share a
+        pool of --workers threads standing in for sync workers, so a request
+        waits for a free worker and its latency includes the wait.
+        """
+        local = threading.local()
+        counter = iter(range(options['requests']))
+        counter_lock = threading.Lock()
+        latencies = []
+        errors = []
+
+        def poll(path):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST='localhost')
+                local.client.cookies[settings.SESSION_COOKIE_NAME] = session_id
+            return local.client.get(path).status_code == 200
+
+        def client_loop(pool):
+            while True:
+                with counter_lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                sent_at = time.perf_counter()
+                if pool.submit(poll, POLL_PATHS[index % len(POLL_PATHS)]).result():
+                    latencies.append(time.perf_counter() - sent_at)
+                else:
+                    errors.append(index)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            self.run_clients(lambda: client_loop(pool), options['concurrency'])
+        return time.perf_counter() - started, latencies, len(errors)
+
+    async def run_asgi(self, session_id, options):
+        """Poll through the ASGI handler with --concurrency concurrent clients."""
+        latencies = []
+        errors = 0
+        counter = iter(range(options['requests']))
+
+        async def client_loop():
+            nonlocal errors
+            client = AsyncClient(HTTP_HOST='localhost')
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_id
+            for index in counter:
+                sent_at = time.perf_counter()
+                response = await client.get(POLL_PATHS[index % len(POLL_PATHS)])
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - sent_at)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(options['concurrency'])))
+        return time.perf_counter() - started, latencies, errors
+
+    def run_http(self, base_url, session_id, options):
+        """Poll a running deployment over HTTP with --concurrency client threads."""
+        local = threading.local()
+        counter = iter(range(options['requests']))
+        counter_lock = threading.Lock()
+        latencies = []
+        errors = []
+
+        def client_loop():
+            local.session = requests.Session()
+            local.session.cookies.set(settings.SESSION_COOKIE_NAME, session_id)
+            while True:
+                with counter_lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                sent_at = time.perf_counter()
+                try:
+                    response = local.session.get(
+                        base_url.rstrip('/') + POLL_PATHS[index % len(POLL_PATHS)],
+                        allow_redirects=False,
+                        timeout=30,
+                    )
+                    ok = response.status_code == 200
+                except requests.RequestException:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - sent_at)
+                else:
+                    errors.append(index)
+
+        started = time.perf_counter()
+        self.run_clients(client_loop, options['concurrency'])
+        return time.perf_counter() - started, latencies, len(errors)
+
+    def run_clients(self, target, count):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,174 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from events.channels import WhatsAppChannel
+from events.logging_handlers import JSONFormatter, QueuedFileHandler
+from events.models import Messages, Pledges
+from events.tasks import apply_send_result
+
+
+# (label, formatter, queued, level, sample rate)
+MODES = [
+    ('verbose text, sync, DEBUG', 'text', False, logging.DEBUG, 1.0),
+    ('text, sync, INFO', 'text', False, logging.INFO, 1.0),
+    ('json, sync, INFO', 'json', False, logging.INFO, 1.0),
+    ('json, queued, INFO', 'json', True, logging.INFO, 1.0),
+    ('json, queued, INFO, sampled', 'json', True, logging.INFO, None),
+]
+
+BENCHMARK_LOGGERS = ['events.tasks', 'events.sends', 'events.channels']
+
+
+class StubWhatsAppHandler(BaseHTTPRequestHandler):
+    """Answers like the WhatsApp Cloud API messages endpoint."""
+
+    counter = itertools.count(1)
+    latency = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps({
+            'messaging_product': 'whatsapp',
+            'contacts': [{'input': '255700000000', 'wa_id': '255700000000'}],
+            'messages': [{'id': f'wamid.bench{next(self.counter)}'}],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure WhatsApp sends per second with each logging mode '
+        '(verbose/text/json, sync/queued, sampled) against a local API stub'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=2000,
+            help='Sends per mode (default: 2000)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Parallel sends, as WHATSAPP_CONCURRENCY (default: 4)',
+        )
+        parser.add_argument(
+            '--sample-rate',
+            type=float,
+            default=0.1,
+            help='SEND_LOG_SAMPLE_RATE of the sampled mode (default: 0.1)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per mode; the best run is reported (default: 3)',
+        )
+        parser.add_argument(
+            '--stub-latency',
+            type=float,
+            default=0,
+            help='Seconds the stub API waits before answering (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        StubWhatsAppHandler.latency = options['stub_latency']
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubWhatsAppHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        pledge = Pledges(
+            id=1, event_id='benchmark', name='Benchmark',
+            mobile_number='0700000000', phone_e164='+255700000000', pledge=0,
+        )
+        messages = [
+            Messages(id=index, pledge=pledge, method='whatsapp', message='Benchmark message')
+            for index in range(1, options['count'] + 1)
+        ]
+        channel = WhatsAppChannel('whatsapp', concurrency=options['concurrency'], batch_size=100)
+
+        self.stdout.write(
+            f"{options['count']} sends per mode, concurrency {options['concurrency']}, "
+            f"stub API at {base_url}"
+        )
+        self.stdout.write(f"{'mode':<32}{'sends/s':>10}{'drain ms':>10}{'lines':>8}{'KiB':>9}")
+
+        loggers = [logging.getLogger(name) for name in BENCHMARK_LOGGERS]
+        saved = [(logger, logger.handlers[:], logger.level, logger.propagate) for logger in loggers]
+        try:
+            with override_settings(WHATSAPP_ACCESS_TOKEN='benchmark-token-0000', WHATSAPP_API_BASE_URL=base_url):
+                for label, log_format, queued, level, sample_rate in MODES:
+                    if sample_rate is None:
+                        sample_rate = options['sample_rate']
+                        label = f'{label} {sample_rate:g}'
+                    with override_settings(SEND_LOG_SAMPLE_RATE=sample_rate):
+                        runs = [
+                            self.run_mode(log_format, queued, level, loggers, channel, messages)
+                            for _ in range(options['repeat'])
+                        ]
+                    rate, drain, lines, size = max(runs)
+                    self.stdout.write(
+                        f'{label:<32}{rate:>10.0f}{drain * 1000:>10.1f}{lines:>8}{size / 1024:>9.0f}'
+                    )
+        finally:
+            for logger, handlers, level, propagate in saved:
+                logger.handlers = handlers
+                logger.setLevel(level)
+                logger.propagate = propagate
+            server.shutdown()
+
+    def run_mode(self, log_format, queued, level, loggers, channel, messages):
+        """Send every message once; returns (sends/s, drain seconds, log lines, log bytes)."""
+        fd, path = tempfile.mkstemp(prefix='send-logging-', suffix='.log')
+        os.close(fd)
+        handler = QueuedFileHandler(path) if queued else logging.FileHandler(path)
+        if log_format == 'json':
+            handler.setFormatter(JSONFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(
+                '{levelname} {asctime} {module} {process:d} {thread:d} {message}', style='{'
+            ))
+        handler.setLevel(level)
+        for logger in loggers:
+            logger.handlers = [handler]
+            logger.setLevel(level)
+            logger.propagate = False
+
+        try:
+            started = time.perf_counter()
+            for start in range(0, len(messages), channel.batch_size):
+                batch = messages[start:start + channel.batch_size]
+                for message, result in zip(batch, channel.send_many(batch)):
+                    apply_send_result(message, channel, result)
+            elapsed = time.perf_counter() - started
+
+            drain_started = time.perf_counter()
+            handler.flush()
+            drain = time.perf_counter() - drain_started
+        finally:
+            handler.close()
+
+        with open(path, 'rb') as log_file:
+            lines = sum(1 for _ in log_file)
+        size = os.path.getsize(path)
+        os.remove(path)
+        return len(messages) / elapsed, drain, lines, size
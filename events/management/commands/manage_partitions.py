@@ -0,0 +1,100 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from events.partitions import (
+    PARTITIONED_TABLES, convert_table, detach_old_partitions, ensure_partitions, is_partitioned,
+)
+from events.queue_stats import rebuild_message_counters
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Monthly partitions for messages and transactions (PostgreSQL only): '
+        'convert the tables once with --convert, then run regularly to create '
+        'future partitions and detach old ones'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=sorted(PARTITIONED_TABLES),
+            help='Table to manage; repeat for several (default: all)',
+        )
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert the tables to partitioned tables, copying existing rows (maintenance window)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows copied per transaction by --convert (default: 10000)',
+        )
+        parser.add_argument(
+            '--keep-legacy',
+            action='store_true',
+            help='Keep the original table (<table>_unpartitioned) after --convert',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Create partitions up to this many months ahead (default: 3)',
+        )
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            default=None,
+            help='Detach partitions that ended more than this many months ago (default: keep all)',
+        )
+        parser.add_argument(
+            '--drop-detached',
+            action='store_true',
+            help='Drop partitions detached by --retain-months instead of keeping them as tables',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Table partitioning needs PostgreSQL.')
+
+        for table in options['table'] or sorted(PARTITIONED_TABLES):
+            if options['convert']:
+                try:
+                    copied = convert_table(
+                        table,
+                        batch_size=options['batch_size'],
+                        months_ahead=options['months_ahead'],
+                        keep_legacy=options['keep_legacy'],
+                        progress=lambda count, table=table: self.stdout.write(f'{table}: {count} rows copied'),
+                    )
+                except RuntimeError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(self.style.SUCCESS(f'{table}: partitioned, {copied} rows copied.'))
+
+            with connection.cursor() as cursor:
+                partitioned = is_partitioned(cursor, table)
+            if not partitioned:
+                self.stdout.write(self.style.WARNING(f'{table} is not partitioned; run with --convert first.'))
+                continue
+
+            created = ensure_partitions(table, months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{table}: created {len(created)} partitions{': ' + ', '.join(created) if created else ''}."
+            ))
+
+            if options['retain_months'] is not None:
+                detached = detach_old_partitions(
+                    table, options['retain_months'], drop=options['drop_detached']
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f"{table}: {'dropped' if options['drop_detached'] else 'detached'} {len(detached)} partitions"
+                    f"{': ' + ', '.join(detached) if detached else ''}."
+                ))
+                if detached and table == 'messages':
+                    # The detached rows left without passing the delete signals
+                    counts = rebuild_message_counters()
+                    self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(counts)} message counters.'))
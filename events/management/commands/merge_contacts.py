@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from events.models import Contact, Pledges
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Link pledges to contacts and merge duplicate contacts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'contact_ids',
+            nargs='*',
+            type=int,
+            help='Contact IDs to merge; the first ID is kept and the rest are merged into it',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of pledges to link per batch (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        contact_ids = options['contact_ids']
+
+        if contact_ids:
+            self.merge(contact_ids)
+        else:
+            self.link(options['batch_size'])
+
+    def merge(self, contact_ids):
+        if len(contact_ids) < 2:
+            raise CommandError('Provide at least two contact IDs to merge.')
+
+        contacts = Contact.objects.in_bulk(contact_ids)
+        missing = [contact_id for contact_id in contact_ids if contact_id not in contacts]
+        if missing:
+            raise CommandError(f'Contacts not found: {", ".join(map(str, missing))}')
+
+        target = contacts[contact_ids[0]]
+        others = [contacts[contact_id] for contact_id in contact_ids[1:]]
+
+        with transaction.atomic():
+            moved = target.merge(*others)
+
+        logger.info(f"Merged contacts {contact_ids[1:]} into {target.pk}, moved {moved} pledges")
+        self.stdout.write(
+            self.style.SUCCESS(f'Merged {len(others)} contacts into {target}. Moved {moved} pledges.')
+        )
+
+    def link(self, batch_size):
+        """Attach pledges that have no contact yet, creating contacts as needed."""
+        linked_count = 0
+        last_pk = 0
+
+        while True:
+            pledges = list(
+                Pledges.objects.filter(pk__gt=last_pk, contact__isnull=True)
+                .exclude(phone_e164='')
+                .order_by('pk')
+                .only('pk', 'name', 'phone_e164', 'contact')[:batch_size]
+            )
+            if not pledges:
+                break
+
+            names = {}
+            for pledge in pledges:
+                names.setdefault(pledge.phone_e164, pledge.name)
+
+            with transaction.atomic():
+                Contact.objects.bulk_create(
+                    [Contact(phone_e164=phone, name=name) for phone, name in names.items()],
+                    ignore_conflicts=True,
+                )
+                contacts = dict(
+                    Contact.objects.filter(phone_e164__in=names).values_list('phone_e164', 'pk')
+                )
+                for pledge in pledges:
+                    pledge.contact_id = contacts.get(pledge.phone_e164)
+                Pledges.objects.bulk_update(pledges, ['contact'])
+
+            linked_count += len(pledges)
+            last_pk = pledges[-1].pk
+            self.stdout.write(f'Linked {linked_count} pledges so far...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Linked {linked_count} pledges to contacts.')
+        )
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Min
+from django.utils import timezone
+from events.models import Messages
+
+
+PERCENTILES = (50, 95, 99)
+
+
+class Command(BaseCommand):
+    help = 'Report provider send latency per provider over a recent time window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Only include messages sent in the last N days (default: 7)',
+        )
+        parser.add_argument(
+            '--provider',
+            help='Only report on this provider (e.g. whatsapp_cloud)',
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days'])
+        messages = Messages.objects.filter(sent_at__gte=since, latency_ms__isnull=False).exclude(provider='')
+        if options['provider']:
+            messages = messages.filter(provider=options['provider'])
+
+        rows = (
+            messages.values('provider')
+            .annotate(
+                count=Count('id'),
+                avg=Avg('latency_ms'),
+                min=Min('latency_ms'),
+                max=Max('latency_ms'),
+            )
+            .order_by('provider')
+        )
+
+        if not rows:
+            self.stdout.write(self.style.WARNING(f"No sends recorded in the last {options['days']} days."))
+            return
+
+        header = f"{'provider':<20}{'count':>8}{'avg':>9}{'min':>8}" + ''.join(
+            f"{f'p{p}':>8}" for p in PERCENTILES
+        ) + f"{'max':>8}"
+        self.stdout.write(f"Provider latency (ms) since {since:%Y-%m-%d %H:%M}")
+        self.stdout.write(header)
+
+        for row in rows:
+            provider_messages = messages.filter(provider=row['provider'])
+            percentiles = [
+                self.percentile(provider_messages, row['count'], p) for p in PERCENTILES
+            ]
+            self.stdout.write(
+                f"{row['provider']:<20}{row['count']:>8}{row['avg']:>9.0f}{row['min']:>8}"
+                + ''.join(f"{value:>8}" for value in percentiles)
+                + f"{row['max']:>8}"
+            )
+
+    def percentile(self, messages, count, percent):
+        """Nearest-rank percentile, read with a single offset query."""
+        index = max(0, min(count - 1, (count * percent + 99) // 100 - 1))
+        return messages.order_by('latency_ms').values_list('latency_ms', flat=True)[index]
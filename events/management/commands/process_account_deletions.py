@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from events.tasks import process_account_deletions
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run pending account deletion jobs, deleting account data in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows deleted per batch (default: ACCOUNT_DELETION_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, polling for new jobs',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Seconds between polls when --loop is set (default: 60)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            completed, failed = process_account_deletions(batch_size=options['batch_size'])
+            if completed or failed:
+                logger.info(f"Account deletions: {completed} completed, {failed} failed")
+            self.stdout.write(
+                self.style.SUCCESS(f'Completed {completed} account deletions, {failed} failed attempts.')
+            )
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from events.tasks import apply_delivery_status_events
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Apply stored delivery status callbacks to messages in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of callbacks applied per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, polling for new callbacks',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10,
+            help='Seconds between polls when --loop is set (default: 10)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            processed = apply_delivery_status_events(batch_size=batch_size)
+            if processed:
+                logger.info(f"Applied {processed} delivery status callbacks")
+            self.stdout.write(
+                self.style.SUCCESS(f'Applied {processed} delivery status callbacks.')
+            )
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from events.models import Messages
-from events.tasks import send_message_background
+from events.tasks import send_queued_messages
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,38 +33,27 @@ class Command(BaseCommand):
         )
         
         # Get queued messages
-        queued_messages = Messages.objects.filter(status='queued')[:batch_size]
+        queued_ids = list(Messages.objects.filter(status='queued').order_by('id').values_list('id', flat=True)[:batch_size])
         
-        if not queued_messages:
+        if not queued_ids:
             self.stdout.write(
                 self.style.WARNING('No queued messages found.')
             )
             return
         
-        processed_count = 0
-        
-        for message in queued_messages:
-            try:
-                # Update status to pending before processing
-                message.status = 'pending'
-                message.save()
-                
-                # Send message in background
-                send_message_background(message.id)
-                processed_count += 1
-                
-                self.stdout.write(
-                    f'Processing message {message.id} for {message.pledge.name}'
-                )
-                
-            except Exception as e:
-                logger.error(f'Error processing message {message.id}: {str(e)}')
-                self.stdout.write(
-                    self.style.ERROR(f'Failed to process message {message.id}: {str(e)}')
-                )
+        # Sent together so a reminder recorded on several pledges of one
+        # contact goes out once
+        try:
+            sent_count, failed_count = send_queued_messages(queued_ids)
+        except Exception as e:
+            logger.error(f'Error processing queued messages: {str(e)}')
+            self.stdout.write(
+                self.style.ERROR(f'Failed to process queued messages: {str(e)}')
+            )
+            sent_count, failed_count = 0, 0
         
         self.stdout.write(
-            self.style.SUCCESS(f'Processed {processed_count} messages successfully.')
+            self.style.SUCCESS(f'Processed {len(queued_ids)} messages: {sent_count} sent, {failed_count} failed.')
         )
         
         # Also process any failed messages that should be retried
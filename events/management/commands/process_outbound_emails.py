@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from events.tasks import deliver_outbound_emails
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send queued transactional emails (verification, password reset, ...) and due retries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help="Emails sent per mail server connection (default: OUTBOUND_EMAIL['BATCH_SIZE'])",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, polling for new emails and retries',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10,
+            help='Seconds between polls when --loop is set (default: 10)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = deliver_outbound_emails(batch_size=options['batch_size'])
+            if sent or failed:
+                logger.info(f"Outbound emails: {sent} sent, {failed} failed attempts")
+            self.stdout.write(
+                self.style.SUCCESS(f'Sent {sent} emails, {failed} failed attempts.')
+            )
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
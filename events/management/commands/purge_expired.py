@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from events.maintenance import run_maintenance
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions and registration requests and clear expired '
+        'password reset tokens, in bounded batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, purging every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=3600,
+            help='Seconds between purges when --loop is set (default: 3600)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            counts = run_maintenance(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Purged {counts['sessions']} expired sessions, "
+                f"{counts['registration_requests']} registration requests, "
+                f"{counts['message_counters']} old message counters; "
+                f"cleared {counts['reset_tokens']} reset tokens."
+            ))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from events.queue_stats import get_message_queue_stats, rebuild_message_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the message queue counters from the messages table'
+
+    def handle(self, *args, **options):
+        counts = rebuild_message_counters()
+        stats = get_message_queue_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(counts)} message counters: {stats['total_messages']} messages, "
+            f"{stats['recent_activity_24h']} in the last 24 hours."
+        ))
@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from events.channels import EmailChannel
+from events.models import Messages, Pledges
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Send test emails through the batched email channel, e.g. against a local '
+        'SMTP debugging server (python -m aiosmtpd -n -l localhost:1025)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            type=str,
+            default='localhost',
+            help='SMTP host (default: localhost)',
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=1025,
+            help='SMTP port (default: 1025)',
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=100,
+            help='Number of test emails to send (default: 100)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Emails sent per SMTP connection (default: 50)',
+        )
+
+    def handle(self, *args, **options):
+        channel = EmailChannel(
+            'email',
+            batch_size=options['batch_size'],
+            options={
+                'CONNECTION': {
+                    'backend': 'django.core.mail.backends.smtp.EmailBackend',
+                    'host': options['host'],
+                    'port': options['port'],
+                    'username': '',
+                    'password': '',
+                    'use_tls': False,
+                    'use_ssl': False,
+                },
+            },
+        )
+
+        # Unsaved rows: nothing is written to the database
+        messages = [
+            Messages(
+                pledge=Pledges(name=f'Test Recipient {index}', mobile_number=f'0700{index:06d}'),
+                message=f'Batched email channel test message {index}',
+                method='email',
+            )
+            for index in range(options['count'])
+        ]
+
+        self.stdout.write(
+            f"Sending {len(messages)} emails to {options['host']}:{options['port']} "
+            f"in batches of {options['batch_size']}..."
+        )
+        started = time.monotonic()
+        results = channel.send_many(messages)
+        elapsed = time.monotonic() - started
+
+        sent = sum(1 for result in results if result.success)
+        for index, result in enumerate(results):
+            if not result.success:
+                self.stdout.write(self.style.ERROR(f'  #{index}: {result.error}'))
+
+        style = self.style.SUCCESS if sent == len(results) else self.style.WARNING
+        self.stdout.write(style(f'Sent {sent}/{len(results)} emails in {elapsed:.2f}s.'))
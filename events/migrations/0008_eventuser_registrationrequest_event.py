@@ -11,6 +11,13 @@ class Migration(migrations.Migration):
         ('events', '0007_alter_messagetemplate_unique_together'),
     ]
 
+    # The custom user model must exist before admin's log entries point to
+    # it; without this a fresh database (and the test database) can't be
+    # migrated in one go
+    run_before = [
+        ('admin', '0001_initial'),
+    ]
+
     operations = [
         migrations.CreateModel(
             name='EventUser',
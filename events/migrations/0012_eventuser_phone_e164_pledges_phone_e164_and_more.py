@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_eventuser_password_reset_expires_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventuser',
+            name='phone_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Mobile number in E.164 format, derived from mobile_number', max_length=16, verbose_name='Normalized Mobile Number'),
+        ),
+        migrations.AddField(
+            model_name='pledges',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, help_text='Mobile number in E.164 format, derived from mobile_number', max_length=16, verbose_name='Normalized Mobile Number'),
+        ),
+        migrations.AddIndex(
+            model_name='pledges',
+            index=models.Index(fields=['phone_e164', 'event_id'], name='pledges_phone_e_cb5007_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def normalize_phone_number(phone_number, country_code='255'):
+    """
+    Copy of events.models.normalize_phone_number as of this migration, so
+    later changes to the model code don't change what the backfill wrote.
+    """
+    digits = ''.join(filter(str.isdigit, phone_number or ''))
+    if not digits:
+        return ''
+
+    if not digits.startswith(country_code):
+        if digits.startswith('0'):
+            digits = country_code + digits[1:]
+        else:
+            digits = country_code + digits
+
+    return f"+{digits}"
+
+
+def backfill_model(model):
+    """Fill phone_e164 for existing rows in primary key ordered batches."""
+    last_pk = 0
+    while True:
+        rows = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', 'mobile_number', 'phone_e164')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+
+        changed = []
+        for row in rows:
+            phone_e164 = normalize_phone_number(row.mobile_number)
+            if row.phone_e164 != phone_e164:
+                row.phone_e164 = phone_e164
+                changed.append(row)
+
+        if changed:
+            model.objects.bulk_update(changed, ['phone_e164'])
+        last_pk = rows[-1].pk
+
+
+def backfill_phone_e164(apps, schema_editor):
+    for model_name in ('Pledges', 'EventUser'):
+        backfill_model(apps.get_model('events', model_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_eventuser_phone_e164_pledges_phone_e164_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_backfill_phone_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_e164', models.CharField(help_text='Mobile number in E.164 format', max_length=16, unique=True, verbose_name='Normalized Mobile Number')),
+                ('name', models.CharField(help_text='Name of the pledger', max_length=200, verbose_name='Full Name')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Updated')),
+            ],
+            options={
+                'verbose_name': 'Contact',
+                'verbose_name_plural': 'Contacts',
+                'db_table': 'contacts',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pledges',
+            name='contact',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Pledger this pledge belongs to, shared across events', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pledges', to='events.contact', verbose_name='Contact'),
+        ),
+    ]
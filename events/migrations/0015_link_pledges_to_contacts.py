@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def link_pledges_to_contacts(apps, schema_editor):
+    """Create contacts for existing pledges and link them in batches."""
+    Pledges = apps.get_model('events', 'Pledges')
+    Contact = apps.get_model('events', 'Contact')
+
+    last_pk = 0
+    while True:
+        pledges = list(
+            Pledges.objects.filter(pk__gt=last_pk, contact__isnull=True)
+            .exclude(phone_e164='')
+            .order_by('pk')
+            .only('pk', 'name', 'phone_e164', 'contact')[:BATCH_SIZE]
+        )
+        if not pledges:
+            break
+
+        names = {}
+        for pledge in pledges:
+            names.setdefault(pledge.phone_e164, pledge.name)
+
+        Contact.objects.bulk_create(
+            [Contact(phone_e164=phone, name=name) for phone, name in names.items()],
+            ignore_conflicts=True,
+        )
+        contacts = dict(
+            Contact.objects.filter(phone_e164__in=names).values_list('phone_e164', 'pk')
+        )
+
+        for pledge in pledges:
+            pledge.contact_id = contacts.get(pledge.phone_e164)
+        Pledges.objects.bulk_update(pledges, ['contact'])
+        last_pk = pledges[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_contact_pledges_contact'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_pledges_to_contacts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:40
+
+from django.db import migrations, models
+
+
+# PostgreSQL only uses btree indexes for LIKE 'prefix%' (istartswith and
+# startswith lookups) when they use the pattern operator classes, unless the
+# database runs with the C collation.
+PATTERN_INDEXES = [
+    (
+        'pledges_event_name_upper_like',
+        'CREATE INDEX IF NOT EXISTS pledges_event_name_upper_like '
+        'ON pledges (event_id, UPPER(name::text) text_pattern_ops)',
+    ),
+    (
+        'pledges_event_phone_like',
+        'CREATE INDEX IF NOT EXISTS pledges_event_phone_like '
+        'ON pledges (event_id, phone_e164 varchar_pattern_ops)',
+    ),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, sql in PATTERN_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in PATTERN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_link_pledges_to_contacts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pledges',
+            index=models.Index(fields=['event_id', 'name'], name='pledges_event_i_00eff0_idx'),
+        ),
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
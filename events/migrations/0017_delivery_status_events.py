@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_pledges_event_id_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messages',
+            name='provider_message_id',
+            field=models.CharField(blank=True, default='', editable=False, help_text='ID assigned by the sending provider, used to match delivery callbacks', max_length=128, verbose_name='Provider Message ID'),
+        ),
+        migrations.CreateModel(
+            name='DeliveryStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='whatsapp', max_length=20, verbose_name='Provider')),
+                ('provider_message_id', models.CharField(max_length=128, verbose_name='Provider Message ID')),
+                ('status', models.CharField(help_text='Status as reported by the provider (sent, delivered, read, failed)', max_length=20, verbose_name='Reported Status')),
+                ('reported_at', models.DateTimeField(blank=True, help_text='Time of the status change according to the provider', null=True, verbose_name='Reported At')),
+                ('error', models.TextField(blank=True, help_text='Error details sent with failed statuses', verbose_name='Error')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Received At')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processed At')),
+            ],
+            options={
+                'verbose_name': 'Delivery Status Event',
+                'verbose_name_plural': 'Delivery Status Events',
+                'db_table': 'delivery_status_events',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='delivery_st_process_197aac_idx')],
+            },
+        ),
+    ]
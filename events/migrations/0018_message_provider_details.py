@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:45
+
+from django.db import migrations, models
+
+
+def clean_provider_message_ids(apps, schema_editor):
+    """Clear placeholder and duplicate provider ids so the unique constraint applies."""
+    Messages = apps.get_model('events', 'Messages')
+    Messages.objects.filter(provider_message_id='unknown').update(provider_message_id='')
+
+    seen = set()
+    duplicates = []
+    rows = (
+        Messages.objects.exclude(provider_message_id='')
+        .order_by('provider_message_id', 'id')
+        .values_list('id', 'provider_message_id')
+    )
+    for message_id, provider_message_id in rows.iterator():
+        if provider_message_id in seen:
+            duplicates.append(message_id)
+        seen.add(provider_message_id)
+    if duplicates:
+        Messages.objects.filter(id__in=duplicates).update(provider_message_id='')
+
+    # Only the WhatsApp Cloud API returned ids so far
+    Messages.objects.exclude(provider_message_id='').update(provider='whatsapp_cloud')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_delivery_status_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messages',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Time the provider API call took', null=True, verbose_name='Provider Latency (ms)'),
+        ),
+        migrations.AddField(
+            model_name='messages',
+            name='provider',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Service that delivered the message (e.g. whatsapp_cloud)', max_length=30, verbose_name='Provider'),
+        ),
+        migrations.AddField(
+            model_name='messages',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Handed To Provider At'),
+        ),
+        migrations.AddIndex(
+            model_name='messages',
+            index=models.Index(fields=['provider', 'sent_at'], name='messages_provide_eafeb9_idx'),
+        ),
+        migrations.RunPython(clean_provider_message_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='messages',
+            constraint=models.UniqueConstraint(condition=models.Q(('provider_message_id', ''), _negated=True), fields=('provider_message_id',), name='messages_provider_message_id_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('events', '0019_outbound_emails'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventuser',
+            index=models.Index(condition=models.Q(('password_reset_token__isnull', False)), fields=['password_reset_token'], name='event_users_reset_token_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventuser',
+            index=models.Index(condition=models.Q(('password_reset_expires__isnull', False)), fields=['password_reset_expires'], name='event_users_reset_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrationrequest',
+            index=models.Index(fields=['expires_at'], name='registratio_expires_357eec_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0020_purge_expired_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_email', models.EmailField(max_length=254, verbose_name='User Email')),
+                ('user_name', models.CharField(blank=True, max_length=200, verbose_name='User Name')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('phase', models.CharField(blank=True, help_text='What the worker is deleting', max_length=20, verbose_name='Phase')),
+                ('messages_deleted', models.PositiveIntegerField(default=0, verbose_name='Messages Deleted')),
+                ('transactions_deleted', models.PositiveIntegerField(default=0, verbose_name='Transactions Deleted')),
+                ('pledges_deleted', models.PositiveIntegerField(default=0, verbose_name='Pledges Deleted')),
+                ('events_deleted', models.PositiveIntegerField(default=0, verbose_name='Events Deleted')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('claimed_at', models.DateTimeField(blank=True, help_text='Last progress of the worker running this job', null=True, verbose_name='Claimed At')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Requested At')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Completed At')),
+                ('user', models.ForeignKey(blank=True, help_text='Account being deleted; empty once it is gone', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion_jobs', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Account Deletion Job',
+                'verbose_name_plural': 'Account Deletion Jobs',
+                'db_table': 'account_deletion_jobs',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'claimed_at'], name='account_del_status_3d2ffe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0021_account_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text='ID the message had in the messages table', primary_key=True, serialize=False, verbose_name='Message ID')),
+                ('event_id', models.CharField(help_text='Event of the pledge, copied so the archive can be searched per event', max_length=100, verbose_name='Event ID')),
+                ('body', models.BinaryField(help_text='UTF-8 message text, zlib-compressed when is_compressed is set', verbose_name='Message Content')),
+                ('is_compressed', models.BooleanField(default=True, verbose_name='Is Compressed')),
+                ('method', models.CharField(choices=[('sms', '📱 SMS'), ('whatsapp', '💬 WhatsApp'), ('email', '✉️ Email'), ('voice_call', '📞 Voice Call'), ('in_person', '🤝 In Person')], max_length=20, verbose_name='Communication Method')),
+                ('status', models.CharField(choices=[('queued', '🕐 Queued'), ('pending', '⏳ Pending'), ('sent', '📤 Sent'), ('delivered', '📥 Delivered'), ('failed', '❌ Failed'), ('read', '👁️ Read')], max_length=20, verbose_name='Message Status')),
+                ('provider', models.CharField(blank=True, default='', max_length=30, verbose_name='Provider')),
+                ('provider_message_id', models.CharField(blank=True, default='', max_length=128, verbose_name='Provider Message ID')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Handed To Provider At')),
+                ('latency_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Provider Latency (ms)')),
+                ('created_at', models.DateTimeField(verbose_name='Sent At')),
+                ('updated_at', models.DateTimeField(verbose_name='Last Updated')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archived At')),
+                ('pledge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='events.pledges', verbose_name='Related Pledge')),
+            ],
+            options={
+                'verbose_name': 'Archived Message',
+                'verbose_name_plural': 'Archived Messages',
+                'db_table': 'message_archive',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['event_id', 'created_at'], name='message_arc_event_i_06ced5_idx'), models.Index(fields=['pledge'], name='message_arc_pledge__38251a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:21
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+# Copies of events.queue_stats as of this migration, so later changes to
+# that module don't change what the migration does
+CREATED_COUNTER_HOURS = 48
+
+
+def status_key(status):
+    return f'status:{status}'
+
+
+def created_key(when):
+    return f"created:{when.astimezone(dt_timezone.utc).strftime('%Y%m%d%H')}"
+
+
+def populate_counters(apps, schema_editor):
+    """Seed the counters from the messages already stored."""
+    Messages = apps.get_model('events', 'Messages')
+    MessageQueueCounter = apps.get_model('events', 'MessageQueueCounter')
+
+    counts = {
+        status_key(row['status']): row['count']
+        for row in Messages.objects.values('status').annotate(count=Count('id')).order_by()
+    }
+    hourly = (
+        Messages.objects.filter(created_at__gte=timezone.now() - timedelta(hours=CREATED_COUNTER_HOURS))
+        .annotate(hour=TruncHour('created_at', tzinfo=dt_timezone.utc))
+        .values('hour').annotate(count=Count('id')).order_by()
+    )
+    for row in hourly:
+        counts[created_key(row['hour'])] = row['count']
+
+    MessageQueueCounter.objects.bulk_create(
+        [MessageQueueCounter(key=key, count=count) for key, count in counts.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0022_message_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageQueueCounter',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False, verbose_name='Key')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Count')),
+            ],
+            options={
+                'verbose_name': 'Message Queue Counter',
+                'verbose_name_plural': 'Message Queue Counters',
+                'db_table': 'message_queue_counters',
+                'ordering': ['key'],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
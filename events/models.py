@@ -9,6 +9,33 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import RegexValidator
 from django.utils import timezone
 from decimal import Decimal
+import zlib
+
+from . import cache
+
+
+# Default country calling code used when a local number is supplied
+DEFAULT_COUNTRY_CODE = '255'
+
+
+def normalize_phone_number(phone_number, country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Normalize a phone number to canonical E.164 form (e.g. +255712345678).
+    
+    Accepts the mixed formats stored in the database (+2557..., 2557..., 07...,
+    7...) and returns an empty string when no digits are present.
+    """
+    digits = ''.join(filter(str.isdigit, phone_number or ''))
+    if not digits:
+        return ''
+    
+    if not digits.startswith(country_code):
+        if digits.startswith('0'):
+            digits = country_code + digits[1:]
+        else:
+            digits = country_code + digits
+    
+    return f"+{digits}"
 
 
 class EventUserManager(BaseUserManager):
@@ -77,6 +104,14 @@ class EventUser(AbstractUser):
         verbose_name="Mobile Number",
         help_text="Tanzanian mobile number (e.g., +255123456789)"
     )
+    phone_e164 = models.CharField(
+        max_length=16,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Normalized Mobile Number",
+        help_text="Mobile number in E.164 format, derived from mobile_number"
+    )
     is_verified = models.BooleanField(
         default=False,
         verbose_name="Email Verified",
@@ -120,10 +155,28 @@ class EventUser(AbstractUser):
         verbose_name = 'Event User'
         verbose_name_plural = 'Event Users'
         ordering = ['-date_joined']
+        indexes = [
+            # Partial: only the few users with a pending reset are indexed
+            models.Index(
+                fields=['password_reset_token'],
+                name='event_users_reset_token_idx',
+                condition=models.Q(password_reset_token__isnull=False),
+            ),
+            models.Index(
+                fields=['password_reset_expires'],
+                name='event_users_reset_exp_idx',
+                condition=models.Q(password_reset_expires__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.full_name} ({self.email})"
 
+    def save(self, *args, **kwargs):
+        """Keep the normalized mobile number in sync with mobile_number."""
+        self.phone_e164 = normalize_phone_number(self.mobile_number)
+        super().save(*args, **kwargs)
+
     def generate_verification_token(self):
         """Generate a unique verification token"""
         import uuid
@@ -148,6 +201,73 @@ class EventUser(AbstractUser):
         return self.full_name.split()[0] if self.full_name else self.email
 
 
+class Contact(models.Model):
+    """
+    Model representing a pledger, shared across all events.
+    
+    Contacts are keyed by normalized mobile number so that the same person
+    pledging to several events is messaged once per bulk run.
+    """
+    phone_e164 = models.CharField(
+        max_length=16,
+        unique=True,
+        verbose_name="Normalized Mobile Number",
+        help_text="Mobile number in E.164 format"
+    )
+    name = models.CharField(
+        max_length=200,
+        verbose_name="Full Name",
+        help_text="Name of the pledger"
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Created At"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Last Updated"
+    )
+    
+    class Meta:
+        db_table = 'contacts'
+        verbose_name = 'Contact'
+        verbose_name_plural = 'Contacts'
+        ordering = ['name']
+    
+    def __str__(self):
+        """String representation of the contact."""
+        return f"{self.name} ({self.phone_e164})"
+    
+    @classmethod
+    def for_phone(cls, phone_e164, name=''):
+        """Return the contact for a normalized number, creating it if needed."""
+        contact, _ = cls.objects.get_or_create(
+            phone_e164=phone_e164,
+            defaults={'name': name}
+        )
+        return contact
+    
+    def merge(self, *others):
+        """
+        Merge other contacts into this one.
+        
+        Pledges of the merged contacts are moved to this contact and the
+        merged contacts are deleted.
+        
+        Returns:
+            int: Number of pledges moved
+        """
+        other_ids = [other.pk for other in others if other.pk != self.pk]
+        if not other_ids:
+            return 0
+        
+        moved = Pledges.objects.filter(contact_id__in=other_ids).update(contact=self)
+        Contact.objects.filter(pk__in=other_ids).delete()
+        return moved
+
+
 class Pledges(models.Model):
     """
     Model representing a pledge made by a person for an event.
@@ -186,6 +306,24 @@ class Pledges(models.Model):
         verbose_name="Mobile Number",
         help_text="Tanzanian mobile number (e.g., +255123456789)"
     )
+    phone_e164 = models.CharField(
+        max_length=16,
+        blank=True,
+        editable=False,
+        verbose_name="Normalized Mobile Number",
+        help_text="Mobile number in E.164 format, derived from mobile_number"
+    )
+    
+    contact = models.ForeignKey(
+        Contact,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='pledges',
+        verbose_name="Contact",
+        help_text="Pledger this pledge belongs to, shared across events"
+    )
     
     # Financial Information
     pledge = models.DecimalField(
@@ -235,12 +373,60 @@ class Pledges(models.Model):
             models.Index(fields=['event_id']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['phone_e164', 'event_id']),
+            models.Index(fields=['event_id', 'name']),
         ]
     
     def __str__(self):
         """String representation of the pledge."""
         return f"{self.name} - {self.event_id} - TSH {self.pledge:,.2f}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored phone number so contact changes can be detected."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_phone_e164 = instance.__dict__.get('phone_e164', models.DEFERRED)
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """Override save to keep the normalized mobile number and contact in sync."""
+        self.phone_e164 = normalize_phone_number(self.mobile_number)
+        
+        stored_phone = getattr(self, '_loaded_phone_e164', None)
+        if stored_phone is models.DEFERRED:
+            # Loaded without the phone (e.g. .only()): compare with the stored
+            # value so a save does not undo a Contact.merge
+            stored_phone = type(self).objects.filter(pk=self.pk).values_list('phone_e164', flat=True).first()
+        phone_changed = self.phone_e164 != stored_phone
+        if not self.phone_e164:
+            self.contact = None
+        elif self.contact_id is None or phone_changed:
+            self.contact = Contact.for_phone(self.phone_e164, self.name)
+        
+        super().save(*args, **kwargs)
+        self._loaded_phone_e164 = self.phone_e164
+    
+    @classmethod
+    def find_by_phone(cls, phone_number, event_id=None):
+        """
+        Look up pledges by mobile number using the normalized phone index.
+        
+        Args:
+            phone_number (str): Mobile number in any supported format
+            event_id (str): Optionally restrict the lookup to a single event
+            
+        Returns:
+            QuerySet: Pledges matching the normalized number
+        """
+        pledges = cls.objects.filter(phone_e164=normalize_phone_number(phone_number))
+        if event_id:
+            pledges = pledges.filter(event_id=event_id)
+        return pledges
+    
+    def whatsapp_recipient(self):
+        """Return the recipient id expected by the WhatsApp API (E.164 without '+')."""
+        return (self.phone_e164 or normalize_phone_number(self.mobile_number)).lstrip('+')
+    
     def balance(self):
         """
         Calculate the outstanding balance on this pledge.
@@ -429,6 +615,37 @@ class Messages(models.Model):
         help_text="Current status of the message"
     )
     
+    # Provider delivery details
+    provider = models.CharField(
+        max_length=30,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Provider",
+        help_text="Service that delivered the message (e.g. whatsapp_cloud)"
+    )
+    provider_message_id = models.CharField(
+        max_length=128,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Provider Message ID",
+        help_text="ID assigned by the sending provider, used to match delivery callbacks"
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Handed To Provider At"
+    )
+    latency_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Provider Latency (ms)",
+        help_text="Time the provider API call took"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -449,8 +666,26 @@ class Messages(models.Model):
             models.Index(fields=['method']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            # Live status streams look up recently updated messages
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['provider', 'sent_at']),
+        ]
+        constraints = [
+            # Messages without a provider id are not part of the constraint
+            models.UniqueConstraint(
+                fields=['provider_message_id'],
+                condition=~models.Q(provider_message_id=''),
+                name='messages_provider_message_id_uniq',
+            ),
         ]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored status so status counters can follow changes."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
     def __str__(self):
         """String representation of the message."""
         return f"Message to {self.pledge.name} via {self.get_method_display()} - {self.get_status_display()}"
@@ -473,6 +708,333 @@ class Messages(models.Model):
         """Mark message as failed."""
         self.status = 'failed'
         self.save()
+    
+    def record_provider_send(self, provider, provider_message_id='', latency_ms=None):
+        """Store the provider details of a successful send (saved by the caller)."""
+        self.provider = provider
+        self.provider_message_id = provider_message_id or ''
+        self.sent_at = timezone.now()
+        self.latency_ms = latency_ms
+    
+    @classmethod
+    def with_provider_ids(cls, provider_message_ids):
+        """
+        Messages matching any of the given provider ids.
+        
+        The explicit non-empty condition lets the database use the partial
+        unique index on provider_message_id.
+        """
+        return cls.objects.exclude(provider_message_id='').filter(
+            provider_message_id__in=provider_message_ids
+        )
+    
+    @classmethod
+    def find_by_provider_id(cls, provider_message_id):
+        """Look up a message by the ID its provider assigned, or None."""
+        if not provider_message_id:
+            return None
+        return cls.with_provider_ids([provider_message_id]).first()
+
+
+class MessageArchive(models.Model):
+    """
+    A message moved out of the messages table once it reached a final
+    status and aged past MESSAGE_ARCHIVE_AFTER_DAYS.
+    
+    Keeps the id and delivery details of the original message, with the
+    text zlib-compressed when that makes it smaller, and only the indexes
+    the archive view searches by, so old history costs little space and the
+    messages table stays small (see events.maintenance.archive_messages).
+    """
+    
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name="Message ID",
+        help_text="ID the message had in the messages table"
+    )
+    pledge = models.ForeignKey(
+        Pledges,
+        on_delete=models.CASCADE,
+        related_name='archived_messages',
+        verbose_name="Related Pledge"
+    )
+    event_id = models.CharField(
+        max_length=100,
+        verbose_name="Event ID",
+        help_text="Event of the pledge, copied so the archive can be searched per event"
+    )
+    body = models.BinaryField(
+        verbose_name="Message Content",
+        help_text="UTF-8 message text, zlib-compressed when is_compressed is set"
+    )
+    is_compressed = models.BooleanField(
+        default=True,
+        verbose_name="Is Compressed"
+    )
+    method = models.CharField(
+        max_length=20,
+        choices=Messages.MESSAGE_METHODS,
+        verbose_name="Communication Method"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Messages.MESSAGE_STATUS,
+        verbose_name="Message Status"
+    )
+    provider = models.CharField(
+        max_length=30,
+        blank=True,
+        default='',
+        verbose_name="Provider"
+    )
+    provider_message_id = models.CharField(
+        max_length=128,
+        blank=True,
+        default='',
+        verbose_name="Provider Message ID"
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Handed To Provider At"
+    )
+    latency_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Provider Latency (ms)"
+    )
+    created_at = models.DateTimeField(
+        verbose_name="Sent At"
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Last Updated"
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Archived At"
+    )
+    
+    class Meta:
+        db_table = 'message_archive'
+        verbose_name = 'Archived Message'
+        verbose_name_plural = 'Archived Messages'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['event_id', 'created_at']),
+            models.Index(fields=['pledge']),
+        ]
+    
+    def __str__(self):
+        return f"Archived message {self.id} via {self.get_method_display()} - {self.get_status_display()}"
+    
+    @staticmethod
+    def pack(text):
+        """Return (body, is_compressed) for a message text."""
+        raw = (text or '').encode('utf-8')
+        packed = zlib.compress(raw, 9)
+        if len(packed) < len(raw):
+            return packed, True
+        return raw, False
+    
+    @property
+    def message(self):
+        """The original message text."""
+        body = bytes(self.body)
+        if self.is_compressed:
+            body = zlib.decompress(body)
+        return body.decode('utf-8')
+    
+    @classmethod
+    def from_message(cls, message, event_id):
+        """Build (unsaved) the archive row of a Messages instance."""
+        body, is_compressed = cls.pack(message.message)
+        return cls(
+            id=message.id,
+            pledge_id=message.pledge_id,
+            event_id=event_id,
+            body=body,
+            is_compressed=is_compressed,
+            method=message.method,
+            status=message.status,
+            provider=message.provider,
+            provider_message_id=message.provider_message_id,
+            sent_at=message.sent_at,
+            latency_ms=message.latency_ms,
+            created_at=message.created_at,
+            updated_at=message.updated_at,
+        )
+
+
+class MessageQueueCounter(models.Model):
+    """
+    A running count of messages, kept so queue statistics never have to
+    scan the messages table.
+    
+    Keys are 'status:<status>' (messages currently in that status) and
+    'created:<YYYYmmddHH>' (messages created in that UTC hour, kept for the
+    last couple of days). Rows are adjusted in the same transaction as the
+    message changes (see events.queue_stats); rebuild_message_counters
+    recomputes them from the messages table.
+    """
+    
+    key = models.CharField(
+        max_length=40,
+        primary_key=True,
+        verbose_name="Key"
+    )
+    count = models.BigIntegerField(
+        default=0,
+        verbose_name="Count"
+    )
+    
+    class Meta:
+        db_table = 'message_queue_counters'
+        verbose_name = 'Message Queue Counter'
+        verbose_name_plural = 'Message Queue Counters'
+        ordering = ['key']
+    
+    def __str__(self):
+        return f"{self.key}: {self.count}"
+
+
+class DeliveryStatusEvent(models.Model):
+    """
+    A delivery status callback received from a messaging provider.
+    
+    Webhooks only store these rows; a consumer applies them to Messages in
+    batches (see events.tasks.apply_delivery_status_events).
+    """
+    
+    provider = models.CharField(
+        max_length=20,
+        default='whatsapp',
+        verbose_name="Provider"
+    )
+    provider_message_id = models.CharField(
+        max_length=128,
+        verbose_name="Provider Message ID"
+    )
+    status = models.CharField(
+        max_length=20,
+        verbose_name="Reported Status",
+        help_text="Status as reported by the provider (sent, delivered, read, failed)"
+    )
+    reported_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Reported At",
+        help_text="Time of the status change according to the provider"
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Error",
+        help_text="Error details sent with failed statuses"
+    )
+    received_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Received At"
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Processed At"
+    )
+    
+    class Meta:
+        db_table = 'delivery_status_events'
+        verbose_name = 'Delivery Status Event'
+        verbose_name_plural = 'Delivery Status Events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.provider} {self.provider_message_id}: {self.status}"
+
+
+class OutboundEmail(models.Model):
+    """
+    A transactional email (verification, password reset, ...) waiting to be sent.
+    
+    Views only store these rows; a worker delivers them and retries failed
+    sends with backoff (see events.tasks.deliver_outbound_emails).
+    """
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    subject = models.CharField(
+        max_length=255,
+        verbose_name="Subject"
+    )
+    body = models.TextField(
+        verbose_name="Plain Text Body"
+    )
+    html_body = models.TextField(
+        blank=True,
+        verbose_name="HTML Body"
+    )
+    from_email = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="From",
+        help_text="Sender address; DEFAULT_FROM_EMAIL when empty"
+    )
+    recipients = models.JSONField(
+        default=list,
+        verbose_name="Recipients",
+        help_text="List of recipient addresses"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name="Status"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Attempts"
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Next Attempt At"
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Claimed At",
+        help_text="When a worker started sending this email"
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Last Error"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Created At"
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Sent At"
+    )
+    
+    class Meta:
+        db_table = 'outbound_emails'
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
 
 
 class MessageTemplate(models.Model):
@@ -547,6 +1109,20 @@ class MessageTemplate(models.Model):
         """String representation of the message template."""
         return f"{self.event_id} - {self.get_type_display()} - {self.name}"
     
+    @classmethod
+    def get_active(cls, template_type):
+        """
+        Get the first active template of a type.
+        
+        Cached until any message template is saved or deleted.
+        """
+        return cache.get_or_compute(
+            'message_template',
+            lambda: cls.objects.filter(type=template_type, is_active=True).first(),
+            'active',
+            template_type
+        )
+    
     def get_formatted_message(self, pledge=None, **kwargs):
         """
         Get formatted message with placeholders replaced.
@@ -581,6 +1157,18 @@ class MessageTemplate(models.Model):
         
         return message
     
+    def get_combined_message(self, pledges):
+        """
+        Format one message covering several pledges of the same contact.
+        
+        Args:
+            pledges: Pledges belonging to one contact
+            
+        Returns:
+            str: Formatted messages for each pledge, separated by blank lines
+        """
+        return '\n\n'.join(self.get_formatted_message(pledge) for pledge in pledges)
+    
     def preview(self, pledge=None):
         """
         Generate a preview of this template.
@@ -709,6 +1297,9 @@ class RegistrationRequest(models.Model):
         verbose_name = 'Registration Request'
         verbose_name_plural = 'Registration Requests'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
 
     def __str__(self):
         return f"{self.full_name} - {self.event_name}"
@@ -729,3 +1320,94 @@ class RegistrationRequest(models.Model):
             self.verification_token = str(uuid.uuid4())
         
         super().save(*args, **kwargs)
+
+
+class AccountDeletionJob(models.Model):
+    """
+    A requested account deletion, carried out in the background.
+    
+    The view only records the job and deactivates the account; a worker
+    deletes the account's messages, transactions, pledges and events in
+    bounded batches, recording progress as it goes, then deletes the user
+    and emails a confirmation (see events.tasks.run_account_deletion).
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    user = models.ForeignKey(
+        'EventUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deletion_jobs',
+        verbose_name="User",
+        help_text="Account being deleted; empty once it is gone"
+    )
+    user_email = models.EmailField(
+        verbose_name="User Email"
+    )
+    user_name = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="User Name"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name="Status"
+    )
+    phase = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Phase",
+        help_text="What the worker is deleting"
+    )
+    messages_deleted = models.PositiveIntegerField(default=0, verbose_name="Messages Deleted")
+    transactions_deleted = models.PositiveIntegerField(default=0, verbose_name="Transactions Deleted")
+    pledges_deleted = models.PositiveIntegerField(default=0, verbose_name="Pledges Deleted")
+    events_deleted = models.PositiveIntegerField(default=0, verbose_name="Events Deleted")
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Attempts"
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Claimed At",
+        help_text="Last progress of the worker running this job"
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Last Error"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Requested At"
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Completed At"
+    )
+    
+    class Meta:
+        db_table = 'account_deletion_jobs'
+        verbose_name = 'Account Deletion Job'
+        verbose_name_plural = 'Account Deletion Jobs'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'claimed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_email} ({self.status})"
+    
+    @property
+    def records_deleted(self):
+        return self.messages_deleted + self.transactions_deleted + self.pledges_deleted
@@ -0,0 +1,545 @@
+"""
+Monthly range partitioning of append-only tables on PostgreSQL.
+
+messages and transactions only grow and are nearly always filtered by
+created_at. Partitioned by month, time-range queries scan only the
+partitions they need, autovacuum works on one month at a time, and old
+months can be detached (and archived or dropped) without a large DELETE.
+
+Partitioning is optional and PostgreSQL only; the models don't change. The
+manage_partitions command converts a table once (convert_table), then keeps
+partitions created ahead of time (ensure_partitions) and detaches old ones
+(detach_old_partitions). Each table has a default partition that catches
+rows outside the monthly partitions; rows found there are moved when their
+month's partition is created.
+
+A partitioned table's primary key and unique indexes must include the
+partition column, so after conversion the primary key is (id, created_at)
+and unique indexes on other columns (transactions.transaction_id, the
+messages provider_message_id constraint) become plain indexes. Their
+uniqueness is kept by a guard table per key (UNIQUE_GUARDS), whose primary
+key holds every key in the partitioned table: a trigger adds and removes
+keys in the same transaction as the row change, so a duplicate fails with
+an IntegrityError as before. Conversion refuses tables with a unique index
+that has no guard. Detaching a partition releases its keys; reattaching a
+detached partition by hand is not supported.
+"""
+
+import logging
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Tables that may be partitioned, with their partition column
+PARTITIONED_TABLES = {
+    'messages': 'created_at',
+    'transactions': 'created_at',
+}
+
+# Suffix of the original table while its rows are copied into the
+# partitioned one
+LEGACY_SUFFIX = '_unpartitioned'
+
+# PostgreSQL truncates identifiers to 63 bytes
+MAX_NAME_LENGTH = 63
+
+# Unique keys kept in a guard table once the table is partitioned: column
+# and the condition (on {value}) for a key to be unique
+UNIQUE_GUARDS = {
+    'messages': [('provider_message_id', "{value} <> ''")],
+    'transactions': [('transaction_id', '{value} IS NOT NULL')],
+}
+
+# Set (transaction-local) while rows are moved between tables by this
+# module, so the guard triggers leave the keys alone
+MAINTENANCE_SETTING = 'events.partition_maintenance'
+
+
+def qn(name):
+    return connection.ops.quote_name(name)
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bound(month):
+    """Partition bound for the start of a month, in UTC."""
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _bound_literal(month):
+    # DDL takes no query parameters; the value comes from a date, never input
+    return f"'{month_bound(month):%Y-%m-%d %H:%M:%S}+00'"
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def legacy_table_name(table):
+    return f'{table}{LEGACY_SUFFIX}'
+
+
+def _legacy_name(name):
+    return f'{name[:MAX_NAME_LENGTH - 4]}_old'
+
+
+def guard_table_name(table, column):
+    return f'{table}_{column}_keys'
+
+
+def _set_maintenance(cursor, enabled):
+    cursor.execute('SELECT set_config(%s, %s, true)', [MAINTENANCE_SETTING, 'on' if enabled else 'off'])
+
+
+def _table_exists(cursor, table):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [table])
+    return cursor.fetchone()[0]
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        """
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.oid = to_regclass(%s)
+        """,
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """Names of the table's partitions (monthly and default), sorted."""
+    cursor.execute(
+        """
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+        """,
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def partition_months(cursor, table):
+    """Months that have a partition, parsed from the partition names."""
+    prefix = f'{table}_p'
+    months = []
+    for name in list_partitions(cursor, table):
+        if not name.startswith(prefix):
+            continue
+        try:
+            months.append(datetime.strptime(name[len(prefix):], '%Y_%m').date())
+        except ValueError:
+            continue
+    return months
+
+
+def create_partition(cursor, table, column, month):
+    """
+    Create the partition of one month.
+
+    Rows of that month already in the default partition are moved into the
+    new partition, which is attached afterwards (attaching checks that the
+    default partition holds none of its rows any more).
+    """
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    lower, upper = month_bound(month), month_bound(add_months(month, 1))
+
+    with transaction.atomic():
+        cursor.execute(
+            f'SELECT 1 FROM {qn(default)} WHERE {qn(column)} >= %s AND {qn(column)} < %s LIMIT 1',
+            [lower, upper],
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} '
+                f'FOR VALUES FROM ({_bound_literal(month)}) TO ({_bound_literal(add_months(month, 1))})'
+            )
+            return name
+
+        cursor.execute(f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        # The rows stay in the table, so their unique keys stay guarded
+        _set_maintenance(cursor, True)
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {qn(default)} WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *
+            )
+            INSERT INTO {qn(name)} SELECT * FROM moved
+            """,
+            [lower, upper],
+        )
+        logger.warning(f"Moved {cursor.rowcount} rows of {month:%Y-%m} out of {default}")
+        _set_maintenance(cursor, False)
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} '
+            f'FOR VALUES FROM ({_bound_literal(month)}) TO ({_bound_literal(add_months(month, 1))})'
+        )
+    return name
+
+
+def ensure_partitions(table, months_ahead=3, first_month=None):
+    """
+    Create the missing monthly partitions from first_month (default: this
+    month) to months_ahead months from now. Returns the names created.
+    """
+    column = PARTITIONED_TABLES[table]
+    this_month = month_start(timezone.now())
+    month = first_month or this_month
+    last = add_months(this_month, months_ahead)
+
+    created = []
+    with connection.cursor() as cursor:
+        existing = set(partition_months(cursor, table))
+        while month <= last:
+            if month not in existing:
+                created.append(create_partition(cursor, table, column, month))
+            month = add_months(month, 1)
+
+    if created:
+        logger.info(f"Created partitions {', '.join(created)}")
+    return created
+
+
+def detach_old_partitions(table, retain_months, drop=False):
+    """
+    Detach the monthly partitions that end more than retain_months months
+    before this month. Detached partitions stay as plain tables (to archive
+    or query) unless drop is set; either way their unique keys are released
+    in the same transaction. Returns the names detached.
+    """
+    cutoff = add_months(month_start(timezone.now()), -retain_months)
+
+    detached = []
+    with connection.cursor() as cursor:
+        for month in sorted(partition_months(cursor, table)):
+            if add_months(month, 1) > cutoff:
+                continue
+            name = partition_name(table, month)
+            with transaction.atomic():
+                cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+                for column, _ in UNIQUE_GUARDS.get(table, []):
+                    guard = guard_table_name(table, column)
+                    cursor.execute(
+                        f'DELETE FROM {qn(guard)} g USING {qn(name)} p WHERE g.key = p.{qn(column)}'
+                    )
+                if drop:
+                    cursor.execute(f'DROP TABLE {qn(name)}')
+            detached.append(name)
+
+    if detached:
+        logger.info(f"{'Dropped' if drop else 'Detached'} partitions {', '.join(detached)}")
+    return detached
+
+
+def _index_definitions(cursor, table):
+    """(name, definition) of the indexes that don't back a constraint."""
+    cursor.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+        ORDER BY i.relname
+        """,
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _constraint_definitions(cursor, table):
+    """(name, type, definition) of the table's constraints."""
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f', 'c')
+        ORDER BY conname
+        """,
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _unique_indexes(cursor, table):
+    """(name, columns) of the table's unique indexes other than the primary key."""
+    cursor.execute(
+        """
+        SELECT i.relname, array_agg(a.attname ORDER BY k.position) FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        CROSS JOIN LATERAL unnest(x.indkey::int2[]) WITH ORDINALITY k(attnum, position)
+        LEFT JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+        WHERE x.indrelid = to_regclass(%s) AND x.indisunique AND NOT x.indisprimary
+        GROUP BY i.relname
+        ORDER BY i.relname
+        """,
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _check_unique_guards(cursor, table):
+    """Refuse to partition a table with a unique index that has no guard."""
+    guarded = {column for column, _ in UNIQUE_GUARDS.get(table, [])}
+    for name, columns in _unique_indexes(cursor, table):
+        if len(columns) != 1 or columns[0] not in guarded:
+            raise RuntimeError(
+                f'{table}: unique index {name} on ({", ".join(str(c) for c in columns)}) '
+                f'has no guard in UNIQUE_GUARDS and cannot be kept once partitioned'
+            )
+
+
+def _create_unique_guard(cursor, table, column, condition):
+    """
+    Create the guard table of one unique key, fill it from the legacy table
+    and keep it in step with the partitioned table through triggers.
+    """
+    guard = guard_table_name(table, column)
+    legacy = legacy_table_name(table)
+    cursor.execute(
+        'SELECT format_type(atttypid, atttypmod) FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = %s',
+        [legacy, column],
+    )
+    key_type = cursor.fetchone()[0]
+
+    cursor.execute(f'CREATE TABLE {qn(guard)} (key {key_type} PRIMARY KEY)')
+    cursor.execute(
+        f'INSERT INTO {qn(guard)} (key) SELECT {qn(column)} FROM {qn(legacy)} '
+        f'WHERE {condition.format(value=qn(column))}'
+    )
+
+    old_key, new_key = f'OLD.{qn(column)}', f'NEW.{qn(column)}'
+    cursor.execute(
+        f"""
+        CREATE FUNCTION {qn(guard + '_sync')}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF current_setting('{MAINTENANCE_SETTING}', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP = 'UPDATE' THEN
+                IF {new_key} IS NOT DISTINCT FROM {old_key} THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                IF {condition.format(value=old_key)} THEN
+                    DELETE FROM {qn(guard)} WHERE key = {old_key};
+                END IF;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                IF {condition.format(value=new_key)} THEN
+                    INSERT INTO {qn(guard)} (key) VALUES ({new_key});
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    cursor.execute(
+        f'CREATE TRIGGER {qn(guard + "_sync")} AFTER INSERT OR UPDATE OR DELETE ON {qn(table)} '
+        f'FOR EACH ROW EXECUTE FUNCTION {qn(guard + "_sync")}()'
+    )
+    cursor.execute(
+        f"""
+        CREATE FUNCTION {qn(guard + '_truncate')}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            TRUNCATE {qn(guard)};
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    cursor.execute(
+        f'CREATE TRIGGER {qn(guard + "_truncate")} AFTER TRUNCATE ON {qn(table)} '
+        f'FOR EACH STATEMENT EXECUTE FUNCTION {qn(guard + "_truncate")}()'
+    )
+
+
+def _create_partitioned_table(cursor, table, column, months_ahead):
+    """
+    Rename the table out of the way and create its partitioned replacement
+    with the same columns, sequence, indexes and constraints.
+    """
+    legacy = legacy_table_name(table)
+
+    cursor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+    cursor.execute(
+        'SELECT COUNT(*) FROM pg_constraint WHERE confrelid = to_regclass(%s)',
+        [table],
+    )
+    if cursor.fetchone()[0]:
+        raise RuntimeError(f'{table} is referenced by foreign keys and cannot be partitioned')
+    _check_unique_guards(cursor, table)
+
+    indexes = _index_definitions(cursor, table)
+    constraints = _constraint_definitions(cursor, table)
+    cursor.execute(
+        "SELECT attidentity FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+        [table],
+    )
+    identity = cursor.fetchone()[0]
+    cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, 'id'])
+    sequence = cursor.fetchone()[0]
+    cursor.execute(f'SELECT MIN({qn(column)}) FROM {qn(table)}')
+    oldest = cursor.fetchone()[0]
+
+    # Free the table, index and constraint names for the new table
+    cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+    for name, _ in indexes:
+        cursor.execute(f'ALTER INDEX {qn(name)} RENAME TO {qn(_legacy_name(name))}')
+    for name, _, _ in constraints:
+        cursor.execute(f'ALTER TABLE {qn(legacy)} RENAME CONSTRAINT {qn(name)} TO {qn(_legacy_name(name))}')
+
+    if identity:
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+            f'PARTITION BY RANGE ({qn(column)})'
+        )
+        cursor.execute(
+            f'SELECT setval(pg_get_serial_sequence(%s, %s), (SELECT COALESCE(MAX(id), 0) + 1 FROM {qn(legacy)}), false)',
+            [table, 'id'],
+        )
+    else:
+        # serial column: keep using its sequence, which must outlive the old table
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) PARTITION BY RANGE ({qn(column)})'
+        )
+        if sequence:
+            cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.id')
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} PRIMARY KEY (id, {qn(column)})')
+        elif kind == 'u':
+            # Unique constraints must include the partition column; the
+            # guard table keeps the key unique
+            logger.info(f"{table}: {name} ({definition}) becomes a plain index with a guard table")
+            columns = definition[len('UNIQUE'):].strip()
+            cursor.execute(f'CREATE INDEX {qn(name)} ON {qn(table)} {columns}')
+        else:
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+
+    for name, definition in indexes:
+        if definition.startswith('CREATE UNIQUE INDEX'):
+            logger.info(f"{table}: unique index {name} becomes a plain index with a guard table")
+            definition = 'CREATE INDEX' + definition[len('CREATE UNIQUE INDEX'):]
+        # Read before the rename, so it names the new table and index
+        cursor.execute(definition)
+
+    for guard_column, condition in UNIQUE_GUARDS.get(table, []):
+        _create_unique_guard(cursor, table, guard_column, condition)
+
+    cursor.execute(f'CREATE TABLE {qn(default_partition_name(table))} PARTITION OF {qn(table)} DEFAULT')
+    this_month = month_start(timezone.now())
+    month = month_start(oldest) if oldest else this_month
+    while month <= add_months(this_month, months_ahead):
+        create_partition(cursor, table, column, month)
+        month = add_months(month, 1)
+
+
+def _copy_legacy_rows(table, batch_size, progress=None):
+    """
+    Copy the rows of the renamed table into the partitioned one, batch_size
+    rows per transaction, in id order. Resumes after the highest id already
+    copied. The rows' unique keys are already in the guard tables. Returns
+    the number of rows copied.
+    """
+    legacy = legacy_table_name(table)
+    copied = 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT attidentity FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+            [table],
+        )
+        overriding = 'OVERRIDING SYSTEM VALUE' if cursor.fetchone()[0] == 'a' else ''
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {qn(legacy)}')
+        legacy_max = cursor.fetchone()[0]
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {qn(table)} WHERE id <= %s', [legacy_max])
+        last_id = cursor.fetchone()[0]
+
+        while last_id < legacy_max:
+            with transaction.atomic():
+                _set_maintenance(cursor, True)
+                cursor.execute(
+                    f"""
+                    WITH batch AS (
+                        SELECT * FROM {qn(legacy)} WHERE id > %s ORDER BY id LIMIT %s
+                    ), inserted AS (
+                        INSERT INTO {qn(table)} {overriding} SELECT * FROM batch RETURNING id
+                    )
+                    SELECT COUNT(*), MAX(id) FROM inserted
+                    """,
+                    [last_id, batch_size],
+                )
+                count, max_id = cursor.fetchone()
+                _set_maintenance(cursor, False)
+            if not count:
+                break
+            copied += count
+            last_id = max_id
+            if progress is not None:
+                progress(copied)
+    return copied
+
+
+def convert_table(table, batch_size=10000, months_ahead=3, keep_legacy=False, progress=None):
+    """
+    Turn an existing table into a monthly partitioned one.
+
+    The table is renamed to <table>_unpartitioned and replaced, under an
+    exclusive lock, by a partitioned table with the same columns, indexes
+    and constraints and partitions for every month that has rows; the lock
+    is held while the guard tables are filled with the existing unique keys.
+    Rows are then copied over batch_size at a time. Run it in a maintenance
+    window: until the copy finishes, older rows are missing from the table.
+    Running it again resumes an interrupted copy. The old table is dropped
+    once every row is copied, unless keep_legacy is set.
+
+    Returns the number of rows copied.
+    """
+    column = PARTITIONED_TABLES[table]
+    legacy = legacy_table_name(table)
+
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            with transaction.atomic():
+                _create_partitioned_table(cursor, table, column, months_ahead)
+            logger.info(f"Created partitioned table {table}; copying rows from {legacy}")
+        elif not _table_exists(cursor, legacy):
+            return 0
+
+    copied = _copy_legacy_rows(table, batch_size, progress)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {qn(legacy)}')
+        legacy_count, legacy_max = cursor.fetchone()
+        cursor.execute(f'SELECT COUNT(*) FROM {qn(table)} WHERE id <= %s', [legacy_max])
+        partitioned_count = cursor.fetchone()[0]
+        if partitioned_count != legacy_count:
+            raise RuntimeError(
+                f'{table}: {partitioned_count} of {legacy_count} rows copied; {legacy} was kept'
+            )
+        cursor.execute(f'ANALYZE {qn(table)}')
+        if not keep_legacy:
+            cursor.execute(f'DROP TABLE {qn(legacy)}')
+
+    logger.info(f"Converted {table} to monthly partitions ({copied} rows copied)")
+    return copied
@@ -0,0 +1,232 @@
+"""
+Message queue statistics backed by counters.
+
+Instead of grouping the messages table on every poll, MessageQueueCounter
+rows hold the number of messages per status and the number created per UTC
+hour. Single saves and deletes are counted by signal handlers (see
+signals.py); code that changes statuses with queryset update() or
+bulk_update() reports the change itself through record_status_change() or
+sync_status_counters(). Counter updates run in the caller's transaction, so
+they commit or roll back with the message change.
+
+Reading the statistics is one primary key lookup of a few dozen rows,
+whatever the size of the messages table. If the counters ever drift (rows
+changed by hand in the database, a crash between two statements outside a
+transaction), rebuild_message_counters() recomputes them.
+
+Every committed counter change also bumps MESSAGES_CHANGED_KEY in the cache,
+which live status streams (see streams.py) check before querying.
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .cache import get_cache
+from .models import MessageQueueCounter, Messages
+
+# Statuses reported by the queue status endpoint
+MESSAGE_STATUSES = [status for status, _ in Messages.MESSAGE_STATUS]
+
+# Hours of per-hour creation counters that are kept up to date
+CREATED_COUNTER_HOURS = 48
+
+# Cache key holding the time of the last committed message change
+MESSAGES_CHANGED_KEY = 'events:messages:changed'
+
+_deferred = threading.local()
+
+
+def status_key(status):
+    return f'status:{status}'
+
+
+def created_key(when):
+    return f"created:{when.astimezone(dt_timezone.utc).strftime('%Y%m%d%H')}"
+
+
+def _created_key_is_current(when):
+    return when is not None and when >= timezone.now() - timedelta(hours=CREATED_COUNTER_HOURS)
+
+
+def _apply(deltas):
+    for key, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        if not MessageQueueCounter.objects.filter(key=key).update(count=F('count') + delta):
+            MessageQueueCounter.objects.bulk_create([MessageQueueCounter(key=key)], ignore_conflicts=True)
+            MessageQueueCounter.objects.filter(key=key).update(count=F('count') + delta)
+
+
+def adjust_message_counters(deltas):
+    """
+    Add a {key: delta} mapping to the counters.
+
+    Inside deferred_counter_updates() the deltas are collected and applied
+    once when the block ends.
+    """
+    pending = getattr(_deferred, 'deltas', None)
+    if pending is not None:
+        pending.update(deltas)
+        return
+    if not any(deltas.values()):
+        return
+    with transaction.atomic():
+        _apply(deltas)
+        transaction.on_commit(mark_messages_changed, robust=True)
+
+
+def mark_messages_changed():
+    get_cache().set(MESSAGES_CHANGED_KEY, time.time_ns(), None)
+
+
+@contextmanager
+def deferred_counter_updates():
+    """
+    Collect counter changes made in the block (e.g. by the delete signals of
+    a batch of messages) and apply them with one UPDATE per key at the end.
+    """
+    if getattr(_deferred, 'deltas', None) is not None:
+        yield
+        return
+    _deferred.deltas = Counter()
+    try:
+        yield
+        deltas = _deferred.deltas
+    finally:
+        _deferred.deltas = None
+    adjust_message_counters(deltas)
+
+
+def record_message_created(message):
+    adjust_message_counters({status_key(message.status): 1, created_key(message.created_at): 1})
+
+
+def record_message_deleted(message):
+    deltas = {status_key(message.status): -1}
+    if _created_key_is_current(message.created_at):
+        deltas[created_key(message.created_at)] = -1
+    adjust_message_counters(deltas)
+
+
+def record_status_change(old_status, new_status, count=1):
+    """Count `count` messages moved from old_status to new_status."""
+    if old_status != new_status and count:
+        adjust_message_counters({status_key(old_status): -count, status_key(new_status): count})
+
+
+def sync_status_counters(messages):
+    """
+    Count the status changes of messages saved with bulk_update() or whose
+    new status was written with a queryset update().
+
+    Compares each message's status with the one it was loaded with and
+    remembers the new one, so the next change is counted from there.
+    """
+    deltas = Counter()
+    for message in messages:
+        old_status = getattr(message, '_loaded_status', None)
+        if old_status is not None and old_status != message.status:
+            deltas[status_key(old_status)] -= 1
+            deltas[status_key(message.status)] += 1
+        message._loaded_status = message.status
+    adjust_message_counters(deltas)
+
+
+def _queue_stats_keys():
+    now = timezone.now()
+    status_keys = {status_key(status): status for status in MESSAGE_STATUSES}
+    recent_keys = [created_key(now - timedelta(hours=hours)) for hours in range(24)]
+    return status_keys, recent_keys
+
+
+def _queue_stats(status_keys, recent_keys, counts):
+    queue_status = {status: counts.get(key, 0) for key, status in status_keys.items()}
+    return {
+        'queue_status': queue_status,
+        'total_messages': sum(queue_status.values()),
+        'recent_activity_24h': sum(counts.get(key, 0) for key in recent_keys),
+    }
+
+
+def get_message_queue_stats():
+    """
+    Current queue statistics from the counters.
+
+    Returns a dict with 'queue_status' ({status: count} for every status),
+    'total_messages' and 'recent_activity_24h' (messages created in the
+    current hour and the 23 before it).
+    """
+    status_keys, recent_keys = _queue_stats_keys()
+    counts = dict(
+        MessageQueueCounter.objects.filter(key__in=list(status_keys) + recent_keys)
+        .values_list('key', 'count')
+    )
+    return _queue_stats(status_keys, recent_keys, counts)
+
+
+async def aget_message_queue_stats():
+    """Async version of get_message_queue_stats() for async views."""
+    status_keys, recent_keys = _queue_stats_keys()
+    counts = {
+        key: count
+        async for key, count in MessageQueueCounter.objects.filter(
+            key__in=list(status_keys) + recent_keys
+        ).values_list('key', 'count')
+    }
+    return _queue_stats(status_keys, recent_keys, counts)
+
+
+def compute_message_counters():
+    """Counter values computed from the messages table: {key: count}."""
+    counts = {
+        status_key(row['status']): row['count']
+        for row in Messages.objects.values('status').annotate(count=Count('id')).order_by()
+    }
+    since = timezone.now() - timedelta(hours=CREATED_COUNTER_HOURS)
+    hourly = (
+        Messages.objects.filter(created_at__gte=since)
+        .annotate(hour=TruncHour('created_at', tzinfo=dt_timezone.utc))
+        .values('hour').annotate(count=Count('id')).order_by()
+    )
+    for row in hourly:
+        counts[created_key(row['hour'])] = row['count']
+    return counts
+
+
+def rebuild_message_counters():
+    """
+    Recompute every counter from the messages table.
+
+    The existing counter rows are locked first, so messages sent while the
+    rebuild runs are counted on top of the rebuilt values. Returns the new
+    {key: count} mapping.
+    """
+    with transaction.atomic():
+        list(MessageQueueCounter.objects.select_for_update().values_list('key', flat=True))
+        counts = compute_message_counters()
+        MessageQueueCounter.objects.exclude(key__in=list(counts)).delete()
+        MessageQueueCounter.objects.bulk_create(
+            [MessageQueueCounter(key=key, count=count) for key, count in counts.items()],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['count'],
+        )
+    return counts
+
+
+def purge_stale_created_counters():
+    """Delete per-hour creation counters older than CREATED_COUNTER_HOURS."""
+    cutoff = created_key(timezone.now() - timedelta(hours=CREATED_COUNTER_HOURS))
+    deleted, _ = MessageQueueCounter.objects.filter(
+        key__startswith='created:', key__lt=cutoff
+    ).delete()
+    return deleted
+
@@ -0,0 +1,44 @@
+"""
+Signal handlers for the events app.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, queue_stats
+from .context_processors import invalidate_user_events
+from .models import Event, Messages, MessageTemplate, Pledges
+
+
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event_list_cache(sender, instance, **kwargs):
+    """Invalidate the owner's cached event list when an event changes."""
+    invalidate_user_events(instance.created_by_id)
+
+
+@receiver([post_save, post_delete], sender=Pledges)
+def invalidate_event_pledge_stats(sender, instance, **kwargs):
+    """Invalidate cached pledge statistics of the pledge's event."""
+    cache.invalidate_event(instance.event_id)
+
+
+@receiver([post_save, post_delete], sender=MessageTemplate)
+def invalidate_message_templates(sender, instance, **kwargs):
+    """Invalidate cached template lookups when a template changes."""
+    cache.invalidate_namespace('message_template')
+
+
+@receiver(post_save, sender=Messages)
+def count_message_save(sender, instance, created, **kwargs):
+    """Keep the message queue counters in step with saved messages."""
+    if created:
+        queue_stats.record_message_created(instance)
+    else:
+        queue_stats.sync_status_counters([instance])
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Messages)
+def count_message_delete(sender, instance, **kwargs):
+    """Remove deleted messages from the message queue counters."""
+    queue_stats.record_message_deleted(instance)
@@ -0,0 +1,123 @@
+/*
+ * Pledge search widget (see PledgeAutocompleteWidget).
+ *
+ * Listeners are delegated from the document so widgets inserted later, such
+ * as the transaction and message modals, work without re-initialisation.
+ */
+(function() {
+    const MIN_QUERY_LENGTH = 1;
+    const DEBOUNCE_MS = 200;
+    const timers = new WeakMap();
+    const controllers = new WeakMap();
+
+    function parts(input) {
+        return {
+            value: document.getElementById(input.dataset.valueInput),
+            results: document.getElementById(input.dataset.results)
+        };
+    }
+
+    function closeResults(input) {
+        const { results } = parts(input);
+        if (results) {
+            results.classList.add('hidden');
+            results.innerHTML = '';
+        }
+        input.setAttribute('aria-expanded', 'false');
+    }
+
+    function renderResults(input, pledges) {
+        const { results } = parts(input);
+        results.innerHTML = '';
+
+        if (!pledges.length) {
+            const empty = document.createElement('li');
+            empty.className = 'px-4 py-2 text-sm text-gray-500';
+            empty.textContent = 'No matching pledges';
+            results.appendChild(empty);
+        }
+
+        pledges.forEach(function(pledge) {
+            const item = document.createElement('li');
+            item.className = 'pledge-autocomplete-option px-4 py-2 text-sm cursor-pointer hover:bg-indigo-50';
+            item.setAttribute('role', 'option');
+            item.dataset.id = pledge.id;
+            item.dataset.label = pledge.name + ' (' + pledge.mobile_number + ')';
+            item.textContent = item.dataset.label + ' - TSH ' + pledge.pledge;
+            results.appendChild(item);
+        });
+
+        results.classList.remove('hidden');
+        input.setAttribute('aria-expanded', 'true');
+    }
+
+    function search(input) {
+        const query = input.value.trim();
+        if (query.length < MIN_QUERY_LENGTH) {
+            closeResults(input);
+            return;
+        }
+
+        // Drop responses of superseded queries
+        const previous = controllers.get(input);
+        if (previous) {
+            previous.abort();
+        }
+        const controller = new AbortController();
+        controllers.set(input, controller);
+
+        const url = input.dataset.searchUrl + '?q=' + encodeURIComponent(query);
+        fetch(url, {
+            headers: { 'X-Requested-With': 'XMLHttpRequest' },
+            signal: controller.signal
+        })
+            .then(function(response) { return response.json(); })
+            .then(function(data) { renderResults(input, data.results || []); })
+            .catch(function(error) {
+                if (error.name !== 'AbortError') {
+                    console.error('Pledge search failed:', error);
+                }
+            });
+    }
+
+    document.addEventListener('input', function(event) {
+        const input = event.target;
+        if (!input.classList || !input.classList.contains('pledge-autocomplete')) {
+            return;
+        }
+
+        // Typing invalidates the previous selection
+        const { value } = parts(input);
+        if (value) {
+            value.value = '';
+        }
+
+        clearTimeout(timers.get(input));
+        timers.set(input, setTimeout(function() { search(input); }, DEBOUNCE_MS));
+    });
+
+    document.addEventListener('click', function(event) {
+        const option = event.target.closest && event.target.closest('.pledge-autocomplete-option');
+        if (option) {
+            const input = document.querySelector('.pledge-autocomplete[data-results="' + option.parentElement.id + '"]');
+            if (input) {
+                parts(input).value.value = option.dataset.id;
+                input.value = option.dataset.label;
+                closeResults(input);
+            }
+            return;
+        }
+
+        document.querySelectorAll('.pledge-autocomplete[aria-expanded="true"]').forEach(function(input) {
+            if (event.target !== input) {
+                closeResults(input);
+            }
+        });
+    });
+
+    document.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape' && event.target.classList && event.target.classList.contains('pledge-autocomplete')) {
+            closeResults(event.target);
+        }
+    });
+})();
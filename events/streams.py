@@ -0,0 +1,146 @@
+"""
+Live message status updates as server-sent events.
+
+The message list subscribes to message_status_stream and updates status
+badges in place instead of reloading the page. The stream is an async
+generator, so under the ASGI application (events_project/asgi.py) an open
+connection costs no worker thread while it waits.
+
+The stream does not query the database on every tick: it checks the
+MESSAGES_CHANGED_KEY cache entry (bumped after every committed message
+change, see queue_stats.py) and only then looks for messages of the event
+updated since its cursor, through the index on messages.updated_at. It also
+queries every MESSAGE_STREAM_RECHECK_INTERVAL seconds regardless, which
+covers caches that are not shared between processes. Rows are looked up
+again a few seconds behind the cursor, so a transaction that commits late
+is still seen; rows already pushed are skipped.
+
+Each update carries the cursor as its SSE id, so a reconnecting browser
+(Last-Event-ID) resumes where it stopped. Streams close after
+MESSAGE_STREAM_MAX_AGE seconds and the browser reconnects.
+"""
+
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import get_cache
+from .models import Messages
+from .queue_stats import MESSAGES_CHANGED_KEY
+
+# Seconds between checks of the change marker
+MESSAGE_STREAM_POLL_INTERVAL = getattr(settings, 'MESSAGE_STREAM_POLL_INTERVAL', 1.0)
+
+# Seconds between database checks when the marker did not change
+MESSAGE_STREAM_RECHECK_INTERVAL = getattr(settings, 'MESSAGE_STREAM_RECHECK_INTERVAL', 15)
+
+# Seconds a stream stays open before the browser is asked to reconnect
+MESSAGE_STREAM_MAX_AGE = getattr(settings, 'MESSAGE_STREAM_MAX_AGE', 300)
+
+# How far back a resumed stream may start
+MESSAGE_STREAM_RESUME_WINDOW = 600
+
+# Seconds behind the cursor that are looked at again for late commits
+MESSAGE_STREAM_OVERLAP = 5
+
+MESSAGE_STREAM_BATCH_SIZE = 500
+
+STATUS_LABELS = dict(Messages.MESSAGE_STATUS)
+
+
+def stream_start(since):
+    """
+    Cursor to start a stream from: the ISO timestamp `since` (the page's
+    render time or the Last-Event-ID of a reconnect), at most
+    MESSAGE_STREAM_RESUME_WINDOW seconds old, or now.
+    """
+    now = timezone.now()
+    start = parse_datetime(since) if since else None
+    if start is None or timezone.is_naive(start):
+        return now
+    return min(max(start, now - timedelta(seconds=MESSAGE_STREAM_RESUME_WINDOW)), now)
+
+
+def format_event(data=None, event=None, event_id=None, retry=None):
+    """Encode one server-sent event."""
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event:
+        lines.append(f'event: {event}')
+    if event_id:
+        lines.append(f'id: {event_id}')
+    if data is not None:
+        lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def changed_messages(event_names, start):
+    """Messages of the events updated at or after `start`, oldest first."""
+    after = Q(updated_at__gte=start)
+    while True:
+        rows = [
+            row async for row in Messages.objects.filter(after, pledge__event_id__in=event_names)
+            .order_by('updated_at', 'id')
+            .values('id', 'status', 'updated_at')[:MESSAGE_STREAM_BATCH_SIZE]
+        ]
+        for row in rows:
+            yield row
+        if len(rows) < MESSAGE_STREAM_BATCH_SIZE:
+            break
+        last = rows[-1]
+        after = Q(updated_at__gt=last['updated_at']) | Q(updated_at=last['updated_at'], id__gt=last['id'])
+
+
+async def message_status_events(event_names, since=None, max_age=None, retry=3000):
+    """
+    Server-sent events for status changes of the events' messages.
+
+    Yields one 'status' event per change with the message id, status and
+    status label. max_age defaults to MESSAGE_STREAM_MAX_AGE; with 0 the
+    stream checks once and ends (the browser reconnects after `retry`
+    milliseconds), which is how it is served without ASGI.
+    """
+    if max_age is None:
+        max_age = MESSAGE_STREAM_MAX_AGE
+    cursor = stream_start(since)
+    pushed = {}
+    marker = object()
+    started = last_query = time.monotonic()
+    checkpoint = None
+
+    yield format_event(retry=retry)
+    while True:
+        current = await get_cache().aget(MESSAGES_CHANGED_KEY)
+        if current != marker or time.monotonic() - last_query >= MESSAGE_STREAM_RECHECK_INTERVAL:
+            marker = current
+            last_query = time.monotonic()
+            window_start = cursor - timedelta(seconds=MESSAGE_STREAM_OVERLAP)
+            async for row in changed_messages(event_names, window_start):
+                if pushed.get(row['id']) == row['updated_at']:
+                    continue
+                pushed[row['id']] = row['updated_at']
+                cursor = max(cursor, row['updated_at'])
+                yield format_event(
+                    {'id': row['id'], 'status': row['status'], 'label': STATUS_LABELS.get(row['status'], row['status'])},
+                    event='status',
+                    event_id=cursor.isoformat(),
+                )
+            window_start = cursor - timedelta(seconds=MESSAGE_STREAM_OVERLAP)
+            pushed = {pk: updated_at for pk, updated_at in pushed.items() if updated_at >= window_start}
+
+        # An id-only event moves the browser's Last-Event-ID forward and
+        # doubles as a keep-alive
+        if checkpoint is None or time.monotonic() - checkpoint >= MESSAGE_STREAM_RECHECK_INTERVAL:
+            checkpoint = time.monotonic()
+            yield format_event(event_id=cursor.isoformat())
+
+        if time.monotonic() - started >= max_age:
+            break
+        await asyncio.sleep(MESSAGE_STREAM_POLL_INTERVAL)
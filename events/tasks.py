@@ -1,14 +1,25 @@
 import threading
 import time
+from collections import Counter
+from datetime import timedelta
 import logging
+import random
 import requests
 import json
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives
 from django.conf import settings
-from .models import Messages, Pledges
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .channels import EmailChannel, SendResult, get_channel
+from .models import AccountDeletionJob, DeliveryStatusEvent, Event, MessageArchive, Messages, OutboundEmail, Pledges, Transactions
+from .queue_stats import get_message_queue_stats, record_status_change, sync_status_counters
 
 logger = logging.getLogger(__name__)
 
+# One structured record per send (see log_send)
+send_logger = logging.getLogger('events.sends')
+
 
 def create_and_queue_message(pledge, message_text, method='sms'):
     """
@@ -29,70 +40,120 @@ def create_and_queue_message(pledge, message_text, method='sms'):
         raise
 
 
+def group_pledges_by_contact(pledges):
+    """
+    Group pledges so that each contact is messaged once per bulk run.
+    
+    Pledges without a contact fall back to their normalized phone number.
+    Groups are returned in the order their first pledge was seen.
+    """
+    groups = {}
+    for pledge in pledges:
+        groups.setdefault(contact_key(pledge), []).append(pledge)
+    return list(groups.values())
+
+
+def contact_key(pledge):
+    """Key shared by the pledges of one person (see group_pledges_by_contact)."""
+    return pledge.contact_id or pledge.phone_e164 or f"pledge-{pledge.pk}"
+
+
 def log_message_queue_stats():
     """
     Log current message queue statistics
     """
     try:
-        from django.db.models import Count
-        stats = Messages.objects.values('status').annotate(count=Count('id'))
-        stats_dict = {item['status']: item['count'] for item in stats}
+        stats = get_message_queue_stats()
         
         logger.info("Message queue statistics:")
         for status in ['queued', 'pending', 'sent', 'failed', 'delivered']:
-            count = stats_dict.get(status, 0)
+            count = stats['queue_status'].get(status, 0)
             if count > 0:
                 logger.info(f"  {status.upper()}: {count} messages")
         
-        total = sum(stats_dict.values())
-        logger.info(f"  TOTAL: {total} messages in queue")
+        logger.info(f"  TOTAL: {stats['total_messages']} messages in queue")
         
     except Exception as e:
         logger.error(f"Failed to log message queue stats: {str(e)}")
 
 
+# Fields written back after a send attempt
+SEND_RESULT_FIELDS = ['status', 'provider', 'provider_message_id', 'sent_at', 'latency_ms', 'updated_at']
+
+
+def log_send(message, channel, result):
+    """
+    Log one structured line for a send.
+    
+    Successful sends are sampled at settings.SEND_LOG_SAMPLE_RATE (0..1,
+    default 1); failures are always logged. The fields are passed as
+    `data`, which JSONFormatter writes as JSON keys.
+    """
+    if result.success:
+        sample_rate = getattr(settings, 'SEND_LOG_SAMPLE_RATE', 1.0)
+        if sample_rate < 1 and random.random() >= sample_rate:
+            return
+        level = logging.INFO
+    else:
+        level = logging.WARNING
+    if not send_logger.isEnabledFor(level):
+        return
+    
+    provider = channel.provider or channel.name
+    status = 'sent' if result.success else 'failed'
+    send_logger.log(
+        level,
+        f"Message {message.id} {status} via {provider} in {result.latency_ms} ms"
+        + (f": {result.error}" if result.error else ''),
+        extra={'data': {
+            'event': 'message_send',
+            'message_id': message.id,
+            'method': message.method,
+            'provider': provider,
+            'status': status,
+            'latency_ms': result.latency_ms,
+            'provider_message_id': result.provider_message_id,
+            'error': result.error,
+        }},
+    )
+
+
+def apply_send_result(message, channel, result):
+    """Set a message's status and provider details from a channel SendResult."""
+    if result.success:
+        message.status = 'sent'
+        message.record_provider_send(
+            channel.provider or channel.name,
+            result.provider_message_id,
+            result.latency_ms,
+        )
+    else:
+        message.status = 'failed'
+    log_send(message, channel, result)
+
+
 def send_message_background(message_id):
     """
-    Background task to send a single message
-    This is a placeholder for actual sending logic (SMS, WhatsApp, Email, etc.)
+    Send a single message through the channel backend of its method
+    (see events/channels.py and settings.MESSAGE_CHANNELS).
     """
-    logger.info(f"Starting to process message {message_id}")
+    logger.debug(f"Starting to process message {message_id}")
     
     try:
-        message = Messages.objects.get(id=message_id)
-        logger.info(f"Retrieved message {message_id} for {message.pledge.name} ({message.pledge.mobile_number})")
+        message = Messages.objects.select_related('pledge').get(id=message_id)
         
         # Update status to processing
         message.status = 'pending'
         message.save()
-        logger.info(f"Updated message {message_id} status to 'pending'")
         
-        # Simulate sending delay (replace with actual API calls)
-        time.sleep(2)  # Remove this in production
-        
-        # Here you would implement actual sending logic based on method:
-        logger.info(f"Attempting to send message {message_id} via {message.method}")
-        
-        if message.method == 'sms':
-            success = send_sms(message)
-        elif message.method == 'whatsapp':
-            success = send_whatsapp(message)
-        elif message.method == 'email':
-            success = send_email_message(message)
-        else:
+        channel = get_channel(message.method)
+        if channel is None:
             logger.error(f"Unknown message method '{message.method}' for message {message_id}")
-            success = False
-            
-        # Update message status
-        if success:
-            message.status = 'sent'
-            logger.info(f"Message {message_id} sent successfully to {message.pledge.name}")
-        else:
             message.status = 'failed'
-            logger.error(f"Failed to send message {message_id} to {message.pledge.name}")
+        else:
+            apply_send_result(message, channel, channel.send_many([message])[0])
             
         message.save()
-        logger.info(f"Updated message {message_id} final status to '{message.status}'")
         
     except Messages.DoesNotExist:
         logger.error(f"Message {message_id} not found in database")
@@ -107,6 +168,98 @@ def send_message_background(message_id):
             logger.error(f"Failed to update message {message_id} status after error: {str(save_error)}")
 
 
+def send_queued_messages(message_ids):
+    """
+    Send queued messages grouped by method, handing each channel batches of
+    up to its BATCH_SIZE through send_many().
+    
+    Messages with the same text for the same recipient (a reminder recorded
+    on each pledge it covers) are sent once; the copies take the status of
+    the one that was sent, without its provider message id, so delivery
+    callbacks update only that one.
+    
+    Statuses are written back with one bulk UPDATE per batch.
+    Returns a (sent_count, failed_count) tuple.
+    """
+    messages = list(
+        Messages.objects.select_related('pledge')
+        .filter(id__in=message_ids, status='queued')
+        .order_by('id')
+    )
+    skipped = len(message_ids) - len(messages)
+    if skipped:
+        logger.warning(f"Skipping {skipped} messages that no longer exist or are not 'queued'")
+    
+    first_by_recipient = {}
+    copies = {}
+    by_method = {}
+    for message in messages:
+        key = (message.method, contact_key(message.pledge), message.message)
+        first = first_by_recipient.setdefault(key, message)
+        if first is message:
+            by_method.setdefault(message.method, []).append(message)
+        else:
+            copies.setdefault(first.id, []).append(message)
+    
+    def with_copies(batch):
+        return batch + [copy for message in batch for copy in copies.get(message.id, [])]
+    
+    sent_count = 0
+    failed_count = 0
+    for method, method_messages in by_method.items():
+        channel = get_channel(method)
+        if channel is None:
+            method_messages = with_copies(method_messages)
+            logger.error(f"Unknown message method '{method}' for {len(method_messages)} messages")
+            with transaction.atomic():
+                Messages.objects.filter(id__in=[message.id for message in method_messages]).update(
+                    status='failed', updated_at=timezone.now()
+                )
+                for message in method_messages:
+                    message.status = 'failed'
+                sync_status_counters(method_messages)
+            failed_count += len(method_messages)
+            continue
+        
+        for start in range(0, len(method_messages), channel.batch_size):
+            batch = method_messages[start:start + channel.batch_size]
+            recorded = with_copies(batch)
+            with transaction.atomic():
+                Messages.objects.filter(id__in=[message.id for message in recorded]).update(
+                    status='pending', updated_at=timezone.now()
+                )
+                for message in recorded:
+                    message.status = 'pending'
+                sync_status_counters(recorded)
+            
+            try:
+                results = channel.send_many(batch)
+            except Exception as e:
+                logger.error(f"{method} channel failed on a batch of {len(batch)}: {str(e)}")
+                results = [SendResult(False, error=str(e))] * len(batch)
+            
+            now = timezone.now()
+            for message, result in zip(batch, results):
+                apply_send_result(message, channel, result)
+                message.updated_at = now
+                for copy in copies.get(message.id, []):
+                    copy.status = message.status
+                    copy.provider = message.provider
+                    copy.sent_at = message.sent_at
+                    copy.latency_ms = message.latency_ms
+                    copy.updated_at = now
+            with transaction.atomic():
+                Messages.objects.bulk_update(recorded, SEND_RESULT_FIELDS)
+                sync_status_counters(recorded)
+            
+            batch_sent = sum(1 for message in recorded if message.status == 'sent')
+            sent_count += batch_sent
+            failed_count += len(recorded) - batch_sent
+            logger.info(f"Bulk progress ({method}): {start + len(batch)}/{len(method_messages)} processed")
+    
+    return sent_count, failed_count
+
+
 def send_bulk_messages_background(message_ids):
     """
     Background task to send multiple messages
@@ -117,43 +270,11 @@ def send_bulk_messages_background(message_ids):
         # Log initial queue statistics
         log_message_queue_stats()
         
-        sent_count = 0
-        failed_count = 0
-        
-        for i, message_id in enumerate(message_ids, 1):
-            logger.info(f"Processing message {i}/{len(message_ids)} (ID: {message_id})")
-            
-            try:
-                # Check if message still exists and is in correct status
-                message = Messages.objects.get(id=message_id)
-                if message.status != 'queued':
-                    logger.warning(f"Message {message_id} status is '{message.status}', expected 'queued'. Skipping.")
-                    continue
-                    
-                send_message_background(message_id)
-                
-                # Check final status
-                message.refresh_from_db()
-                if message.status == 'sent':
-                    sent_count += 1
-                    logger.info(f"Bulk progress: {i}/{len(message_ids)} - Message {message_id} sent successfully")
-                else:
-                    failed_count += 1
-                    logger.warning(f"Bulk progress: {i}/{len(message_ids)} - Message {message_id} failed")
-                    
-            except Messages.DoesNotExist:
-                logger.error(f"Message {message_id} not found during bulk processing")
-                failed_count += 1
-            except Exception as e:
-                logger.error(f"Error processing message {message_id} in bulk: {str(e)}")
-                failed_count += 1
-            
-            # Small delay between messages to avoid rate limiting
-            if i < len(message_ids):  # Don't sleep after the last message
-                time.sleep(0.5)
-                logger.debug(f"Pausing 0.5s before next message...")
-            
-        logger.info(f"Bulk send completed: {sent_count} sent, {failed_count} failed, {len(message_ids)} total")
+        try:
+            sent_count, failed_count = send_queued_messages(message_ids)
+            logger.info(f"Bulk send completed: {sent_count} sent, {failed_count} failed, {len(message_ids)} total")
+        except Exception as e:
+            logger.error(f"Bulk send aborted: {str(e)}")
         
         # Log final queue statistics
         log_message_queue_stats()
@@ -172,7 +293,7 @@ def send_sms(message):
     Placeholder for SMS sending implementation
     Replace with your SMS provider's API (Twilio, etc.)
     """
-    logger.info(f"Attempting SMS send to {message.pledge.mobile_number} for {message.pledge.name}")
+    logger.debug(f"Attempting SMS send to {message.pledge.mobile_number} for {message.pledge.name}")
     
     try:
         # Example SMS implementation
@@ -185,13 +306,9 @@ def send_sms(message):
         # )
         
         # For now, just simulate success
-        logger.info(f"SMS simulation: Sending to {message.pledge.mobile_number}")
-        logger.debug(f"SMS content preview: {message.message[:100]}{'...' if len(message.message) > 100 else ''}")
-        
-        # Simulate some processing time
-        time.sleep(1)
-        
-        logger.info(f"SMS sent successfully to {message.pledge.mobile_number} ({message.pledge.name})")
+        logger.debug(f"SMS simulation: Sending to {message.pledge.mobile_number}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"SMS content preview: {message.message[:100]}{'...' if len(message.message) > 100 else ''}")
         return True
         
     except Exception as e:
@@ -199,107 +316,95 @@ def send_sms(message):
         return False
 
 
+def whatsapp_api_url():
+    """Messages endpoint of the WhatsApp Cloud API for the configured phone number."""
+    whatsapp_phone_id = getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', '878543835331362')  # Default from your example
+    base_url = getattr(settings, 'WHATSAPP_API_BASE_URL', 'https://graph.facebook.com/v22.0')
+    return f"{base_url.rstrip('/')}/{whatsapp_phone_id}/messages"
+
+
+def post_whatsapp_payload(message, payload, label='WhatsApp'):
+    """
+    POST a payload to the WhatsApp Cloud API for a message.
+    
+    On success the provider message id is set on `message` (saved by the
+    caller; delivery callbacks are matched on it). Request and response
+    dumps are only built when DEBUG logging is enabled.
+    
+    Returns:
+        bool: True if the API accepted the message
+    """
+    whatsapp_token = getattr(settings, 'WHATSAPP_ACCESS_TOKEN', None)
+    if not whatsapp_token:
+        logger.error("WHATSAPP_ACCESS_TOKEN not configured in settings")
+        return False
+    
+    url = whatsapp_api_url()
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        # Masked token for logging
+        logger.debug(f"{label} API request headers: {{'Authorization': 'Bearer {whatsapp_token[:10]}...{whatsapp_token[-4:]}'}}")
+        logger.debug(f"{label} API URL: {url}")
+        logger.debug(f"{label} request payload:\n{json.dumps(payload, indent=2)}")
+    
+    try:
+        response = requests.post(
+            url,
+            headers={
+                'Authorization': f'Bearer {whatsapp_token}',
+                'Content-Type': 'application/json'
+            },
+            json=payload,
+            timeout=30
+        )
+    except requests.RequestException as e:
+        logger.error(f"{label} API request failed: {str(e)}")
+        return False
+    
+    if debug:
+        logger.debug(f"{label} API response - Status Code: {response.status_code}")
+        logger.debug(f"{label} API response headers: {dict(response.headers)}")
+        logger.debug(f"{label} API response body:\n{response.text}")
+    
+    if response.status_code != 200:
+        logger.error(f"{label} API error {response.status_code}: {response.text}")
+        return False
+    
+    try:
+        response_data = response.json()
+    except ValueError:
+        logger.warning(f"{label} API response is not valid JSON")
+        return False
+    
+    if 'messages' in response_data and len(response_data['messages']) > 0:
+        # Saved by the caller; delivery callbacks are matched on it
+        message.provider_message_id = response_data['messages'][0].get('id', '')
+        return True
+    
+    logger.warning(f"{label} API returned 200 but no message ID found: {response_data}")
+    return False
+
+
 def send_whatsapp(message):
     """
     WhatsApp sending implementation using Facebook Graph API
     """
-    logger.info(f"Attempting WhatsApp send to {message.pledge.mobile_number} for {message.pledge.name}")
+    logger.debug(f"Attempting WhatsApp send to {message.pledge.mobile_number} for {message.pledge.name}")
     
     try:
-        # WhatsApp API configuration - these should be in your settings.py
-        whatsapp_token = getattr(settings, 'WHATSAPP_ACCESS_TOKEN', None)
-        whatsapp_phone_id = getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', '878543835331362')  # Default from your example
-        whatsapp_api_url = f"https://graph.facebook.com/v22.0/{whatsapp_phone_id}/messages"
-        
-        if not whatsapp_token:
-            logger.error("WHATSAPP_ACCESS_TOKEN not configured in settings")
-            return False
-        
-        # Format phone number (remove any non-digits and ensure it has country code)
-        phone_number = message.pledge.mobile_number
-        # Remove any non-digit characters
-        phone_number = ''.join(filter(str.isdigit, phone_number))
-        
-        # If number doesn't start with country code, assume it's a local number
-        # You may need to adjust this logic based on your country
-        if not phone_number.startswith('255'):  # Kenya country code example
-            if phone_number.startswith('0'):
-                phone_number = '255' + phone_number[1:]  # Replace leading 0 with country code
-            else:
-                phone_number = '255' + phone_number  # Add country code
-        
-        logger.info(f"Formatted phone number: {phone_number}")
-        
-        # Prepare the request headers
-        headers = {
-            'Authorization': f'Bearer {whatsapp_token[:10]}...{whatsapp_token[-4:]}',  # Masked token for logging
-            'Content-Type': 'application/json'
-        }
+        # Phone number is normalized to E.164 when the pledge is saved
+        phone_number = message.pledge.whatsapp_recipient()
         
-        # Log headers (with masked token for security)
-        logger.info(f"WhatsApp API request headers: {headers}")
-        
-        # Try to send as text message first
-        try:
-            # Prepare the message payload for text message
-            payload = {
-                "messaging_product": "whatsapp",
-                "to": phone_number,
-                "type": "template",
-                "template": {
-                    "name": "hello_world",
-                    "language": {"code": "en_US"}
-                }
-            }
-            
-            logger.info(f"WhatsApp API URL: {whatsapp_api_url}")
-            logger.info(f"WhatsApp request payload:")
-            logger.info(f"{json.dumps(payload, indent=2)}")
-            
-            # Prepare actual headers for request (with full token)
-            actual_headers = {
-                'Authorization': f'Bearer {whatsapp_token}',
-                'Content-Type': 'application/json'
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": phone_number,
+            "type": "template",
+            "template": {
+                "name": "hello_world",
+                "language": {"code": "en_US"}
             }
-            
-            # Make the API request
-            logger.info(f"Sending WhatsApp API request...")
-            response = requests.post(
-                whatsapp_api_url,
-                headers=actual_headers,
-                json=payload,
-                timeout=30
-            )
-            
-            logger.info(f"WhatsApp API response received - Status Code: {response.status_code}")
-            logger.info(f"WhatsApp API response headers: {dict(response.headers)}")
-            logger.info(f"WhatsApp API response body:")
-            logger.info(f"{response.text}")
-            
-            # Try to parse response as JSON for better logging
-            try:
-                response_json = response.json()
-                logger.info(f"WhatsApp API response JSON:")
-                logger.info(f"{json.dumps(response_json, indent=2)}")
-            except json.JSONDecodeError:
-                logger.warning(f"WhatsApp API response is not valid JSON")
-            
-            if response.status_code == 200:
-                response_data = response.json()
-                if 'messages' in response_data and len(response_data['messages']) > 0:
-                    message_id = response_data['messages'][0].get('id', 'unknown')
-                    logger.info(f"WhatsApp message sent successfully to {phone_number} ({message.pledge.name}). Message ID: {message_id}")
-                    return True
-                else:
-                    logger.warning(f"WhatsApp API returned 200 but no message ID found: {response_data}")
-                    return False
-            else:
-                logger.error(f"WhatsApp API error {response.status_code}: {response.text}")
-                return False
-                
-        except requests.RequestException as e:
-            logger.error(f"WhatsApp API request failed: {str(e)}")
-            return False
+        }
+        return post_whatsapp_payload(message, payload, 'WhatsApp')
             
     except Exception as e:
         logger.error(f"WhatsApp sending failed for {message.pledge.mobile_number}: {str(e)}")
@@ -310,40 +415,11 @@ def send_whatsapp_template(message, template_name='hello_world', language_code='
     """
     Send WhatsApp template message (for cases where template is required)
     """
-    logger.info(f"Attempting WhatsApp template send to {message.pledge.mobile_number} for {message.pledge.name}")
+    logger.debug(f"Attempting WhatsApp template send to {message.pledge.mobile_number} for {message.pledge.name}")
     
     try:
-        whatsapp_token = getattr(settings, 'WHATSAPP_ACCESS_TOKEN', None)
-        whatsapp_phone_id = getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', '878543835331362')
-        whatsapp_api_url = f"https://graph.facebook.com/v22.0/{whatsapp_phone_id}/messages"
-        
-        if not whatsapp_token:
-            logger.error("WHATSAPP_ACCESS_TOKEN not configured in settings")
-            return False
-        
-        # Format phone number
-        phone_number = message.pledge.mobile_number
-        phone_number = ''.join(filter(str.isdigit, phone_number))
-        
-        if not phone_number.startswith('255'):
-            if phone_number.startswith('0'):
-                phone_number = '255' + phone_number[1:]
-            else:
-                phone_number = '255' + phone_number
-        
-        # Prepare headers (with masked token for logging)
-        headers_masked = {
-            'Authorization': f'Bearer {whatsapp_token[:10]}...{whatsapp_token[-4:]}',  # Masked token for logging
-            'Content-Type': 'application/json'
-        }
-        
-        # Actual headers for request
-        headers = {
-            'Authorization': f'Bearer {whatsapp_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        logger.info(f"WhatsApp template API request headers: {headers_masked}")
+        # Phone number is normalized to E.164 when the pledge is saved
+        phone_number = message.pledge.whatsapp_recipient()
         
         # Template message payload (as per your example)
         payload = {
@@ -357,74 +433,625 @@ def send_whatsapp_template(message, template_name='hello_world', language_code='
                 }
             }
         }
-        
-        logger.info(f"WhatsApp template API URL: {whatsapp_api_url}")
-        logger.info(f"WhatsApp template request payload:")
-        logger.info(f"{json.dumps(payload, indent=2)}")
-        
-        logger.info(f"Sending WhatsApp template API request...")
-        response = requests.post(
-            whatsapp_api_url,
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-        
-        logger.info(f"WhatsApp template API response received - Status Code: {response.status_code}")
-        logger.info(f"WhatsApp template API response headers: {dict(response.headers)}")
-        logger.info(f"WhatsApp template API response body:")
-        logger.info(f"{response.text}")
-        
-        # Try to parse response as JSON for better logging
-        try:
-            response_json = response.json()
-            logger.info(f"WhatsApp template API response JSON:")
-            logger.info(f"{json.dumps(response_json, indent=2)}")
-        except json.JSONDecodeError:
-            logger.warning(f"WhatsApp template API response is not valid JSON")
-        
-        if response.status_code == 200:
-            response_data = response.json()
-            if 'messages' in response_data and len(response_data['messages']) > 0:
-                message_id = response_data['messages'][0].get('id', 'unknown')
-                logger.info(f"WhatsApp template sent successfully to {phone_number} ({message.pledge.name}). Message ID: {message_id}")
-                return True
-            else:
-                logger.warning(f"WhatsApp template API returned 200 but no message ID found: {response_data}")
-                return False
-        else:
-            logger.error(f"WhatsApp template API error {response.status_code}: {response.text}")
-            return False
+        return post_whatsapp_payload(message, payload, 'WhatsApp template')
             
     except Exception as e:
         logger.error(f"WhatsApp template sending failed for {message.pledge.mobile_number}: {str(e)}")
         return False
 
 
+def build_email_message(message):
+    """Build the EmailMessage for a Messages row sent by email."""
+    # Assuming you have email configured in settings
+    recipient_email = f"{message.pledge.mobile_number}@email.com"  # Replace with actual email logic
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Email recipient: {recipient_email}")
+        logger.debug(f"Email content preview: {message.message[:100]}{'...' if len(message.message) > 100 else ''}")
+    
+    return EmailMessage(
+        subject='Message from Events Management',
+        body=message.message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient_email],
+    )
+
+
 def send_email_message(message):
     """
     Email sending implementation
+    
+    Sends through the email channel, which reuses one SMTP connection per
+    batch; prefer send_queued_messages() for more than one message.
     """
-    logger.info(f"Attempting email send to {message.pledge.name} ({message.pledge.mobile_number})")
+    channel = get_channel('email')
+    if channel is None:
+        logger.error("No 'email' channel configured in MESSAGE_CHANNELS")
+        return False
     
-    try:
-        # Assuming you have email configured in settings
-        recipient_email = f"{message.pledge.mobile_number}@email.com"  # Replace with actual email logic
+    result = channel.send(message)
+    if not result.success:
+        logger.error(f"Email sending failed for {message.pledge.name}: {result.error}")
+    return result.success
+
+
+# Message statuses a delivery callback may move a message out of. Statuses
+# only move forward (sent -> delivered -> read), so late or duplicate
+# callbacks never downgrade a message. A failure outranks 'sent', so a
+# batch holding both keeps the failure; only a later delivery report
+# overrides it.
+DELIVERY_STATUS_TRANSITIONS = {
+    'sent': ['queued', 'pending'],
+    'delivered': ['queued', 'pending', 'sent', 'failed'],
+    'read': ['queued', 'pending', 'sent', 'delivered', 'failed'],
+    'failed': ['queued', 'pending', 'sent'],
+}
+DELIVERY_STATUS_RANK = {'sent': 0, 'failed': 1, 'delivered': 2, 'read': 3}
+
+# Callbacks that match no message yet (the send may still be saving its
+# provider id) are retried until they are this old
+UNMATCHED_STATUS_GRACE_PERIOD = 3600
+
+def apply_delivery_status_events(batch_size=1000):
+    """
+    Apply pending delivery status callbacks to messages.
+    
+    Each batch is folded down to the most advanced status per provider
+    message id and applied with one UPDATE per target status, so a burst of
+    callbacks costs a handful of queries instead of one transaction per row.
+    
+    Returns the number of callbacks processed.
+    """
+    processed_count = 0
+    last_id = 0
+    
+    while True:
+        events = list(
+            DeliveryStatusEvent.objects.filter(processed_at__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .values('id', 'provider_message_id', 'status', 'received_at')[:batch_size]
+        )
+        if not events:
+            break
+        last_id = events[-1]['id']
         
-        logger.debug(f"Email recipient: {recipient_email}")
-        logger.debug(f"Email content preview: {message.message[:100]}{'...' if len(message.message) > 100 else ''}")
+        # Most advanced known status per provider message id
+        latest = {}
+        for event in events:
+            status = event['status']
+            if status not in DELIVERY_STATUS_RANK:
+                continue
+            current = latest.get(event['provider_message_id'])
+            if current is None or DELIVERY_STATUS_RANK[status] > DELIVERY_STATUS_RANK[current]:
+                latest[event['provider_message_id']] = status
         
-        send_mail(
-            subject='Message from Events Management',
-            message=message.message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[recipient_email],
-            fail_silently=False,
+        now = timezone.now()
+        with transaction.atomic():
+            known_ids = set(
+                Messages.with_provider_ids(latest)
+                .values_list('provider_message_id', flat=True)
+            )
+            
+            by_status = {}
+            for provider_message_id, status in latest.items():
+                if provider_message_id in known_ids:
+                    by_status.setdefault(status, []).append(provider_message_id)
+            
+            for status, provider_message_ids in by_status.items():
+                matching = Messages.with_provider_ids(provider_message_ids).filter(
+                    status__in=DELIVERY_STATUS_TRANSITIONS[status],
+                )
+                # Lock the rows to count the statuses they move out of
+                previous = Counter(matching.select_for_update().values_list('status', flat=True))
+                updated = matching.update(status=status, updated_at=now)
+                for old_status, count in previous.items():
+                    record_status_change(old_status, status, count)
+                logger.info(f"Delivery callbacks: {updated} messages marked '{status}'")
+            
+            # Keep unmatched callbacks for a later run unless they are stale
+            cutoff = now - timedelta(seconds=UNMATCHED_STATUS_GRACE_PERIOD)
+            done_ids = [
+                event['id'] for event in events
+                if event['provider_message_id'] in known_ids
+                or event['status'] not in DELIVERY_STATUS_RANK
+                or event['received_at'] < cutoff
+            ]
+            DeliveryStatusEvent.objects.filter(id__in=done_ids).update(processed_at=now)
+        
+        processed_count += len(done_ids)
+    
+    return processed_count
+
+
+_workers_running = set()
+_workers_rerun = set()
+_workers_lock = threading.Lock()
+
+
+def run_background_worker(name, target, wakeup=None):
+    """
+    Run target() in a daemon thread unless a worker with this name is running.
+    
+    Keeps at most one thread per worker name and process, so bursts of
+    requests don't spawn a thread each. A call made while the worker runs
+    makes it run target() once more when done, and sets `wakeup` (a
+    threading.Event) so a worker waiting on it resumes early.
+    """
+    with _workers_lock:
+        if name in _workers_running:
+            _workers_rerun.add(name)
+            if wakeup is not None:
+                wakeup.set()
+            return None
+        _workers_running.add(name)
+    
+    def worker():
+        while True:
+            try:
+                target()
+            except Exception as e:
+                logger.error(f"Background worker {name} failed: {str(e)}")
+            with _workers_lock:
+                if name in _workers_rerun:
+                    _workers_rerun.discard(name)
+                    continue
+                _workers_running.discard(name)
+                return
+    
+    thread = threading.Thread(target=worker, name=f"events-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def process_delivery_statuses_background():
+    """
+    Apply stored delivery callbacks in a background thread.
+    
+    At most one worker runs per process; callbacks arriving while it runs are
+    picked up by its next batch, so webhook bursts don't spawn a thread each.
+    """
+    def work():
+        # Let a burst of callbacks accumulate into one batch
+        time.sleep(1)
+        processed = apply_delivery_status_events()
+        logger.info(f"Processed {processed} delivery status callbacks")
+    
+    return run_background_worker('delivery-statuses', work)
+
+
+def _outbound_email_setting(name, default):
+    return getattr(settings, 'OUTBOUND_EMAIL', {}).get(name, default)
+
+
+# Emails left in 'sending' longer than this (worker crashed mid-send) are
+# queued again
+OUTBOUND_EMAIL_CLAIM_TIMEOUT = 600
+
+# Set when an email is queued, waking a worker that waits for a retry
+_outbound_wakeup = threading.Event()
+
+
+def queue_email(subject, body, recipients, html_body='', from_email=None):
+    """
+    Store a transactional email and start the background sender.
+    
+    Returns immediately; delivery and retries happen off the request path.
+    
+    Args:
+        subject: Email subject
+        body: Plain text body
+        recipients: Address or list of addresses
+        html_body: Optional HTML alternative
+        from_email: Sender, DEFAULT_FROM_EMAIL when not given
+        
+    Returns:
+        OutboundEmail: The queued email
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    
+    email = OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or '',
+        recipients=list(recipients),
+    )
+    logger.info(f"Outbound email {email.id} queued for {', '.join(email.recipients)}: {subject}")
+    
+    # Start the sender once the row is visible to it
+    transaction.on_commit(process_outbound_emails_background)
+    return email
+
+
+def build_outbound_email(email):
+    """Build the Django EmailMessage for a queued OutboundEmail."""
+    if email.html_body:
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=email.recipients,
         )
+        message.attach_alternative(email.html_body, 'text/html')
+        return message
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=email.recipients,
+    )
+
+
+def outbound_retry_delay(attempts):
+    """Seconds to wait before retrying an email that has failed `attempts` times."""
+    delay = _outbound_email_setting('RETRY_DELAY', 60) * 2 ** max(attempts - 1, 0)
+    return min(delay, _outbound_email_setting('MAX_RETRY_DELAY', 3600))
+
+
+def _claim_outbound_emails(batch_size):
+    """
+    Mark up to batch_size due emails as 'sending' and return them.
+    
+    The conditional UPDATE makes the claim safe when several workers or
+    processes poll the queue: an email is only sent by whoever flipped it.
+    """
+    now = timezone.now()
+    due_ids = list(
+        OutboundEmail.objects.filter(status='queued', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not due_ids:
+        return []
+    
+    claim_token = now
+    OutboundEmail.objects.filter(id__in=due_ids, status='queued').update(
+        status='sending', claimed_at=claim_token
+    )
+    return list(
+        OutboundEmail.objects.filter(id__in=due_ids, status='sending', claimed_at=claim_token)
+        .order_by('id')
+    )
+
+
+def release_stale_outbound_emails():
+    """Queue again emails whose worker died while sending them."""
+    cutoff = timezone.now() - timedelta(seconds=OUTBOUND_EMAIL_CLAIM_TIMEOUT)
+    released = OutboundEmail.objects.filter(status='sending', claimed_at__lt=cutoff).update(
+        status='queued', claimed_at=None
+    )
+    if released:
+        logger.warning(f"Re-queued {released} outbound emails left in 'sending'")
+    return released
+
+
+def deliver_outbound_emails(batch_size=None):
+    """
+    Send every due outbound email.
+    
+    Emails are sent in batches over one mail server connection each (through
+    EmailChannel.deliver). Each email's result is saved as soon as its send
+    completes, and the claim on the rest of the batch is renewed, so a slow
+    batch never outlives OUTBOUND_EMAIL_CLAIM_TIMEOUT and gets sent again by
+    another worker. Failed sends are rescheduled with exponential backoff
+    until OUTBOUND_EMAIL['MAX_ATTEMPTS'] is reached.
+    
+    Returns:
+        tuple: (sent_count, failed_count) where failed counts every failed
+        attempt, retried or not
+    """
+    batch_size = batch_size or _outbound_email_setting('BATCH_SIZE', 50)
+    max_attempts = _outbound_email_setting('MAX_ATTEMPTS', 5)
+    channel = EmailChannel('outbound_email', batch_size=batch_size)
+    
+    release_stale_outbound_emails()
+    
+    sent_count = 0
+    failed_count = 0
+    while True:
+        emails = _claim_outbound_emails(batch_size)
+        if not emails:
+            break
         
-        logger.info(f"Email sent successfully to {message.pledge.name} at {recipient_email}")
-        return True
+        def record(position, result):
+            nonlocal sent_count, failed_count
+            email = emails[position]
+            now = timezone.now()
+            email.attempts += 1
+            email.claimed_at = None
+            if result.success:
+                email.status = 'sent'
+                email.sent_at = now
+                email.last_error = ''
+                sent_count += 1
+            else:
+                failed_count += 1
+                email.last_error = result.error
+                if email.attempts >= max_attempts:
+                    email.status = 'failed'
+                    logger.error(f"Outbound email {email.id} failed after {email.attempts} attempts: {result.error}")
+                else:
+                    email.status = 'queued'
+                    email.next_attempt_at = now + timedelta(seconds=outbound_retry_delay(email.attempts))
+                    logger.warning(
+                        f"Outbound email {email.id} attempt {email.attempts} failed, "
+                        f"retrying at {email.next_attempt_at.isoformat()}: {result.error}"
+                    )
+            
+            # A sent email released meanwhile is still marked sent, so it is
+            # not sent again once re-queued
+            still_ours = ['sending', 'queued'] if result.success else ['sending']
+            with transaction.atomic():
+                saved = OutboundEmail.objects.filter(id=email.id, status__in=still_ours).update(
+                    status=email.status, attempts=email.attempts, claimed_at=None, sent_at=email.sent_at,
+                    last_error=email.last_error, next_attempt_at=email.next_attempt_at,
+                )
+                OutboundEmail.objects.filter(
+                    id__in=[other.id for other in emails[position + 1:]], status='sending'
+                ).update(claimed_at=now)
+            if not saved:
+                logger.warning(f"Outbound email {email.id} was released while sending; it may be sent twice")
         
-    except Exception as e:
-        logger.error(f"Email sending failed for {message.pledge.name}: {str(e)}")
-        return False
\ No newline at end of file
+        messages = []
+        positions = []
+        for position, email in enumerate(emails):
+            try:
+                messages.append(build_outbound_email(email))
+                positions.append(position)
+            except Exception as e:
+                record(position, SendResult(False, error=str(e)))
+        channel.deliver(messages, on_result=lambda index, result: record(positions[index], result))
+    
+    return sent_count, failed_count
+
+
+def next_outbound_email_due():
+    """Return when the next queued email is due, or None if the queue is empty."""
+    return (
+        OutboundEmail.objects.filter(status='queued')
+        .order_by('next_attempt_at')
+        .values_list('next_attempt_at', flat=True)
+        .first()
+    )
+
+
+def process_outbound_emails_background():
+    """
+    Send queued transactional emails in a background thread.
+    
+    The worker keeps running while retries are pending, sleeping until the
+    next one is due (or a new email is queued), so failed sends are retried
+    without a cron job. Run the process_outbound_emails command to cover
+    restarts.
+    """
+    def work():
+        while True:
+            sent, failed = deliver_outbound_emails()
+            if sent or failed:
+                logger.info(f"Outbound emails: {sent} sent, {failed} failed attempts")
+            
+            next_due = next_outbound_email_due()
+            if next_due is None:
+                break
+            wait = (next_due - timezone.now()).total_seconds()
+            if wait > 0:
+                _outbound_wakeup.wait(min(wait, _outbound_email_setting('MAX_RETRY_DELAY', 3600)))
+                _outbound_wakeup.clear()
+    
+    return run_background_worker('outbound-emails', work, wakeup=_outbound_wakeup)
+
+
+# Rows deleted per batch (and per transaction) by account deletion jobs
+ACCOUNT_DELETION_BATCH_SIZE = getattr(settings, 'ACCOUNT_DELETION_BATCH_SIZE', 1000)
+
+# Failed jobs are retried this many times before they are marked failed
+ACCOUNT_DELETION_MAX_ATTEMPTS = 3
+
+# Jobs left 'running' without progress this long (worker died) are resumed
+ACCOUNT_DELETION_CLAIM_TIMEOUT = 600
+
+
+def request_account_deletion(user):
+    """
+    Record an account deletion job and start the background worker.
+    
+    The account and its events are deactivated right away, so the user can
+    no longer sign in and the events disappear from lists; the data itself
+    is deleted by run_account_deletion. Returns the (new or already pending)
+    AccountDeletionJob.
+    """
+    from .context_processors import invalidate_user_events
+    
+    with transaction.atomic():
+        job = AccountDeletionJob.objects.filter(user=user, status__in=['pending', 'running']).first()
+        if job is None:
+            job = AccountDeletionJob.objects.create(
+                user=user,
+                user_email=user.email,
+                user_name=user.full_name,
+            )
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        Event.objects.filter(created_by=user).update(is_active=False)
+    
+    invalidate_user_events(user.pk)
+    logger.info(f"Account deletion job {job.id} queued for {job.user_email}")
+    transaction.on_commit(process_account_deletions_background)
+    return job
+
+
+def deletable_event_names(user_id):
+    """
+    Names of the user's events whose pledges are deleted with the account.
+    
+    Pledges reference their event by name only, so names that another
+    account also uses for an event are left out: their pledges can't be
+    told apart and are kept.
+    """
+    names = set(Event.objects.filter(created_by_id=user_id).values_list('name', flat=True))
+    shared = set(
+        Event.objects.filter(name__in=names).exclude(created_by_id=user_id)
+        .values_list('name', flat=True)
+    )
+    if shared:
+        logger.warning(
+            f"Keeping pledges of {len(shared)} event names shared with other accounts "
+            f"while deleting user {user_id}"
+        )
+    return sorted(names - shared)
+
+
+def _claim_account_deletion_job():
+    """
+    Mark the oldest pending (or stalled) deletion job as running and return it.
+    
+    The conditional UPDATE makes the claim safe when several workers poll
+    the jobs: a job is only run by whoever flipped it.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=ACCOUNT_DELETION_CLAIM_TIMEOUT)
+    candidate = (
+        AccountDeletionJob.objects
+        .filter(Q(status='pending') | Q(status='running', claimed_at__lt=stale))
+        .order_by('id')
+        .values('id', 'status', 'claimed_at', 'attempts')
+        .first()
+    )
+    if candidate is None:
+        return None
+    
+    claimed = AccountDeletionJob.objects.filter(
+        id=candidate['id'], status=candidate['status'], claimed_at=candidate['claimed_at']
+    ).update(status='running', claimed_at=now, attempts=candidate['attempts'] + 1)
+    if not claimed:
+        # Another worker took it; let the caller try again
+        return _claim_account_deletion_job()
+    return AccountDeletionJob.objects.get(id=candidate['id'])
+
+
+def run_account_deletion(job, batch_size=None):
+    """
+    Delete everything belonging to a claimed job's account, in batches.
+    
+    Children go first (messages, archived messages, transactions, pledges,
+    then events), each batch in its own short transaction, so no step holds
+    locks on a large part of a table. Progress is saved after every batch; a
+    job interrupted halfway simply continues where it stopped when it runs
+    again. Finally the user is deleted and a confirmation email is queued.
+    """
+    from .maintenance import delete_in_batches
+    
+    batch_size = batch_size or ACCOUNT_DELETION_BATCH_SIZE
+    names = deletable_event_names(job.user_id) if job.user_id else []
+    # Shared names whose pledges are kept, for the confirmation email
+    kept_names = sorted(
+        set(Event.objects.filter(created_by_id=job.user_id).values_list('name', flat=True)) - set(names)
+    ) if job.user_id else []
+    phases = [
+        ('messages', 'messages_deleted', Messages.objects.filter(pledge__event_id__in=names)),
+        ('archive', 'messages_deleted', MessageArchive.objects.filter(event_id__in=names)),
+        ('transactions', 'transactions_deleted', Transactions.objects.filter(pledge__event_id__in=names)),
+        ('pledges', 'pledges_deleted', Pledges.objects.filter(event_id__in=names)),
+        ('events', 'events_deleted', Event.objects.filter(created_by_id=job.user_id)),
+    ]
+    
+    for phase, field, queryset in phases:
+        if job.user_id is None:
+            break
+        job.phase = phase
+        job.save(update_fields=['phase'])
+        
+        def progress(count, field=field):
+            setattr(job, field, getattr(job, field) + count)
+            job.claimed_at = timezone.now()
+            job.save(update_fields=[field, 'claimed_at'])
+        
+        delete_in_batches(queryset, batch_size, progress=progress)
+        logger.info(f"Account deletion job {job.id}: {getattr(job, field)} {phase} deleted")
+    
+    with transaction.atomic():
+        if job.user_id is not None:
+            job.phase = 'user'
+            job.save(update_fields=['phase'])
+            job.user.delete()
+            job.user = None
+        
+        job.status = 'completed'
+        job.phase = ''
+        job.completed_at = timezone.now()
+        job.last_error = ''
+        job.save(update_fields=['status', 'phase', 'completed_at', 'last_error'])
+        
+        kept_note = ''
+        if kept_names:
+            kept_note = (
+                f"\nPledges recorded under {', '.join(kept_names)} were kept: another account also has "
+                f"events with these names, and their pledges cannot be told apart.\n"
+            )
+        queue_email(
+            subject='Account Deletion Confirmation - Events Management System',
+            body=f"""
+Dear {job.user_name},
+
+Your account has been successfully deleted from the Events Management System.
+
+Deletion Details:
+- Account: {job.user_email}
+- Deletion Date: {job.completed_at.strftime('%Y-%m-%d %H:%M:%S')}
+- Events Deleted: {job.events_deleted}
+- Total Data Records Removed: {job.records_deleted}
+
+Your account, your events and the pledges, transactions and messages recorded under them have been permanently removed from our system.
+{kept_note}
+If you have any questions or believe this deletion was made in error, please contact us immediately.
+
+Thank you for using our service.
+
+Best regards,
+Nifty Technologies Team
+            """,
+            recipients=[job.user_email],
+        )
+    
+    logger.info(
+        f"Account deleted: {job.user_email} - Events: {job.events_deleted}, Pledges: {job.pledges_deleted}, "
+        f"Transactions: {job.transactions_deleted}, Messages: {job.messages_deleted}"
+    )
+    return job
+
+
+def process_account_deletions(batch_size=None):
+    """
+    Run every pending account deletion job.
+    
+    Failed jobs go back to pending until ACCOUNT_DELETION_MAX_ATTEMPTS is
+    reached. Returns a (completed_count, failed_count) tuple.
+    """
+    completed_count = 0
+    failed_count = 0
+    while True:
+        job = _claim_account_deletion_job()
+        if job is None:
+            break
+        try:
+            run_account_deletion(job, batch_size)
+            completed_count += 1
+        except Exception as e:
+            failed_count += 1
+            AccountDeletionJob.objects.filter(id=job.id).update(
+                status='failed' if job.attempts >= ACCOUNT_DELETION_MAX_ATTEMPTS else 'pending',
+                last_error=str(e),
+            )
+            logger.error(f"Account deletion job {job.id} attempt {job.attempts} failed: {str(e)}")
+    return completed_count, failed_count
+
+
+def process_account_deletions_background():
+    """Run pending account deletion jobs in a background thread."""
+    def work():
+        completed, failed = process_account_deletions()
+        if completed or failed:
+            logger.info(f"Account deletions: {completed} completed, {failed} failed")
+    
+    return run_background_worker('account-deletions', work)
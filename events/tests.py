@@ -1,3 +1,711 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import socket
+import time
+import uuid
+from datetime import timedelta
+from email import message_from_bytes
+from io import StringIO
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .captcha import CAPTCHA_MAX_AGE, new_challenge, verify_challenge
+from .channels import EmailChannel, FakeChannel, SendResult, reset_channels
+from .hashers import TunablePBKDF2PasswordHasher
+from .maintenance import archive_messages, delete_in_batches
+from .models import (
+    AccountDeletionJob, Contact, DeliveryStatusEvent, Event, EventUser, MessageQueueCounter, MessageTemplate,
+    Messages, OutboundEmail, Pledges, Transactions,
+)
+from .queue_stats import compute_message_counters, get_message_queue_stats, rebuild_message_counters
+from .throttle import SlidingWindowLimiter, get_ip_limiter, get_limiter
+from .tasks import (
+    OUTBOUND_EMAIL_CLAIM_TIMEOUT, apply_delivery_status_events, create_and_queue_message, deliver_outbound_emails,
+    queue_email, release_stale_outbound_emails, run_account_deletion, send_message_background, send_queued_messages,
+)
+from .views import get_account_data_counts
+from .partitions import (
+    UNIQUE_GUARDS, convert_table, detach_old_partitions, ensure_partitions,
+    is_partitioned, list_partitions, month_start, partition_name,
+)
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    Controller = None
+
+
+class Interrupted(Exception):
+    pass
+
+
+def stored_message_counters():
+    return dict(MessageQueueCounter.objects.exclude(count=0).values_list('key', 'count'))
+
+
+@override_settings(MESSAGE_CHANNELS={
+    'sms': {'BACKEND': 'events.channels.FakeChannel', 'BATCH_SIZE': 2, 'OPTIONS': {'LATENCY': 0}},
+})
+class MessageCounterTests(TestCase):
+    """The message queue counters follow every path that changes messages."""
+
+    def setUp(self):
+        reset_channels()
+        self.addCleanup(reset_channels)
+        self.pledge = Pledges.objects.create(
+            event_id='Harambee', name='Asha Mushi', mobile_number='0712345678', pledge=Decimal('1000.00')
+        )
+
+    def queue(self, count, method='sms'):
+        return [create_and_queue_message(self.pledge, f'Reminder {number}', method) for number in range(count)]
+
+    def assertCountersMatch(self):
+        self.assertEqual(stored_message_counters(), compute_message_counters())
+
+    def test_create(self):
+        self.queue(3)
+        self.assertCountersMatch()
+        self.assertEqual(get_message_queue_stats()['queue_status']['queued'], 3)
+        self.assertEqual(get_message_queue_stats()['recent_activity_24h'], 3)
+
+    def test_dispatch(self):
+        messages = self.queue(5)
+        self.queue(1, method='voice_call')
+        sent, failed = send_queued_messages([message.id for message in Messages.objects.all()])
+        self.assertEqual((sent, failed), (5, 1))
+        self.assertCountersMatch()
+
+        single = self.queue(1)[0]
+        send_message_background(single.id)
+        self.assertCountersMatch()
+        self.assertEqual(get_message_queue_stats()['queue_status']['sent'], len(messages) + 1)
+
+    def test_delivery_callback(self):
+        self.queue(4)
+        send_queued_messages(list(Messages.objects.values_list('id', flat=True)))
+        first, second, third, _ = Messages.objects.order_by('id')
+        DeliveryStatusEvent.objects.bulk_create([
+            DeliveryStatusEvent(provider='fake', provider_message_id=first.provider_message_id, status='delivered'),
+            DeliveryStatusEvent(provider='fake', provider_message_id=first.provider_message_id, status='read'),
+            DeliveryStatusEvent(provider='fake', provider_message_id=second.provider_message_id, status='failed'),
+            # A failure and a 'sent' report in the same batch keep the failure
+            DeliveryStatusEvent(provider='fake', provider_message_id=third.provider_message_id, status='failed'),
+            DeliveryStatusEvent(provider='fake', provider_message_id=third.provider_message_id, status='sent'),
+        ])
+        self.assertEqual(apply_delivery_status_events(), 5)
+        self.assertCountersMatch()
+        self.assertEqual(
+            get_message_queue_stats()['queue_status'],
+            {'queued': 0, 'pending': 0, 'sent': 1, 'delivered': 0, 'failed': 2, 'read': 1},
+        )
+
+    @override_settings(WHATSAPP_APP_SECRET='webhook-secret')
+    def test_webhook_rejects_non_object_payloads(self):
+        for body in (b'[]', b'"statuses"'):
+            signature = hmac.new(b'webhook-secret', body, hashlib.sha256).hexdigest()
+            response = self.client.post(
+                reverse('events:whatsapp_webhook'), body, content_type='application/json',
+                HTTP_X_HUB_SIGNATURE_256=f'sha256={signature}',
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(DeliveryStatusEvent.objects.exists())
+
+    def test_archive(self):
+        self.queue(4)
+        send_queued_messages(list(Messages.objects.values_list('id', flat=True)))
+        Messages.objects.filter(id__in=list(Messages.objects.order_by('id').values_list('id', flat=True)[:3])).update(
+            created_at=timezone.now() - timedelta(days=120)
+        )
+        # Backdating by hand moves rows out of the hourly counters
+        rebuild_message_counters()
+        self.assertEqual(archive_messages(days=90, batch_size=2), 3)
+        self.assertCountersMatch()
+        self.assertEqual(get_message_queue_stats()['total_messages'], 1)
+
+    def test_delete(self):
+        messages = self.queue(6)
+        messages[0].delete()
+        Messages.objects.filter(id=messages[1].id).delete()
+        delete_in_batches(Messages.objects.filter(id__in=[message.id for message in messages[2:4]]), batch_size=1)
+        self.assertCountersMatch()
+        self.assertEqual(get_message_queue_stats()['total_messages'], 2)
+
+        self.pledge.delete()
+        self.assertCountersMatch()
+        self.assertEqual(get_message_queue_stats()['total_messages'], 0)
+
+
+@override_settings(MESSAGE_CHANNELS={
+    'sms': {'BACKEND': 'events.channels.FakeChannel', 'OPTIONS': {'LATENCY': 0}},
+})
+class BulkReminderTests(TestCase):
+    """One reminder per contact, recorded on every pledge it covers."""
+
+    def setUp(self):
+        reset_channels()
+        self.addCleanup(reset_channels)
+        self.user = EventUser.objects.create_user(
+            'asha@example.com', 'correct horse battery', full_name='Asha Mushi', is_verified=True
+        )
+        other = EventUser.objects.create_user(
+            'juma@example.com', 'correct horse battery', full_name='Juma Said', is_verified=True
+        )
+        Event.objects.create(name='Harambee', date=timezone.now(), created_by=self.user)
+        Event.objects.create(name='Wedding', date=timezone.now(), created_by=self.user)
+        Event.objects.create(name='Graduation', date=timezone.now(), created_by=other)
+        MessageTemplate.objects.create(
+            event_id='Harambee', name='Reminder', type='reminder', is_active=True,
+            message='Hello {name}, {balance} is left for {event_id}.',
+        )
+        self.pledges = [
+            Pledges.objects.create(
+                event_id=event_name, name='Neema Kweka', mobile_number='0712345678',
+                pledge=Decimal('1000.00'), status='pending',
+            )
+            for event_name in ('Harambee', 'Wedding', 'Graduation')
+        ]
+
+    def test_reminder_is_recorded_per_pledge_and_sent_once(self):
+        self.client.force_login(self.user)
+        with mock.patch('events.views.send_bulk_messages_background') as send:
+            self.client.post(reverse('events:bulk_reminder_send'), {'action': 'auto_process'})
+        message_ids = send.call_args.args[0]
+
+        harambee, wedding, graduation = self.pledges
+        reminders = Messages.objects.filter(id__in=message_ids).order_by('id')
+        self.assertEqual(sorted(message.pledge_id for message in reminders), [harambee.id, wedding.id])
+        self.assertEqual(len({message.message for message in reminders}), 1)
+        self.assertIn('Harambee', reminders[0].message)
+        self.assertIn('Wedding', reminders[0].message)
+        # The other account's pledge for the same contact is left alone
+        self.assertNotIn('Graduation', reminders[0].message)
+        self.assertFalse(graduation.messages.exists())
+
+        with mock.patch.object(FakeChannel, 'send', return_value=SendResult(True, 'fake.1')) as channel_send:
+            self.assertEqual(send_queued_messages(message_ids), (2, 0))
+        self.assertEqual(channel_send.call_count, 1)
+        self.assertEqual(
+            list(Messages.objects.filter(id__in=message_ids).order_by('id').values_list('status', 'provider_message_id')),
+            [('sent', 'fake.1'), ('sent', '')],
+        )
+
+    def test_save_without_loaded_phone_keeps_merged_contact(self):
+        harambee = self.pledges[0]
+        moved = Pledges.objects.create(
+            event_id='Harambee', name='Neema K.', mobile_number='0755000111', pledge=Decimal('500.00'),
+        )
+        harambee.contact.merge(moved.contact)
+
+        pledge = Pledges.objects.only('id', 'status', 'mobile_number').get(pk=moved.pk)
+        pledge.status = 'pending'
+        pledge.save()
+        self.assertEqual(Pledges.objects.get(pk=moved.pk).contact_id, harambee.contact_id)
+        self.assertEqual(Contact.objects.filter(phone_e164='+255755000111').count(), 0)
+
+
+class SMTPRecorder:
+    """aiosmtpd handler that records deliveries and can refuse or drop."""
+
+    def __init__(self):
+        self.delivered = []
+        self.refused = set()
+        # Close the connection instead of answering these MAIL commands
+        # (counted from 1)
+        self.drop_mail_commands = set()
+        self.mail_commands = 0
+
+    async def handle_MAIL(self, server, session, envelope, address, mail_options):
+        self.mail_commands += 1
+        if self.mail_commands in self.drop_mail_commands:
+            server.transport.close()
+            return '421 Closing connection'
+        envelope.mail_from = address
+        envelope.mail_options.extend(mail_options)
+        return '250 OK'
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return '550 5.1.1 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.append((session.peer, message_from_bytes(envelope.content)['Subject']))
+        return '250 Message accepted'
+
+    def connections(self):
+        return len({peer for peer, _ in self.delivered})
+
+    def subjects(self):
+        return [subject for _, subject in self.delivered]
+
+
+@skipUnless(Controller, 'Needs aiosmtpd')
+class EmailChannelTests(TestCase):
+    """EmailChannel against a local SMTP server."""
+
+    def setUp(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self.server = SMTPRecorder()
+        controller = Controller(self.server, hostname='127.0.0.1', port=port)
+        controller.start()
+        self.addCleanup(controller.stop)
+        self.channel = EmailChannel('email', batch_size=3, options={
+            'CONNECTION': {
+                'backend': 'django.core.mail.backends.smtp.EmailBackend',
+                'host': '127.0.0.1',
+                'port': port,
+                'username': '',
+                'password': '',
+                'use_tls': False,
+                'use_ssl': False,
+                'timeout': 5,
+            },
+        })
+
+    def emails(self, *recipients):
+        return [
+            EmailMessage(f'Reminder {number}', 'Your pledge is due.', 'events@example.com', [recipient])
+            for number, recipient in enumerate(recipients)
+        ]
+
+    def test_one_connection_per_batch(self):
+        results = self.channel.deliver(self.emails(*[f'pledger{number}@example.com' for number in range(5)]))
+        self.assertEqual([result.success for result in results], [True] * 5)
+        self.assertEqual(self.server.subjects(), [f'Reminder {number}' for number in range(5)])
+        # Batches of three and two
+        self.assertEqual(self.server.connections(), 2)
+
+    def test_reconnect_after_dropped_connection(self):
+        self.server.drop_mail_commands = {2}
+        results = self.channel.deliver(self.emails('a@example.com', 'b@example.com', 'c@example.com'))
+        self.assertEqual([result.success for result in results], [True] * 3)
+        self.assertEqual(self.server.subjects(), ['Reminder 0', 'Reminder 1', 'Reminder 2'])
+        self.assertEqual(self.server.connections(), 2)
+
+    def test_reconnects_are_limited(self):
+        self.server.drop_mail_commands = {1, 2, 3}
+        results = self.channel.deliver(self.emails('a@example.com', 'b@example.com'))
+        self.assertEqual([result.success for result in results], [False, False])
+        self.assertIn('Connection lost', results[0].error)
+        self.assertEqual(self.server.delivered, [])
+
+        # The next batch starts with a new connection
+        results = self.channel.deliver(self.emails('c@example.com'))
+        self.assertTrue(results[0].success)
+
+    def test_refused_recipient_fails_only_its_message(self):
+        self.server.refused.add('unknown@example.com')
+        results = self.channel.deliver(self.emails('a@example.com', 'unknown@example.com', 'c@example.com'))
+        self.assertEqual([result.success for result in results], [True, False, True])
+        self.assertIn('No such user', results[1].error)
+        self.assertEqual(self.server.subjects(), ['Reminder 0', 'Reminder 2'])
+        self.assertEqual(self.server.connections(), 1)
+
+
+class SlowConnection:
+    """Mail connection stub; each send takes ``seconds`` of claim time."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.sent = []
+        self.released = []
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, emails):
+        # Age the claims as if the send took that long, and let another
+        # worker look for stale claims meanwhile
+        OutboundEmail.objects.filter(status='sending').update(
+            claimed_at=F('claimed_at') - timedelta(seconds=self.seconds)
+        )
+        self.released.append(release_stale_outbound_emails())
+        self.sent.extend(email.subject for email in emails)
+        return len(emails)
+
+
+class OutboundEmailTests(TestCase):
+    """Claimed emails are sent once, however long a batch takes."""
+
+    def setUp(self):
+        for number in range(3):
+            queue_email(f'Notice {number}', 'Your pledge is due.', 'asha@example.com')
+
+    def deliver(self, connection):
+        with mock.patch.object(EmailChannel, 'get_connection', return_value=connection):
+            return deliver_outbound_emails(batch_size=3)
+
+    def test_claim_is_renewed_while_a_batch_is_sent(self):
+        # Each send stays under the claim timeout, the whole batch does not
+        connection = SlowConnection(OUTBOUND_EMAIL_CLAIM_TIMEOUT * 2 // 3)
+        self.assertEqual(self.deliver(connection), (3, 0))
+        self.assertEqual(connection.released, [0, 0, 0])
+        self.assertEqual(self.deliver(connection), (0, 0))
+        self.assertEqual(connection.sent, ['Notice 0', 'Notice 1', 'Notice 2'])
+
+    def test_claim_expired_during_send(self):
+        connection = SlowConnection(OUTBOUND_EMAIL_CLAIM_TIMEOUT + 1)
+        self.assertEqual(self.deliver(connection), (3, 0))
+        self.assertEqual(connection.released[0], 3)
+        # Released emails that went out are still recorded as sent
+        self.assertEqual(list(OutboundEmail.objects.values_list('status', flat=True)), ['sent'] * 3)
+        self.assertEqual(self.deliver(connection), (0, 0))
+        self.assertEqual(connection.sent, ['Notice 0', 'Notice 1', 'Notice 2'])
+
+
+def solve(question):
+    left, operator, right = question.split()[:3]
+    return str(int(left) + int(right) if operator == '+' else int(left) - int(right))
+
+
+class CaptchaTests(TestCase):
+    def test_correct_answer(self):
+        question, token = new_challenge()
+        self.assertTrue(verify_challenge(token, solve(question)))
+
+    def test_replayed_token(self):
+        question, token = new_challenge()
+        self.assertTrue(verify_challenge(token, solve(question)))
+        self.assertFalse(verify_challenge(token, solve(question)))
+
+    def test_expired_token(self):
+        question, token = new_challenge()
+        later = time.time() + CAPTCHA_MAX_AGE + 1
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            self.assertFalse(verify_challenge(token, solve(question)))
+
+    def test_tampered_token(self):
+        question, token = new_challenge()
+        payload, signature = token.rsplit(':', 1)
+        nonce, timestamp_digest = payload.split(':', 1)
+        for tampered in (
+            f'{nonce}x:{timestamp_digest}:{signature}',
+            f'{payload}:{signature[:-1]}{"A" if signature[-1] != "A" else "B"}',
+            payload,
+        ):
+            self.assertFalse(verify_challenge(tampered, solve(question)))
+        # None of them used up the real token
+        self.assertTrue(verify_challenge(token, solve(question)))
+
+    def test_wrong_answer_burns_the_token(self):
+        question, token = new_challenge()
+        self.assertFalse(verify_challenge(token, str(int(solve(question)) + 1)))
+        self.assertFalse(verify_challenge(token, solve(question)))
+
+    def test_missing_or_malformed_answer(self):
+        question, token = new_challenge()
+        self.assertFalse(verify_challenge(token, ''))
+        self.assertFalse(verify_challenge('', solve(question)))
+        self.assertFalse(verify_challenge(token, 'seven'))
+
+
+class SlidingWindowLimiterTests(TestCase):
+    # Start of a window, far from the real clock so no other test shares keys
+    START = 600_000
+
+    def setUp(self):
+        self.limiter = SlidingWindowLimiter(f'test-{uuid.uuid4().hex}', limit=3, window=60)
+
+    def test_limit_within_a_window(self):
+        for second in range(3):
+            self.assertFalse(self.limiter.is_limited('203.0.113.5', self.START + second))
+            self.assertFalse(self.limiter.hit('203.0.113.5', self.START + second))
+        self.assertTrue(self.limiter.is_limited('203.0.113.5', self.START + 3))
+        self.assertTrue(self.limiter.hit('203.0.113.5', self.START + 3))
+
+        # Identities are counted apart, ignoring case
+        self.assertFalse(self.limiter.is_limited('203.0.113.6', self.START + 3))
+        self.limiter.hit('Asha@Example.com', self.START)
+        self.assertEqual(self.limiter.count('asha@example.com', self.START), 1)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        for second in range(4):
+            self.limiter.hit('203.0.113.5', self.START + second)
+
+        # 10% into the next window, 90% of the previous window still counts
+        self.assertAlmostEqual(self.limiter.count('203.0.113.5', self.START + 66), 3.6)
+        self.assertTrue(self.limiter.is_limited('203.0.113.5', self.START + 66))
+        # Halfway through, only half of it
+        self.assertAlmostEqual(self.limiter.count('203.0.113.5', self.START + 90), 2)
+        self.assertFalse(self.limiter.is_limited('203.0.113.5', self.START + 90))
+        self.assertFalse(self.limiter.hit('203.0.113.5', self.START + 90))
+        self.assertTrue(self.limiter.hit('203.0.113.5', self.START + 90))
+        # Two windows later nothing is left
+        self.assertEqual(self.limiter.count('203.0.113.5', self.START + 180), 0)
+
+    def test_reset(self):
+        for second in range(3):
+            self.limiter.hit('203.0.113.5', self.START + second)
+        self.limiter.reset('203.0.113.5', self.START + 3)
+        self.assertFalse(self.limiter.is_limited('203.0.113.5', self.START + 3))
+
+    @override_settings(THROTTLE_ENABLED=True, THROTTLE_RATES={'login-ip': (20, 300)})
+    def test_get_limiter(self):
+        limiter = get_limiter('login-ip')
+        self.assertEqual((limiter.scope, limiter.limit, limiter.window), ('login-ip', 20, 300))
+        self.assertIsNone(get_limiter('unknown'))
+        with self.settings(THROTTLE_ENABLED=False):
+            self.assertIsNone(get_limiter('login-ip'))
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_RATES={'login-ip': (2, 300)})
+class ClientAddressThrottleTests(TestCase):
+    PROXY = '127.0.0.1'
+
+    def setUp(self):
+        limiter = SlidingWindowLimiter('login-ip', 2, 300)
+        for address in ('203.0.113.5', '203.0.113.6', self.PROXY):
+            limiter.reset(address)
+
+    def login(self, forwarded_for):
+        return self.client.post(
+            reverse('events:login'),
+            {'email': 'nobody@example.com', 'password': 'wrong'},
+            REMOTE_ADDR=self.PROXY,
+            HTTP_X_FORWARDED_FOR=forwarded_for,
+        )
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_clients_behind_the_proxy_have_their_own_buckets(self):
+        self.assertEqual(self.login('203.0.113.5').status_code, 200)
+        self.assertEqual(self.login('203.0.113.5').status_code, 200)
+        self.assertEqual(self.login('203.0.113.5').status_code, 429)
+
+        # Another client is counted apart, even when it sends a forged
+        # left-most entry naming the throttled one
+        self.assertEqual(self.login('203.0.113.5, 203.0.113.6').status_code, 200)
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_loopback_peer_without_proxy_count_is_not_throttled(self):
+        for _ in range(4):
+            self.assertEqual(self.login('203.0.113.5').status_code, 200)
+        request = mock.Mock(META={'REMOTE_ADDR': '203.0.113.7'})
+        self.assertIsNotNone(get_ip_limiter('login-ip', request))
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class TunablePBKDF2PasswordHasherTests(TestCase):
+    def test_iterations_follow_the_setting(self):
+        encoded = make_password('secret-password')
+        self.assertIsInstance(identify_hasher(encoded), TunablePBKDF2PasswordHasher)
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(check_password('secret-password', encoded))
+        self.assertFalse(check_password('wrong-password', encoded))
+        self.assertFalse(get_hasher().must_update(encoded))
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertTrue(make_password('secret-password').startswith('pbkdf2_sha256$2000$'))
+            # Hashes made at the old cost still verify but need an update
+            self.assertTrue(check_password('secret-password', encoded))
+            self.assertTrue(get_hasher().must_update(encoded))
+
+    def test_login_rehashes_at_the_new_cost(self):
+        user = EventUser.objects.create_user(
+            'asha@example.com', 'secret-password', full_name='Asha Mushi', is_verified=True
+        )
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertFalse(user.check_password('wrong-password'))
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+            self.assertTrue(user.check_password('secret-password'))
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+            self.assertTrue(user.check_password('secret-password'))
+
+
+class AccountDataCountsTests(TestCase):
+    """The account deletion page counts what the deletion job removes."""
+
+    def setUp(self):
+        self.user = EventUser.objects.create_user(
+            'asha@example.com', 'secret-password', full_name='Asha Mushi', is_verified=True
+        )
+        other = EventUser.objects.create_user(
+            'juma@example.com', 'secret-password', full_name='Juma Said', is_verified=True
+        )
+        now = timezone.now()
+        Event.objects.create(name='Wedding', date=now, created_by=self.user)
+        Event.objects.create(name='Harambee', date=now, created_by=self.user)
+        Event.objects.create(name='Harambee', date=now, created_by=other)
+
+        for event_name, count in (('Wedding', 2), ('Harambee', 3)):
+            for number in range(count):
+                pledge = Pledges.objects.create(
+                    event_id=event_name, name=f'Pledger {number}', mobile_number='0712345678',
+                    pledge=Decimal('100.00'),
+                )
+                Transactions.objects.create(
+                    pledge=pledge, amount=Decimal('10.00'), method='cash',
+                    transaction_id=f'{event_name}-{number}',
+                )
+                Messages.objects.create(pledge=pledge, message='Reminder', method='sms', status='sent')
+
+        wedding_pledge = Pledges.objects.filter(event_id='Wedding').first()
+        old = Messages.objects.create(pledge=wedding_pledge, message='Old reminder', method='sms', status='sent')
+        Messages.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=120))
+        self.assertEqual(archive_messages(days=90), 1)
+
+    def test_shared_event_names_are_not_counted(self):
+        self.assertEqual(get_account_data_counts(self.user), {
+            'events_count': 2,
+            'pledges_count': 2,
+            'transactions_count': 2,
+            'messages_count': 3,
+            'shared_event_names': ['Harambee'],
+        })
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('events:delete_account'))
+        self.assertContains(response, '(2 pledges)')
+        self.assertContains(response, 'Another account also has events named Harambee.')
+
+    def test_confirmation_email_names_kept_pledges(self):
+        job = AccountDeletionJob.objects.create(
+            user=self.user, user_email=self.user.email, user_name=self.user.full_name, status='running',
+        )
+        run_account_deletion(job)
+
+        self.assertEqual(Pledges.objects.filter(event_id='Harambee').count(), 3)
+        self.assertFalse(Pledges.objects.filter(event_id='Wedding').exists())
+        email = OutboundEmail.objects.get(recipients=['asha@example.com'])
+        self.assertIn('Pledges recorded under Harambee were kept', email.body)
+        self.assertNotIn('All your personal data', email.body)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Table partitioning needs PostgreSQL')
+class PartitioningTests(TransactionTestCase):
+    """
+    Converting messages and transactions to partitioned tables. Each test
+    converts its table once; it stays partitioned for the rest of the run.
+    """
+
+    def setUp(self):
+        self.pledge = Pledges.objects.create(
+            event_id='Harambee', name='Asha Mushi', mobile_number='0712345678', pledge=Decimal('1000.00')
+        )
+        # Falls in a month that is detached with retain_months=3
+        self.old = timezone.now() - timedelta(days=200)
+
+    def add_transaction(self, transaction_id, created_at=None):
+        payment = Transactions.objects.create(
+            pledge=self.pledge, amount=Decimal('10.00'), method='cash', transaction_id=transaction_id
+        )
+        if created_at:
+            Transactions.objects.filter(pk=payment.pk).update(created_at=created_at)
+        return payment
+
+    def add_message(self, provider_message_id='', created_at=None):
+        message = Messages.objects.create(
+            pledge=self.pledge, message='Reminder', method='whatsapp', status='sent',
+            provider_message_id=provider_message_id,
+        )
+        if created_at:
+            Messages.objects.filter(pk=message.pk).update(created_at=created_at)
+        return message
+
+    def assertDuplicate(self, create, *args):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            create(*args)
+
+    def test_transactions_convert_resume_and_detach(self):
+        for number in range(5):
+            self.add_transaction(f'TX-{number}', created_at=self.old if number < 2 else None)
+
+        with mock.patch.dict(UNIQUE_GUARDS, {'transactions': []}):
+            with self.assertRaisesMessage(RuntimeError, 'has no guard'):
+                convert_table('transactions')
+        with connection.cursor() as cursor:
+            self.assertFalse(is_partitioned(cursor, 'transactions'))
+
+        def interrupt(copied):
+            raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            convert_table('transactions', batch_size=2, progress=interrupt)
+        self.assertEqual(Transactions.objects.count(), 2)
+
+        # Keys of rows not copied yet are already taken
+        self.assertDuplicate(self.add_transaction, 'TX-4')
+        self.add_transaction('TX-5')
+
+        self.assertEqual(convert_table('transactions', batch_size=2), 3)
+        self.assertEqual(Transactions.objects.count(), 6)
+        with connection.cursor() as cursor:
+            self.assertTrue(is_partitioned(cursor, 'transactions'))
+            cursor.execute("SELECT to_regclass('transactions_unpartitioned')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+        self.assertDuplicate(self.add_transaction, 'TX-0')
+        self.assertDuplicate(self.add_transaction, 'TX-5')
+
+        # Changing a key releases the old one
+        Transactions.objects.filter(transaction_id='TX-3').update(transaction_id='TX-3b')
+        self.add_transaction('TX-3')
+        self.assertDuplicate(
+            lambda: Transactions.objects.filter(transaction_id='TX-3').update(transaction_id='TX-2')
+        )
+
+        # Deleting a row releases its key
+        Transactions.objects.filter(transaction_id='TX-2').delete()
+        self.add_transaction('TX-2')
+
+        detached = detach_old_partitions('transactions', retain_months=3, drop=True)
+        self.assertIn(partition_name('transactions', month_start(self.old)), detached)
+        self.assertFalse(Transactions.objects.filter(transaction_id__in=['TX-0', 'TX-1']).exists())
+        self.add_transaction('TX-0')
+
+    def test_messages_convert_and_move_default_rows(self):
+        self.add_message('wamid.A', created_at=self.old)
+        self.add_message('wamid.B')
+        self.add_message()
+        self.add_message()
+
+        self.assertEqual(convert_table('messages', batch_size=3), 4)
+
+        # Messages without a provider id are not part of the key
+        self.add_message()
+        self.assertDuplicate(self.add_message, 'wamid.A')
+        self.assertDuplicate(self.add_message, 'wamid.B')
+
+        # A row past the last partition lands in the default partition and
+        # keeps its key when it is moved into its month's new partition
+        later = timezone.now() + timedelta(days=31 * 6)
+        self.add_message('wamid.C', created_at=later)
+        ensure_partitions('messages', months_ahead=7)
+        with connection.cursor() as cursor:
+            self.assertIn(partition_name('messages', month_start(later)), list_partitions(cursor, 'messages'))
+            cursor.execute('SELECT COUNT(*) FROM messages_default')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertDuplicate(self.add_message, 'wamid.C')
+
+        with connection.cursor() as cursor:
+            attached = set(list_partitions(cursor, 'messages'))
+        call_command('manage_partitions', table=['messages'], retain_months=3, stdout=StringIO())
+        with connection.cursor() as cursor:
+            detached = attached - set(list_partitions(cursor, 'messages'))
+            old_partition = partition_name('messages', month_start(self.old))
+            self.assertIn(old_partition, detached)
+            cursor.execute(f'SELECT provider_message_id FROM {old_partition}')
+            self.assertEqual(cursor.fetchall(), [('wamid.A',)])
+            for name in detached:
+                cursor.execute(f'DROP TABLE {name}')
+
+        # The detached rows are released and no longer counted
+        self.add_message('wamid.A')
+        self.assertEqual(stored_message_counters(), compute_message_counters())
@@ -0,0 +1,142 @@
+"""
+Attempt limiting for anonymous endpoints (login, registration).
+
+Counts are kept in the shared cache as sliding-window counters: each key
+has a counter per fixed window, and the rate is estimated as the current
+window's count plus the previous window's count weighted by how much of it
+still overlaps the sliding window. Two cache keys per identity, no lists of
+timestamps, and the estimate never lets through more than the limit by a
+meaningful amount at window boundaries.
+
+Checks are cheap (one get_many), so views run them before any password
+hashing or database work.
+"""
+
+import hashlib
+import ipaddress
+import logging
+import time
+
+from django.conf import settings
+
+from .cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowLimiter:
+    """
+    Allow at most ``limit`` hits per ``window`` seconds for each identity.
+
+        limiter = SlidingWindowLimiter('login-ip', limit=20, window=300)
+        if limiter.is_limited(ip):
+            ...reject...
+        limiter.hit(ip)
+    """
+
+    def __init__(self, scope, limit, window):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+
+    def _keys(self, identity, now):
+        digest = hashlib.sha1(str(identity).lower().encode('utf-8')).hexdigest()
+        current = int(now // self.window)
+        return (
+            f'events:throttle:{self.scope}:{digest}:{current}',
+            f'events:throttle:{self.scope}:{digest}:{current - 1}',
+        )
+
+    def count(self, identity, now=None):
+        """Estimated number of hits in the last ``window`` seconds."""
+        now = time.time() if now is None else now
+        current_key, previous_key = self._keys(identity, now)
+        counts = get_cache().get_many([current_key, previous_key])
+        elapsed = (now % self.window) / self.window
+        return counts.get(current_key, 0) + counts.get(previous_key, 0) * (1 - elapsed)
+
+    def is_limited(self, identity, now=None):
+        return self.count(identity, now) >= self.limit
+
+    def hit(self, identity, now=None):
+        """Record a hit; returns True if it goes over the limit (the first ``limit`` pass)."""
+        now = time.time() if now is None else now
+        current_key, _ = self._keys(identity, now)
+        cache = get_cache()
+        # Keep the counter while it can still count as the previous window
+        cache.add(current_key, 0, self.window * 2)
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(current_key, 1, self.window * 2)
+        return self.count(identity, now) > self.limit
+
+    def reset(self, identity, now=None):
+        now = time.time() if now is None else now
+        get_cache().delete_many(list(self._keys(identity, now)))
+
+    def retry_after(self):
+        """Seconds a client should wait before trying again (upper bound)."""
+        return self.window
+
+
+def get_limiter(name):
+    """
+    Build the limiter configured in settings.THROTTLE_RATES.
+
+    THROTTLE_RATES maps names to (limit, window seconds), e.g.
+    {'login-ip': (20, 300)}. Returns None when the name is not configured or
+    THROTTLE_ENABLED is False.
+    """
+    if not getattr(settings, 'THROTTLE_ENABLED', True):
+        return None
+    rate = getattr(settings, 'THROTTLE_RATES', {}).get(name)
+    if rate is None:
+        return None
+    limit, window = rate
+    return SlidingWindowLimiter(name, limit, window)
+
+
+def get_ip_limiter(name, request):
+    """
+    Build a per-address limiter for ``request``, or None when it cannot work.
+
+    With TRUSTED_PROXY_COUNT unset, a loopback peer is the local reverse proxy
+    and every visitor would share its one bucket, so the check is skipped
+    (and logged) instead of locking everyone out together.
+    """
+    limiter = get_limiter(name)
+    if limiter is None or getattr(settings, 'TRUSTED_PROXY_COUNT', 0):
+        return limiter
+    try:
+        loopback = ipaddress.ip_address(request.META.get('REMOTE_ADDR', '')).is_loopback
+    except ValueError:
+        loopback = False
+    if loopback:
+        logger.warning(
+            f"Skipping {name} throttle: request came from a local proxy and "
+            f"TRUSTED_PROXY_COUNT is not set"
+        )
+        return None
+    return limiter
+
+
+def get_client_ip(request):
+    """
+    Client address of a request.
+
+    Behind TRUSTED_PROXY_COUNT reverse proxies the address is taken from
+    X-Forwarded-For, counting that many entries from the right, so clients
+    cannot pick their own address by sending the header themselves.
+    """
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [
+            address.strip()
+            for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+            if address.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
@@ -47,6 +47,8 @@ urlpatterns = [
     # Messages URLs
     path('messages/', views.message_list, name='message_list'),
     path('messages/create/', views.message_create, name='message_create'),
+    path('messages/archive/', views.message_archive, name='message_archive'),
+    path('messages/stream/', views.message_status_stream, name='message_status_stream'),
     path('pledges/<int:pledge_id>/messages/', views.pledge_messages, name='pledge_messages'),
     path('messages/<int:message_id>/', views.message_detail, name='message_detail'),
     
@@ -66,12 +68,16 @@ urlpatterns = [
     
     # API endpoints
     path('api/pledges/', views.api_pledges, name='api_pledges'),
+    path('api/pledges/search/', views.api_pledge_search, name='api_pledge_search'),
     path('api/transactions/', views.api_transactions, name='api_transactions'),
     path('api/messages/', views.api_messages, name='api_messages'),
     path('api/templates/', views.api_templates, name='api_templates'),
     path('api/dashboard-stats/', views.dashboard_stats, name='dashboard_stats'),
     path('api/message-queue-status/', views.message_queue_status, name='message_queue_status'),
     
+    # Provider webhooks
+    path('webhooks/whatsapp/', views.whatsapp_webhook, name='whatsapp_webhook'),
+    
     # Event selection
     path('set-selected-event/', views.set_selected_event, name='set_selected_event'),
 ]
\ No newline at end of file
@@ -1,49 +1,43 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.template.loader import render_to_string
 from django.core.paginator import Paginator
 from django.db import transaction
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
+import hashlib
+import hmac
 import json
-from .models import Pledges, Transactions, Messages, MessageTemplate, RegistrationRequest, Event, EventUser
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from .models import Pledges, Transactions, Messages, MessageArchive, MessageTemplate, RegistrationRequest, Event, EventUser, DeliveryStatusEvent, normalize_phone_number
 from .forms import PledgeForm, TransactionForm, MessageForm, PledgeSearchForm, TransactionSearchForm, MessageTemplateForm
 from django.db.models import Sum, Q, Count, F
-from .tasks import send_bulk_messages_background, send_message_background
+from django.db.models.functions import TruncDate
+from .tasks import send_bulk_messages_background, send_message_background, group_pledges_by_contact, process_delivery_statuses_background, queue_email, request_account_deletion, deletable_event_names
+from .context_processors import get_base_context, set_session_value
+from .filters import filter_date_range
+from .maintenance import maybe_run_maintenance
+from .throttle import get_client_ip, get_ip_limiter, get_limiter
+from .captcha import challenge_context, verify_challenge
+from .queue_stats import aget_message_queue_stats
+from .streams import message_status_events
+from . import cache
 
 
-def get_base_context(request):
-    """
-    Get base context for all views including events and selected event
-    """
-    context = {}
-    if request.user.is_authenticated:
-        # Get user's events
-        events = Event.objects.filter(created_by=request.user, is_active=True).order_by('-date', 'name')
-        context['events'] = events
-        
-        # Get selected event
-        selected_event_id = request.session.get('selected_event_id')
-        selected_event = None
-        
-        if selected_event_id:
-            try:
-                selected_event = Event.objects.get(id=selected_event_id, created_by=request.user, is_active=True)
-            except Event.DoesNotExist:
-                # Clear invalid event from session
-                request.session.pop('selected_event_id', None)
-        
-        # If no selected event and user has events, select the first one
-        if not selected_event and events.exists():
-            selected_event = events.first()
-            request.session['selected_event_id'] = selected_event.id
-        
-        context['selected_event'] = selected_event
-    
-    return context
+# Global dashboard statistics are refreshed at most this often, in seconds
+DASHBOARD_STATS_CACHE_TIMEOUT = 30
+
+# Static landing page fragments are re-rendered this often, in seconds
+LANDING_FRAGMENT_CACHE_TIMEOUT = 300
+
+# Per-event transaction and message counts are refreshed this often, in seconds
+EVENT_RECORD_COUNTS_CACHE_TIMEOUT = 300
 
 
 # Home page - requires login
@@ -68,16 +62,25 @@ def pledge_list(request):
     else:
         pledges = Pledges.objects.filter(event_id__in=user_event_names).order_by('-created_at')
     
-    # Search functionality
+    # Search functionality - phone numbers use the normalized phone index
     search_query = request.GET.get('search')
     if search_query:
-        pledges = pledges.filter(name__icontains=search_query)
+        if search_query.strip().lstrip('+').replace(' ', '').isdigit():
+            pledges = pledges.filter(phone_e164=normalize_phone_number(search_query))
+        else:
+            pledges = pledges.filter(name__icontains=search_query)
     
     # Filter by status
     status_filter = request.GET.get('status')
     if status_filter:
         pledges = pledges.filter(status=status_filter)
     
+    # Filter by date range
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    if date_from or date_to:
+        pledges = filter_date_range(pledges, 'created_at', date_from, date_to)
+    
     # Pagination
     paginator = Paginator(pledges, 25)
     page_number = request.GET.get('page')
@@ -219,6 +222,53 @@ def pledge_delete(request, pledge_id):
 
 
 # Transaction Views
+def get_transaction_summary(transactions):
+    """
+    Totals for a filtered transaction queryset.
+    
+    The grand total, row count and per-method breakdown come from one
+    aggregate query; the per-day histogram from one grouped query.
+    """
+    transactions = transactions.order_by()
+    
+    aggregates = {
+        'count': Count('id'),
+        'total': Sum('amount'),
+    }
+    for method, _ in Transactions.PAYMENT_METHODS:
+        aggregates[f'{method}_count'] = Count('id', filter=Q(method=method))
+        aggregates[f'{method}_total'] = Sum('amount', filter=Q(method=method))
+    totals = transactions.aggregate(**aggregates)
+    
+    by_method = [
+        {
+            'method': method,
+            'label': label,
+            'count': totals[f'{method}_count'],
+            'total': totals[f'{method}_total'] or 0,
+        }
+        for method, label in Transactions.PAYMENT_METHODS
+        if totals[f'{method}_count']
+    ]
+    
+    by_day = list(
+        transactions.annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(count=Count('id'), total=Sum('amount'))
+        .order_by('day')
+    )
+    max_day_total = max((day['total'] for day in by_day), default=0)
+    for day in by_day:
+        day['percent'] = int(day['total'] * 100 / max_day_total) if max_day_total else 0
+    
+    return {
+        'count': totals['count'],
+        'total': totals['total'] or 0,
+        'by_method': by_method,
+        'by_day': by_day,
+    }
+
+
 @login_required
 def transaction_list(request):
     # Get base context (events and selected event)
@@ -252,11 +302,8 @@ def transaction_list(request):
     if method_filter:
         transactions = transactions.filter(method=method_filter)
     
-    if date_from:
-        transactions = transactions.filter(created_at__date__gte=date_from)
-    
-    if date_to:
-        transactions = transactions.filter(created_at__date__lte=date_to)
+    if date_from or date_to:
+        transactions = filter_date_range(transactions, 'created_at', date_from, date_to)
     
     # Also handle the search form if it's valid (for backward compatibility)
     if search_form.is_valid():
@@ -271,25 +318,24 @@ def transaction_list(request):
         if form_method_filter and not method_filter:  # Only apply if not already filtered
             transactions = transactions.filter(method=form_method_filter)
     
-    # Pagination
-    paginator = Paginator(transactions, 25)
+    # Totals over the whole filtered set, computed in the database
+    summary = get_transaction_summary(transactions)
+    
+    # Pagination - only load the columns the table shows
+    paginator = Paginator(
+        transactions.only('id', 'transaction_id', 'amount', 'created_at', 'pledge__id', 'pledge__name'),
+        25
+    )
+    # The summary already counted the rows; reuse it instead of a COUNT query
+    paginator.count = summary['count']
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Calculate total amount for current page
-    total_amount = sum(transaction.amount for transaction in page_obj.object_list)
-    
-    # Get pledges for the transaction modal selector (filtered by user's events)
-    if selected_event:
-        all_pledges = Pledges.objects.filter(event_id=selected_event.name).order_by('name')
-    else:
-        all_pledges = Pledges.objects.filter(event_id__in=user_event_names).order_by('name')
-    
     context.update({
         'page_obj': page_obj,
         'search_form': search_form,
-        'all_pledges': all_pledges,
-        'total_amount': total_amount,
+        'total_amount': summary['total'],
+        'transaction_summary': summary,
     })
     return render(request, 'events/transaction_list.html', context)
 
@@ -298,6 +344,7 @@ def transaction_list(request):
 def transaction_create(request):
     pledge_id = request.GET.get('pledge_id')
     is_modal = request.GET.get('modal') == '1'
+    user_event_names = [event.name for event in get_base_context(request).get('events', [])]
     
     if request.method == 'POST':
         # Also check for pledge_id in POST data (hidden field)
@@ -307,7 +354,7 @@ def transaction_create(request):
         
 
         
-        form = TransactionForm(request.POST, pledge_id=pledge_id)
+        form = TransactionForm(request.POST, pledge_id=pledge_id, event_names=user_event_names)
         if form.is_valid():
             with transaction.atomic():
                 new_transaction = form.save()
@@ -364,7 +411,7 @@ def transaction_create(request):
             else:
                 messages.error(request, 'Please correct the errors below.')
     else:
-        form = TransactionForm(pledge_id=pledge_id)
+        form = TransactionForm(pledge_id=pledge_id, event_names=user_event_names)
     
     context = {
         'form': form,
@@ -432,23 +479,111 @@ def message_list(request):
     if message_content:
         messages_list = messages_list.filter(message__icontains=message_content)
     
+    # Filter by date range
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    if date_from or date_to:
+        messages_list = filter_date_range(messages_list, 'created_at', date_from, date_to)
+    
+    from django.utils import timezone
+    
     paginator = Paginator(messages_list, 25)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
     context.update({
         'page_obj': page_obj,
+        # Live status updates start from the time the page was rendered
+        'stream_since': timezone.now().isoformat(),
     })
     return render(request, 'events/message_list.html', context)
 
 
+@login_required
+async def message_status_stream(request):
+    """
+    Server-sent events with the status changes of the selected event's
+    messages (all of the user's events when none is selected), see
+    events.streams.
+    
+    Under ASGI the response stays open and pushes changes as they happen;
+    under WSGI it answers with one check and the browser polls instead.
+    """
+    context = await sync_to_async(get_base_context)(request)
+    selected_event = context.get('selected_event')
+    if selected_event:
+        event_names = [selected_event.name]
+    else:
+        event_names = [event.name for event in context.get('events') or []]
+    since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(
+            message_status_events(event_names, since), content_type='text/event-stream'
+        )
+    else:
+        body = [chunk async for chunk in message_status_events(event_names, since, max_age=0)]
+        response = HttpResponse(''.join(body), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def message_archive(request):
+    """
+    Search archived messages (see MessageArchive).
+    
+    Message texts are stored compressed, so the archive is searched by
+    recipient, method, status and date only.
+    """
+    context = get_base_context(request)
+    selected_event = context.get('selected_event')
+    user_events = context.get('events')
+    user_event_names = [event.name for event in user_events] if user_events else []
+    
+    # Filter by selected event or all user events
+    if selected_event:
+        archived_list = MessageArchive.objects.select_related('pledge').filter(event_id=selected_event.name)
+    else:
+        archived_list = MessageArchive.objects.select_related('pledge').filter(event_id__in=user_event_names)
+    archived_list = archived_list.order_by('-created_at')
+    
+    search_query = request.GET.get('search')
+    if search_query:
+        archived_list = archived_list.filter(pledge__name__icontains=search_query)
+    
+    method_filter = request.GET.get('method')
+    if method_filter:
+        archived_list = archived_list.filter(method=method_filter)
+    
+    status_filter = request.GET.get('status')
+    if status_filter:
+        archived_list = archived_list.filter(status=status_filter)
+    
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    if date_from or date_to:
+        archived_list = filter_date_range(archived_list, 'created_at', date_from, date_to)
+    
+    paginator = Paginator(archived_list, 25)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    context.update({
+        'page_obj': page_obj,
+        'archive_after_days': getattr(settings, 'MESSAGE_ARCHIVE_AFTER_DAYS', 90),
+    })
+    return render(request, 'events/message_archive.html', context)
+
+
 @login_required
 def message_create(request):
     pledge_id = request.GET.get('pledge_id')
     is_modal = request.GET.get('modal') == '1'
+    user_event_names = [event.name for event in get_base_context(request).get('events', [])]
     
     if request.method == 'POST':
-        form = MessageForm(request.POST, pledge_id=pledge_id)
+        form = MessageForm(request.POST, pledge_id=pledge_id, event_names=user_event_names)
         if form.is_valid():
             message = form.save(commit=False)
             message.status = 'queued'  # Set initial status as queued
@@ -479,7 +614,7 @@ def message_create(request):
             else:
                 messages.error(request, 'Please correct the errors below.')
     else:
-        form = MessageForm(pledge_id=pledge_id)
+        form = MessageForm(pledge_id=pledge_id, event_names=user_event_names)
     
     context = {
         'form': form,
@@ -514,48 +649,87 @@ def pledge_messages(request, pledge_id):
 
 
 # API Views (for future use)
+# The JSON endpoints are async views: under the ASGI application a request
+# waiting on the database or cache does not hold a worker.
 @login_required
-def api_pledges(request):
-    pledges = Pledges.objects.all()
+async def api_pledges(request):
     data = []
-    for pledge in pledges:
+    async for pledge in Pledges.objects.values('id', 'name', 'event_id', 'pledge', 'amount_paid', 'status'):
         data.append({
-            'id': pledge.id,
-            'name': pledge.name,
-            'event_id': pledge.event_id,
-            'pledge': str(pledge.pledge),
-            'amount_paid': str(pledge.amount_paid),
-            'status': pledge.status,
+            'id': pledge['id'],
+            'name': pledge['name'],
+            'event_id': pledge['event_id'],
+            'pledge': str(pledge['pledge']),
+            'amount_paid': str(pledge['amount_paid']),
+            'status': pledge['status'],
         })
     return JsonResponse({'pledges': data})
 
 
+# Maximum number of results returned by the pledge search endpoint
+PLEDGE_SEARCH_LIMIT = 20
+
+
 @login_required
-def api_transactions(request):
-    transactions = Transactions.objects.all()
+async def api_pledge_search(request):
+    """
+    Typeahead search over the pledges of the selected event.
+
+    Matches a name prefix, or a phone number prefix when the query is numeric,
+    so both lookups stay on an (event_id, ...) index.
+    """
+    context = await sync_to_async(get_base_context)(request)
+    selected_event = context.get('selected_event')
+    query = request.GET.get('q', '').strip()
+
+    if not selected_event or not query:
+        return JsonResponse({'results': []})
+
+    pledges = Pledges.objects.filter(event_id=selected_event.name)
+    if query.lstrip('+').replace(' ', '').isdigit():
+        pledges = pledges.filter(phone_e164__startswith=normalize_phone_number(query))
+    else:
+        pledges = pledges.filter(name__istartswith=query)
+
+    results = [
+        {
+            'id': pledge['id'],
+            'name': pledge['name'],
+            'mobile_number': pledge['mobile_number'],
+            'pledge': str(pledge['pledge']),
+            'amount_paid': str(pledge['amount_paid']),
+        }
+        async for pledge in pledges.order_by('name').values(
+            'id', 'name', 'mobile_number', 'pledge', 'amount_paid'
+        )[:PLEDGE_SEARCH_LIMIT]
+    ]
+    return JsonResponse({'results': results})
+
+
+@login_required
+async def api_transactions(request):
     data = []
-    for transaction in transactions:
+    async for transaction in Transactions.objects.values('id', 'pledge_id', 'amount', 'method', 'transaction_id'):
         data.append({
-            'id': transaction.id,
-            'pledge_id': transaction.pledge.id,
-            'amount': str(transaction.amount),
-            'method': transaction.method,
-            'transaction_id': transaction.transaction_id,
+            'id': transaction['id'],
+            'pledge_id': transaction['pledge_id'],
+            'amount': str(transaction['amount']),
+            'method': transaction['method'],
+            'transaction_id': transaction['transaction_id'],
         })
     return JsonResponse({'transactions': data})
 
 
 @login_required
-def api_messages(request):
-    messages_list = Messages.objects.all()
+async def api_messages(request):
     data = []
-    for message in messages_list:
+    async for message in Messages.objects.values('id', 'pledge_id', 'method', 'status', 'created_at'):
         data.append({
-            'id': message.id,
-            'pledge_id': message.pledge.id,
-            'method': message.method,
-            'status': message.status,
-            'created_at': message.created_at.isoformat(),
+            'id': message['id'],
+            'pledge_id': message['pledge_id'],
+            'method': message['method'],
+            'status': message['status'],
+            'created_at': message['created_at'].isoformat(),
         })
     return JsonResponse({'messages': data})
 
@@ -608,27 +782,38 @@ def pledge_whatsapp_status_update(request, pledge_id):
 
 
 @login_required
-def dashboard_stats(request):
+async def dashboard_stats(request):
     """API endpoint for dashboard statistics"""
-    stats = {
-        'total_pledges': Pledges.objects.count(),
-        'total_amount_pledged': float(Pledges.objects.aggregate(Sum('pledge'))['pledge__sum'] or 0),
-        'total_amount_paid': float(Pledges.objects.aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0),
-        'pending_pledges': Pledges.objects.filter(status__in=['new', 'pending', 'partial']).count(),
-        'completed_pledges': Pledges.objects.filter(status='completed').count(),
-        'cancelled_pledges': Pledges.objects.filter(status='cancelled').count(),
-        'total_transactions': Transactions.objects.count(),
-        'total_messages': Messages.objects.count(),
-    }
-    
-    # Calculate completion percentage
-    if stats['total_amount_pledged'] > 0:
-        stats['completion_percentage'] = round(
-            (stats['total_amount_paid'] / stats['total_amount_pledged']) * 100, 2
+    async def compute():
+        pledge_stats = await Pledges.objects.aaggregate(
+            total_pledges=Count('id'),
+            total_amount_pledged=Sum('pledge'),
+            total_amount_paid=Sum('amount_paid'),
+            pending_pledges=Count('id', filter=Q(status__in=['new', 'pending', 'partial'])),
+            completed_pledges=Count('id', filter=Q(status='completed')),
+            cancelled_pledges=Count('id', filter=Q(status='cancelled')),
         )
-    else:
-        stats['completion_percentage'] = 0
+        stats = {
+            'total_pledges': pledge_stats['total_pledges'],
+            'total_amount_pledged': float(pledge_stats['total_amount_pledged'] or 0),
+            'total_amount_paid': float(pledge_stats['total_amount_paid'] or 0),
+            'pending_pledges': pledge_stats['pending_pledges'],
+            'completed_pledges': pledge_stats['completed_pledges'],
+            'cancelled_pledges': pledge_stats['cancelled_pledges'],
+            'total_transactions': await Transactions.objects.acount(),
+            'total_messages': (await aget_message_queue_stats())['total_messages'],
+        }
+        
+        # Calculate completion percentage
+        if stats['total_amount_pledged'] > 0:
+            stats['completion_percentage'] = round(
+                (stats['total_amount_paid'] / stats['total_amount_pledged']) * 100, 2
+            )
+        else:
+            stats['completion_percentage'] = 0
+        return stats
     
+    stats = await cache.aget_or_compute('dashboard_stats', compute, timeout=DASHBOARD_STATS_CACHE_TIMEOUT)
     return JsonResponse(stats)
 
 
@@ -671,12 +856,16 @@ def export_pledges_csv(request):
 @login_required
 def bulk_reminder_send(request):
     """View to send bulk reminders with automatic processing"""
+    # Only the pledges of the user's own events
+    user_event_names = [event.name for event in get_base_context(request).get('events', [])]
+    user_pledges = Pledges.objects.filter(event_id__in=user_event_names)
+    
     if request.method == 'POST':
         action = request.POST.get('action')
         if action == 'auto_process':
             # Process pledges according to the specified logic
-            new_pledges = Pledges.objects.filter(status='new')
-            pending_pledges = Pledges.objects.filter(status='pending')
+            new_pledges = user_pledges.filter(status='new')
+            pending_pledges = user_pledges.filter(status='pending')
             
             created_messages = []
             message_ids = []
@@ -685,7 +874,7 @@ def bulk_reminder_send(request):
             
             # Process NEW pledges - send message using new template
             try:
-                new_template = MessageTemplate.objects.filter(type='new_pledge', is_active=True).first()
+                new_template = MessageTemplate.get_active('new_pledge')
                 if new_template and new_pledges.exists():
                     for pledge in new_pledges:
                         # Determine sending method based on WhatsApp status
@@ -711,6 +900,8 @@ def bulk_reminder_send(request):
             processed_new_ids = [p.id for p in processed_new_pledges]
             pending_pledges_to_process = pending_pledges.exclude(id__in=processed_new_ids)
             
+            reminder_pledges = []
+            
             for pledge in pending_pledges_to_process:
                 # Determine sending method based on WhatsApp status
                 send_method = 'whatsapp' if pledge.whatsapp_status else 'sms'
@@ -718,7 +909,7 @@ def bulk_reminder_send(request):
                 if pledge.balance() == 0:
                     # If balance is zero, send completed message and mark as completed
                     try:
-                        completed_template = MessageTemplate.objects.filter(type='pledge_completed', is_active=True).first()
+                        completed_template = MessageTemplate.get_active('pledge_completed')
                         if completed_template:
                             message = Messages.objects.create(
                                 pledge=pledge,
@@ -736,20 +927,29 @@ def bulk_reminder_send(request):
                     pledge.save()
                     completed_pledges.append(pledge)
                 else:
-                    # Send reminder message using reminder template
-                    try:
-                        reminder_template = MessageTemplate.objects.filter(type='reminder', is_active=True).first()
-                        if reminder_template:
-                            message = Messages.objects.create(
-                                pledge=pledge,
-                                message=reminder_template.get_formatted_message(pledge),
-                                method=send_method,
-                                status='queued'
-                            )
+                    reminder_pledges.append(pledge)
+            
+            # Send reminders using reminder template - one message per contact,
+            # covering all of that contact's outstanding pledges. It is recorded
+            # on each pledge it covers; send_queued_messages sends it once.
+            if reminder_pledges:
+                reminder_template = MessageTemplate.get_active('reminder')
+                if reminder_template:
+                    for contact_pledges in group_pledges_by_contact(reminder_pledges):
+                        send_method = 'whatsapp' if any(p.whatsapp_status for p in contact_pledges) else 'sms'
+                        try:
+                            reminder_text = reminder_template.get_combined_message(contact_pledges)
+                            for pledge in contact_pledges:
+                                message = Messages.objects.create(
+                                    pledge=pledge,
+                                    message=reminder_text,
+                                    method=send_method,
+                                    status='queued'
+                                )
+                                message_ids.append(message.id)
                             created_messages.append(message)
-                            message_ids.append(message.id)
-                    except Exception as e:
-                        messages.error(request, f'Error processing reminder for {pledge.name}: {str(e)}')
+                        except Exception as e:
+                            messages.error(request, f'Error processing reminder for {contact_pledges[0].name}: {str(e)}')
             
             # Start background processing for messages
             if message_ids:
@@ -780,19 +980,19 @@ def bulk_reminder_send(request):
             created_messages = []
             message_ids = []
             
-            for pledge_id in pledge_ids:
-                try:
-                    pledge = Pledges.objects.get(id=pledge_id)
+            # Recorded on every selected pledge; send_queued_messages sends the
+            # text once per contact, even if they have several pledges
+            selected_pledges = user_pledges.filter(id__in=pledge_ids).order_by('id')
+            for contact_pledges in group_pledges_by_contact(selected_pledges):
+                for pledge in contact_pledges:
                     message = Messages.objects.create(
                         pledge=pledge,
                         message=message_text,
                         method=method,
                         status='queued'
                     )
-                    created_messages.append(message)
                     message_ids.append(message.id)
-                except Pledges.DoesNotExist:
-                    continue
+                created_messages.append(message)
             
             if message_ids:
                 send_bulk_messages_background(message_ids)
@@ -805,15 +1005,15 @@ def bulk_reminder_send(request):
             messages.error(request, 'Please fill in all required fields.')
     
     # Get statistics for display
-    new_count = Pledges.objects.filter(status='new').count()
-    pending_count = Pledges.objects.filter(status='pending').count()
-    pending_zero_balance = Pledges.objects.filter(status='pending', amount_paid__gte=F('pledge')).count()
+    new_count = user_pledges.filter(status='new').count()
+    pending_count = user_pledges.filter(status='pending').count()
+    pending_zero_balance = user_pledges.filter(status='pending', amount_paid__gte=F('pledge')).count()
     pending_with_balance = pending_count - pending_zero_balance
     
     # Get sample messages for display
-    new_template = MessageTemplate.objects.filter(type='new_pledge', is_active=True).first()
-    reminder_template = MessageTemplate.objects.filter(type='reminder', is_active=True).first()
-    completed_template = MessageTemplate.objects.filter(type='pledge_completed', is_active=True).first()
+    new_template = MessageTemplate.get_active('new_pledge')
+    reminder_template = MessageTemplate.get_active('reminder')
+    completed_template = MessageTemplate.get_active('pledge_completed')
     
     new_sample_message = new_template.preview() if new_template else "Welcome! Thank you for your pledge of {pledge_amount}. We appreciate your commitment to {event_id}."
     reminder_sample_message = reminder_template.preview() if reminder_template else "Hello {name}, this is a reminder about your pending pledge balance of {balance} for {event_id}. Please complete your payment when convenient."
@@ -832,36 +1032,102 @@ def bulk_reminder_send(request):
 
 
 @login_required
-def message_queue_status(request):
-    """API endpoint to check message queue status"""
-    status_counts = Messages.objects.values('status').annotate(count=Count('id'))
-    
-    # Convert to dictionary for easier handling
-    status_dict = {item['status']: item['count'] for item in status_counts}
-    
-    # Ensure all statuses are represented
-    all_statuses = ['queued', 'pending', 'sent', 'delivered', 'failed', 'read']
-    for status in all_statuses:
-        if status not in status_dict:
-            status_dict[status] = 0
+async def message_queue_status(request):
+    """
+    API endpoint to check message queue status
     
-    # Get recent activity (last 24 hours)
-    from datetime import timedelta
+    Served from the message queue counters (see events.queue_stats), so a
+    poll costs one small primary key lookup whatever the number of messages.
+    """
     from django.utils import timezone
     
-    recent_messages = Messages.objects.filter(
-        created_at__gte=timezone.now() - timedelta(hours=24)
-    ).count()
-    
+    stats = await aget_message_queue_stats()
     return JsonResponse({
         'status': 'success',
-        'queue_status': status_dict,
-        'total_messages': sum(status_dict.values()),
-        'recent_activity_24h': recent_messages,
+        'queue_status': stats['queue_status'],
+        'total_messages': stats['total_messages'],
+        'recent_activity_24h': stats['recent_activity_24h'],
         'last_updated': timezone.now().isoformat()
     })
 
 
+def verify_webhook_signature(body, signature_header, secret):
+    """Check a Meta style 'sha256=<hex>' HMAC signature of the raw request body."""
+    if not secret or not signature_header or not signature_header.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header[len('sha256='):])
+
+
+@csrf_exempt
+def whatsapp_webhook(request):
+    """
+    WhatsApp Cloud API webhook.
+    
+    GET answers the subscription handshake. POST verifies the payload
+    signature, stores the delivery status callbacks it contains and returns
+    immediately; they are applied to messages in batches by a background
+    worker (or the process_delivery_statuses command).
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    
+    if request.method == 'GET':
+        verify_token = settings.WHATSAPP_WEBHOOK_VERIFY_TOKEN
+        if (
+            verify_token
+            and request.GET.get('hub.mode') == 'subscribe'
+            and hmac.compare_digest(request.GET.get('hub.verify_token', ''), verify_token)
+        ):
+            return HttpResponse(request.GET.get('hub.challenge', ''), content_type='text/plain')
+        return HttpResponse('Verification failed', status=403)
+    
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+    
+    if not verify_webhook_signature(
+        request.body,
+        request.headers.get('X-Hub-Signature-256', ''),
+        settings.WHATSAPP_APP_SECRET,
+    ):
+        logger.warning("Rejected WhatsApp webhook with missing or invalid signature")
+        return HttpResponse('Invalid signature', status=403)
+    
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return HttpResponse('Invalid JSON', status=400)
+    if not isinstance(payload, dict):
+        return HttpResponse('Invalid payload', status=400)
+    
+    status_events = []
+    for entry in payload.get('entry', []):
+        for change in entry.get('changes', []):
+            for status in change.get('value', {}).get('statuses', []):
+                if not status.get('id') or not status.get('status'):
+                    continue
+                reported_at = None
+                if str(status.get('timestamp', '')).isdigit():
+                    reported_at = datetime.fromtimestamp(int(status['timestamp']), tz=dt_timezone.utc)
+                errors = status.get('errors') or []
+                status_events.append(DeliveryStatusEvent(
+                    provider='whatsapp',
+                    provider_message_id=status['id'],
+                    status=status['status'],
+                    reported_at=reported_at,
+                    error='; '.join(
+                        f"{error.get('code', '')} {error.get('title', '')}".strip() for error in errors
+                    ),
+                ))
+    
+    if status_events:
+        DeliveryStatusEvent.objects.bulk_create(status_events)
+        logger.info(f"Stored {len(status_events)} WhatsApp delivery status callbacks")
+        process_delivery_statuses_background()
+    
+    return HttpResponse('OK')
+
+
 # Message Template Views
 @login_required
 def template_list(request):
@@ -1015,29 +1281,23 @@ def template_toggle_active(request, template_id):
 
 
 @login_required
-def api_templates(request):
+async def api_templates(request):
     """API endpoint to get templates for a specific event and type"""
     event_id = request.GET.get('event_id')
     template_type = request.GET.get('type')
     
-    templates = MessageTemplate.objects.filter(is_active=True)
-    
-    if event_id:
-        templates = templates.filter(event_id=event_id)
-    
-    if template_type:
-        templates = templates.filter(type=template_type)
-    
-    data = []
-    for template in templates:
-        data.append({
-            'id': template.id,
-            'name': template.name,
-            'message': template.message,
-            'type': template.type,
-            'event_id': template.event_id,
-        })
+    async def compute():
+        templates = MessageTemplate.objects.filter(is_active=True)
+        
+        if event_id:
+            templates = templates.filter(event_id=event_id)
+        
+        if template_type:
+            templates = templates.filter(type=template_type)
+        
+        return [template async for template in templates.values('id', 'name', 'message', 'type', 'event_id')]
     
+    data = await cache.aget_or_compute('message_template', compute, 'api', event_id or '', template_type or '')
     return JsonResponse({'templates': data})
 
 
@@ -1046,35 +1306,26 @@ def landing_page(request):
     """Landing page with service information and registration form"""
     from .forms import RegistrationForm
     import logging
-    import random
     
     logger = logging.getLogger(__name__)
     
     if request.method == 'POST':
-        form = RegistrationForm(request.POST)
-        
-        # Validate CAPTCHA
-        captcha_answer = request.POST.get('captcha_answer', '')
-        captcha_num1 = int(request.POST.get('captcha_num1', 0))
-        captcha_num2 = int(request.POST.get('captcha_num2', 0))
-        captcha_operation = request.POST.get('captcha_operation', '+')
-        
-        # Calculate correct answer
-        if captcha_operation == '+':
-            correct_answer = captcha_num1 + captcha_num2
-        elif captcha_operation == '-':
-            correct_answer = captcha_num1 - captcha_num2
-        else:
-            correct_answer = captcha_num1 + captcha_num2
+        # Cheap checks first: throttled submissions never reach the database
+        # or password hashing
+        register_limiter = get_ip_limiter('register-ip', request)
+        if register_limiter and register_limiter.hit(get_client_ip(request)):
+            logger.warning(f"Registration throttled for {get_client_ip(request)}")
+            messages.error(request, 'Too many registration attempts. Please try again later.')
+            return redirect('events:landing_page')
         
-        try:
-            captcha_answer_int = int(captcha_answer) if captcha_answer else 0
-        except ValueError:
-            captcha_answer_int = 0
+        form = RegistrationForm(request.POST)
         
-        if not captcha_answer or captcha_answer_int != correct_answer:
+        # Validate CAPTCHA before the form (its validation queries the database)
+        if not verify_challenge(request.POST.get('captcha_token'), request.POST.get('captcha_answer')):
             messages.error(request, 'Please solve the math problem correctly to verify you are human.')
-        elif form.is_valid():
+            return redirect('events:landing_page')
+        
+        if form.is_valid():
             try:
                 # Save the registration request
                 registration_request = form.save(commit=False)
@@ -1088,18 +1339,10 @@ def landing_page(request):
                 logger.info(f"Registration saved for {registration_request.email} (ID: {registration_request.id})")
                 
                 # Send verification email
-                logger.info("🚀 INITIATING REGISTRATION EMAIL PROCESS")
-                logger.info(f"   Registration ID: {registration_request.id}")
-                logger.info(f"   User: {registration_request.full_name}")
-                logger.info(f"   Email: {registration_request.email}")
-                logger.info(f"   Event: {registration_request.event_name}")
+                send_verification_email(registration_request, request)
                 
-                email_result = send_verification_email(registration_request, request)
-                
-                if email_result:
-                    logger.info("🎉 REGISTRATION PROCESS COMPLETED SUCCESSFULLY")
-                else:
-                    logger.error("💥 REGISTRATION EMAIL PROCESS FAILED")
+                # Clean up expired registration requests now and then
+                maybe_run_maintenance()
                 
                 messages.success(
                     request, 
@@ -1131,35 +1374,10 @@ def landing_page(request):
     else:
         form = RegistrationForm()
     
-    # Service statistics for the landing page
-    total_events = Event.objects.filter(is_active=True).count()
-    total_users = EventUser.objects.filter(is_verified=True).count()
-    total_pledges = Pledges.objects.count()
-    
-    # Generate CAPTCHA
-    captcha_num1 = random.randint(1, 10)
-    captcha_num2 = random.randint(1, 10)
-    operations = ['+', '-']
-    captcha_operation = random.choice(operations)
-    
-    # Make sure subtraction doesn't result in negative numbers
-    if captcha_operation == '-' and captcha_num1 < captcha_num2:
-        captcha_num1, captcha_num2 = captcha_num2, captcha_num1
-    
-    if captcha_operation == '+':
-        captcha_question = f"{captcha_num1} + {captcha_num2} = ?"
-    else:
-        captcha_question = f"{captcha_num1} - {captcha_num2} = ?"
-    
     context = {
         'form': form,
-        'total_events': total_events,
-        'total_users': total_users,
-        'total_pledges': total_pledges,
-        'captcha_num1': captcha_num1,
-        'captcha_num2': captcha_num2,
-        'captcha_operation': captcha_operation,
-        'captcha_question': captcha_question,
+        'landing_cache_timeout': LANDING_FRAGMENT_CACHE_TIMEOUT,
+        **challenge_context(),
     }
     return render(request, 'events/landing_page.html', context)
 
@@ -1230,8 +1448,7 @@ def verify_email(request, token):
 
 
 def send_verification_email(registration_request, request=None):
-    """Send verification email to the user"""
-    from django.core.mail import send_mail
+    """Queue the verification email for the user; returns True once queued"""
     from django.template.loader import render_to_string
     from django.conf import settings
     from django.urls import reverse
@@ -1239,56 +1456,29 @@ def send_verification_email(registration_request, request=None):
     
     logger = logging.getLogger(__name__)
     
-    # Start of email sending process
-    logger.info("=" * 60)
-    logger.info("📧 STARTING EMAIL SENDING PROCESS")
-    logger.info("=" * 60)
-    
-    # Log email configuration for debugging
-    logger.info(f"📋 Email Configuration:")
-    logger.info(f"   Backend: {settings.EMAIL_BACKEND}")
-    logger.info(f"   Host: {settings.EMAIL_HOST}")
-    logger.info(f"   Port: {settings.EMAIL_PORT}")
-    logger.info(f"   User: {settings.EMAIL_HOST_USER}")
-    logger.info(f"   From: {settings.DEFAULT_FROM_EMAIL}")
-    logger.info(f"   TLS: {getattr(settings, 'EMAIL_USE_TLS', False)}")
-    logger.info(f"   SSL: {getattr(settings, 'EMAIL_USE_SSL', False)}")
-    logger.info(f"   Timeout: {getattr(settings, 'EMAIL_TIMEOUT', 'Not set')}")
-    
-    # Log recipient and registration details
-    logger.info(f"📤 Email Details:")
-    logger.info(f"   To: {registration_request.email}")
-    logger.info(f"   User: {registration_request.full_name}")
-    logger.info(f"   Event: {registration_request.event_name}")
-    logger.info(f"   Token: {registration_request.verification_token}")
-    logger.info(f"   Created: {registration_request.created_at}")
-    logger.info(f"   Expires: {registration_request.expires_at}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            f"Verification email for registration {registration_request.id}: "
+            f"to={registration_request.email} event={registration_request.event_name} "
+            f"expires={registration_request.expires_at} backend={settings.EMAIL_BACKEND}"
+        )
     
     try:
-        logger.info("🔗 Generating verification URL...")
-        
         # Generate verification URL
         if request:
             verification_url = request.build_absolute_uri(
                 reverse('events:verify_email', kwargs={'token': registration_request.verification_token})
             )
-            logger.info(f"   Using request.build_absolute_uri()")
         else:
             # Fallback if request is not available
             from django.contrib.sites.models import Site
             current_site = Site.objects.get_current()
             verification_url = f"http://{current_site.domain}{reverse('events:verify_email', kwargs={'token': registration_request.verification_token})}"
-            logger.info(f"   Using fallback with Site: {current_site.domain}")
-        
-        logger.info(f"   Generated URL: {verification_url}")
         
         # Prepare email content
         subject = 'Nifty Events -   Verify Your Email'
-        logger.info(f"📝 Preparing email content...")
-        logger.info(f"   Subject: {subject}")
         
         # HTML email template
-        logger.info("🎨 Rendering HTML email template...")
         try:
             html_message = render_to_string('events/emails/verification_email.html', {
                 'user_name': registration_request.full_name,
@@ -1297,9 +1487,8 @@ def send_verification_email(registration_request, request=None):
                 'verification_url': verification_url,
                 'expires_in_hours': 24,
             })
-            logger.info(f"   ✅ HTML template rendered successfully ({len(html_message)} characters)")
         except Exception as e:
-            logger.error(f"   ❌ HTML template rendering failed: {str(e)}")
+            logger.error(f"Verification email HTML template rendering failed: {str(e)}")
             html_message = None
         
         # Plain text fallback
@@ -1323,70 +1512,26 @@ def send_verification_email(registration_request, request=None):
         Events Management Team
         """
         
-        # Send email
-        logger.info("📨 SENDING EMAIL...")
-        logger.info(f"   From: {settings.DEFAULT_FROM_EMAIL}")
-        logger.info(f"   To: [{registration_request.email}]")
-        logger.info(f"   Subject: {subject}")
-        logger.info(f"   Plain text length: {len(plain_message)} characters")
-        logger.info(f"   HTML message: {'Yes' if html_message else 'No'}")
-        logger.info(f"   Fail silently: False")
-        
-        # Import time to measure sending duration
-        import time
-        start_time = time.time()
-        
-        send_mail(
+        # Queue the email; the outbound worker sends it and retries failures
+        outbound_email = queue_email(
             subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[registration_request.email],
-            html_message=html_message,
-            fail_silently=False
+            body=plain_message,
+            recipients=[registration_request.email],
+            html_body=html_message or '',
         )
         
-        end_time = time.time()
-        duration = round(end_time - start_time, 2)
-        
-        logger.info("=" * 60)
-        logger.info("✅ EMAIL SENT SUCCESSFULLY!")
-        logger.info("=" * 60)
-        logger.info(f"📊 Sending Statistics:")
-        logger.info(f"   Duration: {duration} seconds")
-        logger.info(f"   Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.info(f"   Recipient: {registration_request.email}")
-        logger.info(f"   Registration ID: {registration_request.id}")
-        logger.info(f"   Token: {registration_request.verification_token}")
-        logger.info("=" * 60)
+        logger.info(
+            f"Verification email {outbound_email.id} queued for {registration_request.email} "
+            f"(registration {registration_request.id})"
+        )
         
         return True
         
-    except Exception as e:
-        logger.error("=" * 60)
-        logger.error("❌ EMAIL SENDING FAILED!")
-        logger.error("=" * 60)
-        logger.error(f"📋 Error Details:")
-        logger.error(f"   Recipient: {registration_request.email}")
-        logger.error(f"   Registration ID: {registration_request.id}")
-        logger.error(f"   Error Type: {type(e).__name__}")
-        logger.error(f"   Error Message: {str(e)}")
-        
-        # Import for detailed error information
-        import traceback
-        import time
-        
-        logger.error(f"📊 Error Context:")
-        logger.error(f"   Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.error(f"   Email Host: {settings.EMAIL_HOST}")
-        logger.error(f"   Email Port: {settings.EMAIL_PORT}")
-        logger.error(f"   Email User: {settings.EMAIL_HOST_USER}")
-        
-        logger.error(f"🔍 Full Traceback:")
-        for line in traceback.format_exc().split('\n'):
-            if line.strip():
-                logger.error(f"   {line}")
-        
-        logger.error("=" * 60)
+    except Exception:
+        logger.exception(
+            f"Queueing the verification email failed for {registration_request.email} "
+            f"(registration {registration_request.id})"
+        )
         return False
 
 
@@ -1433,11 +1578,33 @@ def login_view(request):
     """User login view"""
     from django.contrib.auth import authenticate, login
     from .forms import LoginForm
+    import logging
+    
+    logger = logging.getLogger(__name__)
     
     if request.user.is_authenticated:
         return redirect('events:dashboard')
     
     if request.method == 'POST':
+        # Cheap checks first: throttled attempts never reach password hashing
+        ip_limiter = get_ip_limiter('login-ip', request)
+        email_limiter = get_limiter('login-email')
+        client_ip = get_client_ip(request)
+        attempted_email = request.POST.get('email', '').strip().lower()
+        
+        throttled_by = None
+        if ip_limiter and ip_limiter.hit(client_ip):
+            throttled_by = ip_limiter
+        elif email_limiter and attempted_email and email_limiter.is_limited(attempted_email):
+            throttled_by = email_limiter
+        
+        if throttled_by:
+            logger.warning(f"Login throttled ({throttled_by.scope}) for {client_ip} ({attempted_email})")
+            messages.error(request, 'Too many login attempts. Please wait a few minutes and try again.')
+            response = render(request, 'events/login.html', {'form': LoginForm(initial={'email': attempted_email})}, status=429)
+            response['Retry-After'] = str(throttled_by.retry_after())
+            return response
+        
         form = LoginForm(request.POST)
         if form.is_valid():
             email = form.cleaned_data['email']
@@ -1446,6 +1613,11 @@ def login_view(request):
             # Authenticate user
             user = authenticate(request, username=email, password=password)
             
+            if user is not None and email_limiter:
+                email_limiter.reset(attempted_email)
+            elif user is None and email_limiter:
+                email_limiter.hit(attempted_email)
+            
             if user is not None:
                 if user.is_verified:
                     login(request, user)
@@ -1485,7 +1657,6 @@ def forgot_password_view(request):
     """Handle forgot password requests"""
     import logging
     import uuid
-    from django.core.mail import send_mail
     from django.conf import settings
     from django.urls import reverse
     from django.utils import timezone
@@ -1534,15 +1705,17 @@ Nifty Technologies Team
 events@nifty.co.tz
                 """
                 
-                send_mail(
+                queue_email(
                     subject=subject,
-                    message=message,
+                    body=message,
+                    recipients=[email],
                     from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'events@nifty.co.tz'),
-                    recipient_list=[email],
-                    fail_silently=False,
                 )
                 
-                logger.info(f"Password reset email sent to {email}")
+                logger.info(f"Password reset email queued for {email}")
+            
+            # Clean up expired reset tokens now and then
+            maybe_run_maintenance()
                 
             # Always show success message for security (don't reveal if email exists)
             messages.success(
@@ -1626,6 +1799,26 @@ def reset_password_view(request, token):
     return render(request, 'events/reset_password.html')
 
 
+def get_event_pledge_stats(event_name):
+    """
+    Pledge totals for one event, computed in a single aggregate query.
+    
+    Cached per event and invalidated whenever one of its pledges changes.
+    """
+    def compute():
+        stats = Pledges.objects.filter(event_id=event_name).aggregate(
+            total_pledges=Count('id'),
+            total_amount_pledged=Sum('pledge'),
+            total_amount_paid=Sum('amount_paid'),
+            pending_pledges=Count('id', filter=Q(status__in=['new', 'pending', 'partial'])),
+        )
+        stats['total_amount_pledged'] = stats['total_amount_pledged'] or 0
+        stats['total_amount_paid'] = stats['total_amount_paid'] or 0
+        return stats
+    
+    return cache.get_or_compute('event_pledge_stats', compute, event=event_name)
+
+
 @login_required
 def dashboard_view(request):
     """User dashboard - requires authentication"""
@@ -1636,10 +1829,11 @@ def dashboard_view(request):
     
     # Dashboard data filtered by selected event (or empty if no events)
     if selected_event:
-        total_pledges = Pledges.objects.filter(event_id=selected_event.name).count()
-        total_amount_pledged = Pledges.objects.filter(event_id=selected_event.name).aggregate(Sum('pledge'))['pledge__sum'] or 0
-        total_amount_paid = Pledges.objects.filter(event_id=selected_event.name).aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0
-        pending_pledges = Pledges.objects.filter(event_id=selected_event.name, status__in=['new', 'pending', 'partial']).count()
+        event_stats = get_event_pledge_stats(selected_event.name)
+        total_pledges = event_stats['total_pledges']
+        total_amount_pledged = event_stats['total_amount_pledged']
+        total_amount_paid = event_stats['total_amount_paid']
+        pending_pledges = event_stats['pending_pledges']
         
         recent_pledges = Pledges.objects.filter(event_id=selected_event.name).order_by('-created_at')[:5]
         recent_transactions = Transactions.objects.filter(pledge__event_id=selected_event.name).order_by('-created_at')[:5]
@@ -1704,21 +1898,15 @@ def event_detail(request, event_id):
     event = get_object_or_404(Event, id=event_id, created_by=request.user, is_active=True)
     
     # Get statistics for this event
-    total_pledges = Pledges.objects.filter(event_id=event.name).count()
-    total_amount_pledged = Pledges.objects.filter(event_id=event.name).aggregate(Sum('pledge'))['pledge__sum'] or 0
-    total_amount_paid = Pledges.objects.filter(event_id=event.name).aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0
-    pending_pledges = Pledges.objects.filter(event_id=event.name, status__in=['new', 'pending', 'partial']).count()
+    event_stats = get_event_pledge_stats(event.name)
     
     recent_pledges = Pledges.objects.filter(event_id=event.name).order_by('-created_at')[:10]
     
     context = {
         'event': event,
-        'total_pledges': total_pledges,
-        'total_amount_pledged': total_amount_pledged,
-        'total_amount_paid': total_amount_paid,
-        'pending_pledges': pending_pledges,
         'recent_pledges': recent_pledges,
     }
+    context.update(event_stats)
     return render(request, 'events/event_detail.html', context)
 
 
@@ -1763,7 +1951,7 @@ def set_selected_event(request):
             # Verify the event belongs to the user
             try:
                 event = Event.objects.get(id=event_id, created_by=request.user, is_active=True)
-                request.session['selected_event_id'] = event_id
+                set_session_value(request.session, 'selected_event_id', event.id)
                 return JsonResponse({'success': True})
             except Event.DoesNotExist:
                 return JsonResponse({'success': False, 'error': 'Event not found'})
@@ -1802,39 +1990,22 @@ def data_deletion_request(request):
     """
     Handle data deletion requests from users
     """
-    import random
-    
     if request.method == 'POST':
         full_name = request.POST.get('full_name', '').strip()
         email = request.POST.get('email', '').strip()
         reason = request.POST.get('reason', '').strip()
         confirm_deletion = request.POST.get('confirm_deletion')
         
-        # Validate CAPTCHA
-        captcha_answer = request.POST.get('captcha_answer', '')
-        captcha_num1 = int(request.POST.get('captcha_num1', 0))
-        captcha_num2 = int(request.POST.get('captcha_num2', 0))
-        captcha_operation = request.POST.get('captcha_operation', '+')
-        
-        # Calculate correct answer
-        if captcha_operation == '+':
-            correct_answer = captcha_num1 + captcha_num2
-        elif captcha_operation == '-':
-            correct_answer = captcha_num1 - captcha_num2
-        else:
-            correct_answer = captcha_num1 + captcha_num2
-        
         # Validate required fields
         if not full_name or not email:
             messages.error(request, 'Full name and email address are required.')
         elif not confirm_deletion:
             messages.error(request, 'You must confirm that you understand this action is permanent.')
-        elif not captcha_answer or int(captcha_answer) != correct_answer:
+        elif not verify_challenge(request.POST.get('captcha_token'), request.POST.get('captcha_answer')):
             messages.error(request, 'Please solve the math problem correctly to verify you are human.')
         else:
             # Send email to privacy team
             try:
-                from django.core.mail import send_mail
                 from django.conf import settings
                 from django.utils import timezone
                 import logging
@@ -1865,12 +2036,11 @@ Note: Verify the user's identity before processing the deletion request.
                 privacy_email = getattr(settings, 'PRIVACY_EMAIL', 'events@nifty.co.tz')
                 support_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'events@nifty.co.tz')
                 
-                send_mail(
+                queue_email(
                     subject=subject,
-                    message=message_body,
+                    body=message_body,
+                    recipients=[privacy_email, support_email],
                     from_email=support_email,
-                    recipient_list=[privacy_email, support_email],
-                    fail_silently=False,
                 )
                 
                 # Send confirmation email to user
@@ -1895,12 +2065,11 @@ Thank you,
 Events Management System Team
                 """
                 
-                send_mail(
+                queue_email(
                     subject=user_subject,
-                    message=user_message,
+                    body=user_message,
+                    recipients=[email],
                     from_email=support_email,
-                    recipient_list=[email],
-                    fail_silently=False,
                 )
                 
                 logger.info(f"Data deletion request submitted for {email} - {full_name}")
@@ -1913,7 +2082,7 @@ Events Management System Team
                 )
                 
             except Exception as e:
-                logger.error(f"Failed to send data deletion request emails: {str(e)}")
+                logger.error(f"Failed to queue data deletion request emails: {str(e)}")
                 messages.error(
                     request,
                     'There was an error submitting your deletion request. '
@@ -1923,56 +2092,74 @@ Events Management System Team
             return redirect('events:data_deletion_request')
     
     # Generate CAPTCHA for GET request
-    captcha_num1 = random.randint(1, 10)
-    captcha_num2 = random.randint(1, 10)
-    operations = ['+', '-']
-    captcha_operation = random.choice(operations)
+    context = challenge_context()
     
-    # Make sure subtraction doesn't result in negative numbers
-    if captcha_operation == '-' and captcha_num1 < captcha_num2:
-        captcha_num1, captcha_num2 = captcha_num2, captcha_num1
+    return render(request, 'events/data_deletion.html', context)
+
+
+def get_event_record_counts(event_name):
+    """
+    Transaction and message counts for one event, cached per event.
     
-    if captcha_operation == '+':
-        captcha_question = f"{captcha_num1} + {captcha_num2} = ?"
-    else:
-        captcha_question = f"{captcha_num1} - {captcha_num2} = ?"
+    Invalidated with the event's other cached data when its pledges change;
+    new messages and transactions show up within EVENT_RECORD_COUNTS_CACHE_TIMEOUT.
+    """
+    def compute():
+        return {
+            'transactions': Transactions.objects.filter(pledge__event_id=event_name).count(),
+            'messages': Messages.objects.filter(pledge__event_id=event_name).count(),
+        }
     
-    context = {
-        'captcha_num1': captcha_num1,
-        'captcha_num2': captcha_num2,
-        'captcha_operation': captcha_operation,
-        'captcha_question': captcha_question,
-    }
+    return cache.get_or_compute(
+        'event_record_counts', compute, event=event_name, timeout=EVENT_RECORD_COUNTS_CACHE_TIMEOUT
+    )
+
+
+def get_account_data_counts(user):
+    """
+    Summary of the data deleted with an account, built from the cached
+    per-event rollups rather than counting every table on each request.
     
-    return render(request, 'events/data_deletion.html', context)
+    Like the deletion job, it only counts the data of deletable_event_names();
+    the events whose names another account also uses are returned as
+    shared_event_names, since their pledges are kept.
+    """
+    own_names = list(Event.objects.filter(created_by=user).values_list('name', flat=True))
+    names = deletable_event_names(user.pk)
+    
+    counts = {
+        'events_count': len(own_names),
+        'pledges_count': 0,
+        'transactions_count': 0,
+        # Archived messages are deleted with the live ones
+        'messages_count': MessageArchive.objects.filter(event_id__in=names).count() if names else 0,
+        'shared_event_names': sorted(set(own_names) - set(names)),
+    }
+    for name in names:
+        record_counts = get_event_record_counts(name)
+        counts['pledges_count'] += get_event_pledge_stats(name)['total_pledges']
+        counts['transactions_count'] += record_counts['transactions']
+        counts['messages_count'] += record_counts['messages']
+    return counts
 
 
 @login_required
 def delete_account(request):
     """
-    Allow logged-in users to delete their own account
+    Allow logged-in users to delete their own account.
+    
+    The account is deactivated immediately and its data deleted by a
+    background job (see events.tasks.request_account_deletion).
     """
-    import random
+    import logging
+    
+    logger = logging.getLogger(__name__)
     
     if request.method == 'POST':
         password = request.POST.get('password', '').strip()
         confirmation_text = request.POST.get('confirmation_text', '').strip()
         final_confirmation = request.POST.get('final_confirmation')
         
-        # Validate CAPTCHA
-        captcha_answer = request.POST.get('captcha_answer', '')
-        captcha_num1 = int(request.POST.get('captcha_num1', 0))
-        captcha_num2 = int(request.POST.get('captcha_num2', 0))
-        captcha_operation = request.POST.get('captcha_operation', '+')
-        
-        # Calculate correct answer
-        if captcha_operation == '+':
-            correct_answer = captcha_num1 + captcha_num2
-        elif captcha_operation == '-':
-            correct_answer = captcha_num1 - captcha_num2
-        else:
-            correct_answer = captcha_num1 + captcha_num2
-        
         # Validate inputs
         if not password:
             messages.error(request, 'Password is required to confirm account deletion.')
@@ -1980,7 +2167,7 @@ def delete_account(request):
             messages.error(request, 'You must type "DELETE" exactly to confirm deletion.')
         elif not final_confirmation:
             messages.error(request, 'You must check the final confirmation checkbox.')
-        elif not captcha_answer or int(captcha_answer) != correct_answer:
+        elif not verify_challenge(request.POST.get('captcha_token'), request.POST.get('captcha_answer')):
             messages.error(request, 'Please solve the math problem correctly to verify you are human.')
         else:
             # Verify password
@@ -1990,85 +2177,24 @@ def delete_account(request):
             if user is None:
                 messages.error(request, 'Invalid password. Please try again.')
             else:
-                # Perform account deletion
+                # Deactivate the account now; its data is deleted in the background
                 try:
-                    from django.utils import timezone
-                    import logging
-                    
-                    logger = logging.getLogger(__name__)
-                    
-                    # Log the deletion
-                    logger.info(f"Account deletion initiated for user: {request.user.email} ({request.user.full_name})")
-                    
-                    # Get user data for logging before deletion
-                    user_email = request.user.email
-                    user_name = request.user.full_name
-                    
-                    # Count associated data
-                    events_count = Event.objects.filter(created_by=request.user).count()
-                    pledges_count = Pledges.objects.filter(event__created_by=request.user).count()
-                    transactions_count = Transactions.objects.filter(pledge__event__created_by=request.user).count()
-                    messages_count = Messages.objects.filter(pledge__event__created_by=request.user).count()
-                    
-                    # Delete all associated data (Django will handle cascade deletions)
-                    with transaction.atomic():
-                        # Delete user's events (this will cascade to pledges, transactions, messages)
-                        Event.objects.filter(created_by=request.user).delete()
-                        
-                        # Delete the user account
-                        request.user.delete()
-                    
-                    logger.info(f"Account successfully deleted: {user_email} ({user_name})")
-                    logger.info(f"Deleted data - Events: {events_count}, Pledges: {pledges_count}, Transactions: {transactions_count}, Messages: {messages_count}")
+                    from django.contrib.auth import logout
                     
-                    # Send confirmation email (optional)
-                    try:
-                        from django.core.mail import send_mail
-                        from django.conf import settings
-                        
-                        send_mail(
-                            subject='Account Deletion Confirmation - Events Management System',
-                            message=f"""
-Dear {user_name},
-
-Your account has been successfully deleted from the Events Management System.
-
-Deletion Details:
-- Account: {user_email}
-- Deletion Date: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}
-- Events Deleted: {events_count}
-- Total Data Records Removed: {pledges_count + transactions_count + messages_count}
-
-All your personal data and associated records have been permanently removed from our system.
-
-If you have any questions or believe this deletion was made in error, please contact us immediately.
-
-Thank you for using our service.
-
-Best regards,
-Nifty Technologies Team
-                            """,
-                            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'events@nifty.co.tz'),
-                            recipient_list=[user_email],
-                            fail_silently=True,  # Don't fail if email can't be sent since account is already deleted
-                        )
-                    except Exception as email_error:
-                        logger.error(f"Failed to send account deletion confirmation email: {str(email_error)}")
+                    job = request_account_deletion(request.user)
+                    logger.info(f"Account deletion requested for user: {job.user_email} ({job.user_name}), job {job.id}")
                     
-                    # Redirect to landing page with success message
+                    logout(request)
                     messages.success(
                         request,
-                        f'Your account has been successfully deleted. All your data has been permanently removed. '
+                        f'Your account has been deactivated and is being deleted. We will email {job.user_email} '
+                        f'once all your data has been permanently removed. '
                         f'Thank you for using our Events Management System.'
                     )
-                    
-                    # Logout and redirect
-                    from django.contrib.auth import logout
-                    logout(request)
                     return redirect('events:landing_page')
                     
                 except Exception as e:
-                    logger.error(f"Failed to delete account for {request.user.email}: {str(e)}")
+                    logger.error(f"Failed to request account deletion for {request.user.email}: {str(e)}")
                     messages.error(
                         request,
                         'There was an error deleting your account. Please try again or contact support.'
@@ -2076,26 +2202,11 @@ Nifty Technologies Team
         
         return redirect('events:delete_account')
     
-    # GET request - show the deletion form
-    # Count user's data
-    events_count = Event.objects.filter(created_by=request.user).count()
-    pledges_count = Pledges.objects.filter(event__created_by=request.user).count()
-    transactions_count = Transactions.objects.filter(pledge__event__created_by=request.user).count()
-    messages_count = Messages.objects.filter(pledge__event__created_by=request.user).count()
-    
-    # Generate CAPTCHA for the form
-    captcha_num1 = random.randint(1, 10)
-    captcha_num2 = random.randint(1, 10)
-    captcha_operation = random.choice(['+', '-'])
-    
+    # GET request - show the deletion form with a summary of the user's data
     context = {
-        'events_count': events_count,
-        'pledges_count': pledges_count,
-        'transactions_count': transactions_count,
-        'messages_count': messages_count,
-        'captcha_num1': captcha_num1,
-        'captcha_num2': captcha_num2,
-        'captcha_operation': captcha_operation,
+        **get_account_data_counts(request.user),
+        # CAPTCHA for the form
+        **challenge_context(),
     }
     
     return render(request, 'events/delete_account.html', context)
@@ -70,6 +70,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'events.context_processors.event_selection',
             ],
         },
     },
@@ -111,13 +112,50 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing. PASSWORD_HASH_ITERATIONS sets the PBKDF2 cost (Django's
+# default is 1000000); existing hashes are upgraded on the next login.
+PASSWORD_HASHERS = [
+    'events.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=1_000_000, cast=int)
+
+# Attempt limits for anonymous endpoints (see events/throttle.py):
+# name -> (attempts, window in seconds). Throttled requests are rejected
+# before any password hashing or database work.
+THROTTLE_ENABLED = config('THROTTLE_ENABLED', default=True, cast=bool)
+THROTTLE_RATES = {
+    'login-ip': (30, 300),       # login attempts per client address
+    'login-email': (5, 300),     # failed logins per account
+    'register-ip': (10, 3600),   # registration submissions per client address
+}
+# Number of reverse proxies in front of the app that append X-Forwarded-For
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+
+# Seconds a rendered CAPTCHA challenge stays valid (see events/captcha.py)
+CAPTCHA_MAX_AGE = 1800
+
+# Messages in a final status are moved to the compressed message archive by
+# the archive_messages command once they are this many days old
+MESSAGE_ARCHIVE_AFTER_DAYS = config('MESSAGE_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+
+# Live message status streams (events.streams): seconds between checks of
+# the change marker, between database checks when it did not change, and
+# before a stream is closed and the browser reconnects
+MESSAGE_STREAM_POLL_INTERVAL = config('MESSAGE_STREAM_POLL_INTERVAL', default=1.0, cast=float)
+MESSAGE_STREAM_RECHECK_INTERVAL = 15
+MESSAGE_STREAM_MAX_AGE = 300
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'UTC'
+TIME_ZONE = config('TIME_ZONE', default='UTC')
 
 USE_I18N = True
 
@@ -134,12 +172,92 @@ STATIC_ROOT = config('STATIC_ROOT', default=BASE_DIR / 'staticfiles')
 MEDIA_URL = config('MEDIA_URL', default='/media/')
 MEDIA_ROOT = config('MEDIA_ROOT', default=BASE_DIR / 'media')
 
+# Cache Configuration
+# CACHE_BACKEND selects the backend:
+#   locmem    - in-process LRU cache (single worker / development)
+#   file      - file-based cache shared by all workers on one host (default)
+#   redis     - Redis server, CACHE_LOCATION is a redis:// URL
+#   memcached - memcached server(s), CACHE_LOCATION is host:port[,host:port]
+CACHE_BACKEND = config('CACHE_BACKEND', default='file')
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+CACHE_LOCATIONS = {
+    'locmem': 'events-manager',
+    'file': str(BASE_DIR / 'cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+    'memcached': '127.0.0.1:11211',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': config(
+            'CACHE_LOCATION',
+            default=CACHE_LOCATIONS[CACHE_BACKEND],
+            cast=lambda v: [s.strip() for s in v.split(',')] if CACHE_BACKEND == 'memcached' else v
+        ),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='events-manager'),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        } if CACHE_BACKEND in ('locmem', 'file') else {},
+    }
+}
+
+# Session storage. SESSION_BACKEND selects the engine:
+#   cached_db      - sessions read from the cache, written through to the
+#                    database (default)
+#   signed_cookies - stored in a signed cookie, no server-side storage
+#   cache          - cache only; needs a cache shared by all workers
+#   db             - database only (a query on every request)
+# Expired database sessions are deleted by the purge_expired command.
+SESSION_BACKEND = config('SESSION_BACKEND', default='cached_db')
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'default'
+
+# Cache alias and default freshness used by events.cache
+EVENTS_CACHE_ALIAS = 'default'
+EVENTS_CACHE_TIMEOUT = config('EVENTS_CACHE_TIMEOUT', default=300, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Logging Configuration
+# LOG_FORMAT: 'json' (one JSON object per line, see events/logging_handlers.py)
+# or 'text'. LOG_QUEUE writes the log file from a background thread.
+# LOG_LEVEL=DEBUG adds request/response dumps of the send path.
+# SEND_LOG_SAMPLE_RATE: share of successful sends logged (failures always are).
+# The log file is shared safely by several worker processes and rotated at
+# LOG_MAX_BYTES or every LOG_ROTATE_INTERVAL seconds; rotated files are
+# gzipped and the oldest removed beyond LOG_BACKUP_COUNT files or
+# LOG_MAX_TOTAL_BYTES. LOG_BUDGETS caps records per logger and level per
+# minute in each process.
+LOG_FORMAT = config('LOG_FORMAT', default='json')
+LOG_QUEUE = config('LOG_QUEUE', default=True, cast=bool)
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+SEND_LOG_SAMPLE_RATE = config('SEND_LOG_SAMPLE_RATE', default=1.0, cast=float)
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_ROTATE_INTERVAL = config('LOG_ROTATE_INTERVAL', default=86400, cast=int)
+LOG_BACKUP_COUNT = config('LOG_BACKUP_COUNT', default=14, cast=int)
+LOG_MAX_TOTAL_BYTES = config('LOG_MAX_TOTAL_BYTES', default=200 * 1024 * 1024, cast=int)
+LOG_BUDGETS = {
+    'events.sends': {'INFO': 6000},
+    'events.tasks': {'INFO': 3000, 'DEBUG': 3000},
+    'events.views': {'INFO': 3000, 'DEBUG': 3000},
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -152,13 +270,31 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'events.logging_handlers.JSONFormatter',
+        },
+    },
+    'filters': {
+        'budget': {
+            '()': 'events.logging_handlers.LogBudgetFilter',
+            'budgets': LOG_BUDGETS,
+            'window': 60,
+        },
     },
     'handlers': {
         'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'level': LOG_LEVEL,
+            'class': (
+                'events.logging_handlers.QueuedFileHandler' if LOG_QUEUE
+                else 'events.logging_handlers.LockedRotatingFileHandler'
+            ),
             'filename': BASE_DIR / 'logs' / 'background_tasks.log',
-            'formatter': 'verbose',
+            'max_bytes': LOG_MAX_BYTES,
+            'interval': LOG_ROTATE_INTERVAL,
+            'backup_count': LOG_BACKUP_COUNT,
+            'max_total_bytes': LOG_MAX_TOTAL_BYTES,
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['budget'],
         },
         'console': {
             'level': 'INFO',
@@ -169,14 +305,20 @@ LOGGING = {
     'loggers': {
         'events.tasks': {
             'handlers': ['file', 'console'],
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'propagate': True,
         },
         'events.views': {
             'handlers': ['file', 'console'],
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'propagate': True,
         },
+        # One line per send; file only to keep the console readable
+        'events.sends': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -196,3 +338,50 @@ EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
 # WhatsApp Configuration using Environment Variables
 WHATSAPP_ACCESS_TOKEN = config('WHATSAPP_ACCESS_TOKEN')
 WHATSAPP_PHONE_NUMBER_ID = config('WHATSAPP_PHONE_NUMBER_ID')
+# Cloud API base URL (override to point at a local stub)
+WHATSAPP_API_BASE_URL = config('WHATSAPP_API_BASE_URL', default='https://graph.facebook.com/v22.0')
+# Webhook (delivery status callbacks): token echoed during subscription and
+# the app secret used to verify X-Hub-Signature-256
+WHATSAPP_WEBHOOK_VERIFY_TOKEN = config('WHATSAPP_WEBHOOK_VERIFY_TOKEN', default='')
+WHATSAPP_APP_SECRET = config('WHATSAPP_APP_SECRET', default='')
+
+# Message channel backends, keyed by message method (see events/channels.py).
+# CONCURRENCY: parallel sends per batch, RATE_LIMIT: max sends per second,
+# BATCH_SIZE: messages handed to the backend at once.
+MESSAGE_CHANNELS = {
+    'sms': {
+        'BACKEND': 'events.channels.SMSChannel',
+        'CONCURRENCY': 1,
+        'RATE_LIMIT': None,
+        'BATCH_SIZE': 100,
+    },
+    'whatsapp': {
+        'BACKEND': 'events.channels.WhatsAppChannel',
+        'CONCURRENCY': config('WHATSAPP_CONCURRENCY', default=4, cast=int),
+        'RATE_LIMIT': config('WHATSAPP_RATE_LIMIT', default=20, cast=int),
+        'BATCH_SIZE': 100,
+    },
+    'email': {
+        'BACKEND': 'events.channels.EmailChannel',
+        'CONCURRENCY': 1,
+        'RATE_LIMIT': None,
+        'BATCH_SIZE': 50,
+    },
+}
+
+# Transactional emails (verification, password reset, ...) are queued in the
+# outbound_emails table and sent by a worker (see events.tasks.queue_email).
+# Failed sends are retried after RETRY_DELAY seconds, doubling up to
+# MAX_RETRY_DELAY, until MAX_ATTEMPTS is reached.
+OUTBOUND_EMAIL = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': config('OUTBOUND_EMAIL_MAX_ATTEMPTS', default=5, cast=int),
+    'RETRY_DELAY': 60,
+    'MAX_RETRY_DELAY': 3600,
+}
+
+# MESSAGE_CHANNEL_BACKEND=fake routes every channel to the local fake backend
+# (no messages leave the server), e.g. for load tests
+if config('MESSAGE_CHANNEL_BACKEND', default='') == 'fake':
+    for channel_config in MESSAGE_CHANNELS.values():
+        channel_config['BACKEND'] = 'events.channels.FakeChannel'
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings, read automatically when gunicorn starts in the project
+directory (run it without an application argument).
+
+GUNICORN_PROFILE (in .env or the environment) selects how requests are
+served:
+
+  sync - the WSGI application on sync workers, one request per worker at a
+         time (default)
+  asgi - the ASGI application on uvicorn workers: async views (the JSON
+         endpoints and the live message status stream) wait on the database,
+         cache and open connections without holding a worker; needs
+         `pip install uvicorn uvicorn-worker`
+
+Compare both with `python manage.py benchmark_polling`.
+"""
+
+import multiprocessing
+
+from decouple import config
+
+profile = config('GUNICORN_PROFILE', default='sync')
+
+bind = config('GUNICORN_BIND', default='127.0.0.1:8000')
+
+if profile == 'asgi':
+    wsgi_app = 'events_project.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # Each worker serves many connections; one per core is enough
+    workers = config('GUNICORN_WORKERS', default=multiprocessing.cpu_count(), cast=int)
+elif profile == 'sync':
+    wsgi_app = 'events_project.wsgi:application'
+    worker_class = 'sync'
+    workers = config('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+else:
+    raise RuntimeError(f"Unknown GUNICORN_PROFILE '{profile}' (expected 'sync' or 'asgi')")
+
+timeout = config('GUNICORN_TIMEOUT', default=60, cast=int)